@@ -0,0 +1,125 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import app_logger as logger
+from config import (
+    API_BASE_URL,
+    HTTP_POOL_SIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_RETRY_STATUSES,
+    HTTP_TIMEOUTS
+)
+
+class ApiClient:
+    """
+    Shared HTTP client for the API and image hosts
+    
+    One requests.Session keeps connections alive across calls and threads
+    (urllib3's connection pool is thread-safe). Responses are negotiated
+    with gzip/deflate, every request gets a timeout, and 429/5xx responses
+    and connection failures are retried with exponential backoff.
+    
+    Only idempotent methods are retried on a 429/5xx response; a POST is
+    retried only when the connection failed before the request was sent.
+    """
+    SUPPORTED_METHODS = ("GET", "POST", "PUT", "DELETE")
+    
+    def __init__(self, base_url=API_BASE_URL, pool_size=HTTP_POOL_SIZE,
+                 max_retries=HTTP_MAX_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR,
+                 timeouts=HTTP_TIMEOUTS):
+        self.base_url = base_url
+        self.timeouts = timeouts
+        
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=HTTP_RETRY_STATUSES,
+            respect_retry_after_header=True,
+            # Hand the last response back so callers can report its status
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+    
+    def url_for(self, endpoint):
+        """Absolute URL for an API endpoint; absolute URLs are returned unchanged"""
+        if endpoint.startswith(('http://', 'https://')):
+            return endpoint
+        return f"{self.base_url}{endpoint}"
+    
+    def timeout_for(self, endpoint):
+        """(connect, read) timeout for an endpoint, matched by longest prefix"""
+        matches = [prefix for prefix in self.timeouts if prefix != "default" and endpoint.startswith(prefix)]
+        if matches:
+            return self.timeouts[max(matches, key=len)]
+        return self.timeouts["default"]
+    
+    def request(self, method, endpoint, timeout=None, **kwargs):
+        """
+        Send a request through the shared session
+        
+        Args:
+            method (str): GET, POST, PUT or DELETE
+            endpoint (str): API endpoint path or absolute URL
+            timeout (float or tuple, optional): Overrides the endpoint's timeout
+            **kwargs: Passed to requests (cookies, json, data, headers, stream, ...)
+            
+        Returns:
+            requests.Response: The response, including 4xx/5xx ones
+        """
+        method = method.upper()
+        if method not in self.SUPPORTED_METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        url = self.url_for(endpoint)
+        if timeout is None:
+            timeout = self.timeout_for(endpoint)
+        
+        return self.session.request(method, url, timeout=timeout, **kwargs)
+    
+    def get(self, endpoint, **kwargs):
+        """Send a GET request"""
+        return self.request("GET", endpoint, **kwargs)
+    
+    def post(self, endpoint, **kwargs):
+        """Send a POST request"""
+        return self.request("POST", endpoint, **kwargs)
+    
+    def put(self, endpoint, **kwargs):
+        """Send a PUT request"""
+        return self.request("PUT", endpoint, **kwargs)
+    
+    def delete(self, endpoint, **kwargs):
+        """Send a DELETE request"""
+        return self.request("DELETE", endpoint, **kwargs)
+    
+    def close(self):
+        """Close every pooled connection"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_api_client():
+    """Get the process-wide API client, creating it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ApiClient()
+            logger.log_debug(f"Created API client with a pool of {HTTP_POOL_SIZE} connections per host")
+        return _client
+
+def close_api_client():
+    """Close the process-wide API client, if one was created"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -1,12 +1,58 @@
 """
 app_logger.py - Standalone logger module for Book Catalog Formatter application
 This module provides global logging functions that can be used from any part of the application
+
+Logging never touches the UI or blocks on I/O in the calling thread, so it is
+safe from background threads. Each message is queued twice:
+- as a record for a writer thread, which writes records in batches to the
+  console and to a JSON-lines log file (LOG_FILE_PATH, rotated at
+  LOG_FILE_MAX_BYTES with LOG_FILE_BACKUPS old files kept)
+- for its log tab, drawn in batches by a Tk after() loop every LOG_UI_REFRESH_MS
+
+The log tabs keep at most LOG_UI_MAX_LINES lines each.
+
+Long-running work is wrapped in operation() so its messages share a
+correlation ID and its duration is recorded:
+
+    with logger.operation("download", url=url) as op:
+        ...
+
+    @logger.operation("sync")
+    def synchronize_data(self, ...):
+        ...
+
+tools/log_report.py summarizes the log files offline.
+
+Pass large or costly values as arguments rather than formatting them into
+the message, so no work is done for disabled debug messages:
+
+    logger.log_debug("adding author %s", author_data)
+    logger.log_debug("payload: %s", logger.LazyArg(lambda: json.dumps(payload)))
+
+A LazyArg is resolved only when the message is logged; any other
+argument, callables included, is logged as it is. Arguments longer than
+LOG_MAX_ARG_LENGTH characters are cut short.
 """
 
+import atexit
+import collections
+import contextlib
+import contextvars
 import datetime
+import json
+import os
+import queue
+import reprlib
 import sys
+import threading
+import time
+import uuid
 import tkinter as tk
 from tkinter import ttk
+from config import (
+    LOG_UI_REFRESH_MS, LOG_UI_MAX_LINES, LOG_MAX_ARG_LENGTH,
+    LOG_FILE_PATH, LOG_FILE_MAX_BYTES, LOG_FILE_BACKUPS
+)
 
 # Global variables to hold references to log widgets
 debug_text = None
@@ -16,15 +62,87 @@ debug_notebook = None
 debug_enabled = True
 root = None
 
-# Log queues for when UI is not available yet
-debug_queue = []
-warning_queue = []
-error_queue = []
+# Lines waiting to be drawn in each log tab (appended from any thread,
+# drained by the Tk thread). Bounded, so a flood drops the oldest lines
+# rather than growing without limit while the UI catches up.
+_ui_pending = {
+    "debug": collections.deque(maxlen=LOG_UI_MAX_LINES),
+    "warning": collections.deque(maxlen=LOG_UI_MAX_LINES),
+    "error": collections.deque(maxlen=LOG_UI_MAX_LINES),
+}
+
+# Bounded repr for container arguments, so a huge payload is never fully stringified
+_arg_repr = reprlib.Repr()
+_arg_repr.maxlevel = 3
+_arg_repr.maxdict = _arg_repr.maxlist = _arg_repr.maxtuple = _arg_repr.maxset = 10
+_arg_repr.maxstring = _arg_repr.maxother = LOG_MAX_ARG_LENGTH
+
+# Records waiting for the writer thread
+_record_queue = queue.SimpleQueue()
+_write_lock = threading.Lock()
+
+# (correlation ID, name) of the operation the current code runs in
+_current_operation = contextvars.ContextVar("log_operation", default=None)
+
+class _JsonLinesFile:
+    """Size-rotated JSON-lines log file (writer thread only)"""
+    def __init__(self, path, max_bytes, backups):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.enabled = bool(path)
+        self.file = None
+        self.size = 0
+
+    def write(self, records):
+        """Append records as one JSON object per line, rotating first if the file would grow too big"""
+        if not self.enabled:
+            return
+        data = "".join(json.dumps(record, default=str, ensure_ascii=False) + "\n" for record in records)
+        data = data.encode("utf-8")
+        try:
+            if self.file is None:
+                self._open()
+            if self.size and self.size + len(data) > self.max_bytes:
+                self._rotate()
+            self.file.write(data)
+            self.file.flush()
+            self.size += len(data)
+        except OSError as e:
+            self.enabled = False
+            sys.stdout.write(f"[ERROR] Log file disabled: {str(e)}\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "ab")
+        self.size = self.file.tell()
+
+    def _rotate(self):
+        """Shift log -> log.1 -> log.2 ..., dropping the oldest"""
+        self.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+_log_file = _JsonLinesFile(LOG_FILE_PATH, LOG_FILE_MAX_BYTES, LOG_FILE_BACKUPS)
 
 def initialize(tk_root, debug_text_widget, error_text_widget,warning_text_widget, debug_notebook_widget):
     """Initialize the logger with UI components"""
     global debug_text, error_text, debug_notebook, root, warning_text
-    
+
     debug_text = debug_text_widget
     error_text = error_text_widget
 
@@ -32,15 +150,9 @@ def initialize(tk_root, debug_text_widget, error_text_widget,warning_text_widget
 
     debug_notebook = debug_notebook_widget
     root = tk_root
-    
-    # Process any queued messages
-    for message in debug_queue:
-        log_debug(message)
-    debug_queue.clear()
-    
-    for message in error_queue:
-        log_error(message)
-    error_queue.clear()
+
+    # Start drawing queued messages, including any logged before the UI existed
+    root.after(0, _drain_ui)
 
 
 def set_debug_enabled(enabled):
@@ -48,93 +160,210 @@ def set_debug_enabled(enabled):
     global debug_enabled
     debug_enabled = enabled
 
-def log_debug(message):
-    """Log a debug message to the debug text widget and console"""
+def set_file_logging(enabled):
+    """Enable or disable writing records to the log file"""
+    with _write_lock:
+        _log_file.enabled = bool(enabled and LOG_FILE_PATH)
+        if not _log_file.enabled:
+            _log_file.close()
+
+def is_debug_enabled():
+    """Whether debug messages are logged, for callers guarding costly work of their own"""
+    return debug_enabled
+
+class LazyArg:
+    """A log argument computed by fn() only if its message is logged"""
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+def _render_arg(value):
+    """Resolve a lazy log argument, cutting long text short"""
+    if isinstance(value, LazyArg):
+        value = value.fn()
+    elif callable(value):
+        value = repr(value)
+    if isinstance(value, (list, tuple, dict, set)):
+        value = _arg_repr.repr(value)
+    if isinstance(value, (str, bytes)):
+        text = value if isinstance(value, str) else repr(value)
+        if len(text) > LOG_MAX_ARG_LENGTH:
+            return f"{text[:LOG_MAX_ARG_LENGTH]}... ({len(text)} chars)"
+        return text
+    return value
+
+def _format(message, args):
+    """Apply %-style arguments to a message, never raising from a bad format"""
+    if not args:
+        return message
+    rendered = tuple(_render_arg(arg) for arg in args)
+    try:
+        return message % rendered
+    except (TypeError, ValueError) as e:
+        return f"{message} {rendered!r} (bad log format: {e})"
+
+def _emit(level, message, args=(), ui=True):
+    """Format and queue a message for the console, log file and (unless ui is False) its log tab"""
+    message = _format(message, args)
+    now = datetime.datetime.now()
+
+    record = {
+        "ts": now.isoformat(timespec="milliseconds"),
+        "level": level,
+        "msg": message,
+        "thread": threading.current_thread().name,
+    }
+    current = _current_operation.get()
+    if current:
+        record["op"], record["op_name"] = current
+
+    _record_queue.put(record)
+    if ui:
+        _ui_pending[level].append(f"[{now.strftime('%H:%M:%S')}] {message}")
+
+@contextlib.contextmanager
+def operation(name, **fields):
+    """
+    Run a block (or, as a decorator, a function) as one logged operation
+
+    Messages logged inside carry the operation's correlation ID. When it
+    ends, an "op" record with its duration in ms, its status ("ok", or
+    "error" if it raised) and fields goes to the log file. The yielded
+    dict is fields; set op["status"] to record another outcome, e.g.
+    "failed". Operations started inside are recorded with this one as
+    their parent. New threads start outside any operation unless they run
+    in a copy of the caller's context (contextvars.copy_context()).
+    """
+    parent = _current_operation.get()
+    op_id = uuid.uuid4().hex[:12]
+    token = _current_operation.set((op_id, name))
+    started = time.monotonic()
+    status = None
+    try:
+        yield fields
+    except BaseException as e:
+        status = "error"
+        fields["error"] = str(e)
+        raise
+    finally:
+        _current_operation.reset(token)
+        record = {
+            "ts": datetime.datetime.now().isoformat(timespec="milliseconds"),
+            "level": "op",
+            "op": op_id,
+            "op_name": name,
+            "parent": parent[0] if parent else None,
+            "status": status or fields.get("status", "ok"),
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+        for key, value in fields.items():
+            record.setdefault(key, value)
+        _record_queue.put(record)
+
+def current_operation_id():
+    """Correlation ID of the operation the caller runs in, or None"""
+    current = _current_operation.get()
+    return current[0] if current else None
+
+def log_debug(message, *args):
+    """Log a debug message to the debug text widget and console; args are formatted only if debug is enabled"""
     if not debug_enabled:
         return
-        
-    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    formatted_message = f"[{timestamp}] {message}"
-    
-    # Always print to console
-    print(f"[DEBUG] {formatted_message}")
-    sys.stdout.flush()  # Force flush stdout to ensure message appears
-    
-    # If UI not initialized yet, queue the message
-    if debug_text is None:
-        debug_queue.append(message)
-        return
-    
-    # Update the UI
+    _emit("debug", message, args)
+
+def log_warning(message, *args):
+    """Log a warning message to the warning text widget and console"""
+    _emit("warning", message, args)
+
+def log_error(message, *args):
+    """Log an error message to the error text widget and console"""
+    _emit("error", message, args)
+
+def flush():
+    """Write every queued record now (also runs at exit)"""
+    with _write_lock:
+        records = []
+        while True:
+            try:
+                records.append(_record_queue.get_nowait())
+            except queue.Empty:
+                break
+        if records:
+            _write_records(records)
+
+def _write_records(records):
+    """Write a batch of records: messages to the console, everything to the log file"""
+    lines = [
+        f"[{record['level'].upper()}] [{record['ts'][11:19]}] {record['msg']}\n"
+        for record in records if record["level"] != "op"
+    ]
     try:
-        debug_text.configure(state="normal")
-        debug_text.insert(tk.END, formatted_message + "\n")
-        debug_text.see(tk.END)  # Scroll to the bottom
-        debug_text.configure(state="disabled")
-        
-        # Process events to update UI
-        if root:
-            root.update_idletasks()
-    except Exception as e:
-        print(f"[ERROR] Failed to update debug log UI: {str(e)}")
-        sys.stdout.flush()
-
-def log_warning(message):
-    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    formatted_message = f"[{timestamp}] {message}"
-    print(f"[WARNING] {formatted_message}")
-    sys.stdout.flush()
-    if error_text is None:
-        warning_queue.append(message)
-        return
+        if lines:
+            sys.stdout.write("".join(lines))
+            sys.stdout.flush()
+    except Exception:
+        pass
+    _log_file.write(records)
+
+def _write_loop():
+    """Writer thread: wait for a record, then write everything queued behind it at once"""
+    while True:
+        first = _record_queue.get()
+        with _write_lock:
+            records = [first]
+            while True:
+                try:
+                    records.append(_record_queue.get_nowait())
+                except queue.Empty:
+                    break
+            _write_records(records)
+
+def _drain_ui():
+    """Draw queued lines into the log tabs (Tk thread only), then reschedule"""
     try:
-        warning_text.configure(state="normal")
-        warning_text.insert(tk.END, formatted_message + "\n")
-        warning_text.see(tk.END)
-        warning_text.configure(state="disabled")
+        for level, widget in (("debug", debug_text), ("warning", warning_text), ("error", error_text)):
+            pending = _ui_pending[level]
+            if widget is None or not pending:
+                continue
 
-        if debug_notebook:
-                debug_notebook.select(1)
-        if root:
-            root.update_idletasks()
-    except Exception as E:
-        print(f"[ERROR] FAILED TO update warning log UI: {str(e)}")
-        sys.stdout.flush()
+            lines = []
+            while True:
+                try:
+                    lines.append(pending.popleft())
+                except IndexError:
+                    break
+            _append_lines(widget, lines)
 
-def log_error(message):
-    """Log an error message to the error text widget and console"""
-    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    formatted_message = f"[{timestamp}] {message}"
-    
-    # Always print to console
-    print(f"[ERROR] {formatted_message}")
-    sys.stdout.flush()  # Force flush stdout to ensure message appears
-    
-    # If UI not initialized yet, queue the message
-    if error_text is None:
-        error_queue.append(message)
+            # Switch to the tab holding new warnings or errors
+            if level != "debug" and debug_notebook:
+                debug_notebook.select(widget.master)
+    except tk.TclError:
+        # The window is gone; queued lines still reach the console
         return
-    
-    # Update the UI
-    try:
-        error_text.configure(state="normal")
-        error_text.insert(tk.END, formatted_message + "\n")
-        error_text.see(tk.END)  # Scroll to the bottom
-        error_text.configure(state="disabled")
-        
-        # Switch to error tab
-        if debug_notebook:
-            debug_notebook.select(1)
-            
-        # Process events to update UI
-        if root:
-            root.update_idletasks()
     except Exception as e:
-        print(f"[ERROR] Failed to update error log UI: {str(e)}")
-        sys.stdout.flush()
+        _emit("error", "Failed to update log UI: %s", (str(e),), ui=False)
+
+    try:
+        root.after(LOG_UI_REFRESH_MS, _drain_ui)
+    except tk.TclError:
+        pass
+
+def _append_lines(widget, lines):
+    """Insert lines in one edit, dropping the oldest beyond LOG_UI_MAX_LINES"""
+    widget.configure(state="normal")
+    widget.insert(tk.END, "\n".join(lines) + "\n")
+
+    line_count = int(widget.index("end-1c").split(".")[0]) - 1
+    if line_count > LOG_UI_MAX_LINES:
+        widget.delete("1.0", f"{line_count - LOG_UI_MAX_LINES + 1}.0")
+
+    widget.see(tk.END)  # Scroll to the bottom
+    widget.configure(state="disabled")
 
 def clear_debug_log():
     """Clear the debug log"""
+    _ui_pending["debug"].clear()
     if debug_text:
         debug_text.configure(state="normal")
         debug_text.delete(1.0, tk.END)
@@ -142,6 +371,7 @@ def clear_debug_log():
 
 def clear_warning_log():
     """Clear the warning log"""
+    _ui_pending["warning"].clear()
     if warning_text:
         warning_text.configure(state="normal")
         warning_text.delete(1.0, tk.END)
@@ -149,7 +379,11 @@ def clear_warning_log():
 
 def clear_error_log():
     """Clear the error log"""
+    _ui_pending["error"].clear()
     if error_text:
         error_text.configure(state="normal")
         error_text.delete(1.0, tk.END)
         error_text.configure(state="disabled")
+
+threading.Thread(target=_write_loop, name="log-writer", daemon=True).start()
+atexit.register(flush)
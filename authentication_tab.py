@@ -1,8 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
 import json
-from config import API_BASE_URL, LOGIN_ENDPOINT, AUTHOR_STATUS_ENDPOINT, PUBLISHER_STATUS_ENDPOINT
+from config import LOGIN_ENDPOINT, AUTHOR_STATUS_ENDPOINT, PUBLISHER_STATUS_ENDPOINT
+from api_client import get_api_client
 from data_sync import DataSynchronizer
 
 class AuthenticationTab:
@@ -17,6 +17,7 @@ class AuthenticationTab:
         self.is_authenticated = tk.BooleanVar(value=False)
         self.session_token = None
         self.cookies = None
+        self.api_client = get_api_client()
         
         self.setup_tab()
     
@@ -106,13 +107,12 @@ class AuthenticationTab:
             return
         
         # Prepare the login request
-        url = f"{API_BASE_URL}{LOGIN_ENDPOINT}"
         headers = {"Content-Type": "application/json"}
         data = {"email": email, "password": password}
         
         try:
             # Send the login request
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = self.api_client.post(LOGIN_ENDPOINT, headers=headers, data=json.dumps(data))
             
             # Check if login was successful
             if response.status_code == 200:
@@ -159,10 +159,8 @@ class AuthenticationTab:
     
     def check_author_status(self):
         """Check if the current user is an author"""
-        url = f"{API_BASE_URL}{AUTHOR_STATUS_ENDPOINT}"
-        
         try:
-            response = requests.get(url, cookies=self.cookies)
+            response = self.api_client.get(AUTHOR_STATUS_ENDPOINT, cookies=self.cookies)
             
             if response.status_code == 200:
                 data = response.json()
@@ -201,10 +199,8 @@ class AuthenticationTab:
     
     def check_publisher_status(self):
         """Check if the current user is a publisher"""
-        url = f"{API_BASE_URL}{PUBLISHER_STATUS_ENDPOINT}"
-        
         try:
-            response = requests.get(url, cookies=self.cookies)
+            response = self.api_client.get(PUBLISHER_STATUS_ENDPOINT, cookies=self.cookies)
             
             if response.status_code == 200:
                 data = response.json()
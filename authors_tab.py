@@ -1,11 +1,11 @@
 import tkinter as tk
 import os
 from tkinter import ttk, messagebox
-import requests
 from PIL import Image, ImageTk
 from io import BytesIO
 import json
 from csv_import_handler import CSVImportHandler
+from api_client import get_api_client
 
 class AuthorsTab:
     def __init__(self, parent):
@@ -364,7 +364,7 @@ class AuthorsTab:
                 image = Image.open(local_path)
             else:
                 # Fall back to downloading from URL
-                response = requests.get(url)
+                response = get_api_client().get(url)
                 image = Image.open(BytesIO(response.content))
             
             # Resize to 128x128 for preview
@@ -1,9 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
-import requests
+import queue
 import threading
 import app_logger as logger
+import tracing
+from api_client import get_api_client
 from config import (
     API_BASE_URL, 
     LOGIN_ENDPOINT, 
@@ -27,12 +29,17 @@ class BookCatalogFormatter:
         
         # API base URL
         self.api_base_url = API_BASE_URL
+        self.api_client = get_api_client()
         
         # Data storage (will be populated from database)
         self.authors = []
         self.books = []
         self.genre_relations = []
         
+        # Whether a background sync is running, and its phase ("push" or "pull")
+        self._sync_running = False
+        self._sync_phase = None
+        
         # Authentication data
         self.cookies = None
         self.is_authenticated = tk.BooleanVar(value=False)
@@ -110,6 +117,15 @@ class BookCatalogFormatter:
         )
         self.sync_button.pack(side=tk.RIGHT, padx=5)
         
+        # Cancels a running push; enabled only while one is in progress
+        self.cancel_sync_button = ttk.Button(
+            self.sync_frame,
+            text="Cancel",
+            command=self.cancel_sync,
+            state="disabled"
+        )
+        self.cancel_sync_button.pack(side=tk.RIGHT, padx=5)
+        
         # Create debugging and error message frames
         self.create_debug_frames()
     
@@ -189,16 +205,10 @@ class BookCatalogFormatter:
         try:
             logger.log_debug(f"Making {method} request to {url}")
             
-            if method.upper() == "GET":
-                response = requests.get(url, cookies=self.cookies, headers=headers)
-            elif method.upper() == "POST":
-                response = requests.post(url, json=data, cookies=self.cookies, headers=headers)
-            elif method.upper() == "PUT":
-                response = requests.put(url, json=data, cookies=self.cookies, headers=headers)
-            elif method.upper() == "DELETE":
-                response = requests.delete(url, cookies=self.cookies, headers=headers)
+            if method.upper() in ("GET", "DELETE"):
+                response = self.api_client.request(method, endpoint, cookies=self.cookies, headers=headers)
             else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+                response = self.api_client.request(method, endpoint, json=data, cookies=self.cookies, headers=headers)
                 
             if response.status_code >= 400:
                 logger.log_error(f"API Error ({response.status_code}): {response.text}")
@@ -339,7 +349,9 @@ class BookCatalogFormatter:
         ):
             # Disable sync button during sync
             self.sync_button.configure(state="disabled")
-            self.status_var.set("Syncing with server...")
+            self.cancel_sync_button.configure(state="normal")
+            self.status_var.set("Push: preparing changes...")
+            self._sync_phase = "push"
             
             def do_sync():
                 """Perform sync in a separate thread"""
@@ -351,10 +363,64 @@ class BookCatalogFormatter:
             # Start sync in a separate thread
             sync_thread = threading.Thread(target=do_sync, daemon=True)
             sync_thread.start()
+            
+            # Show push and image download progress reported by the sync thread
+            self._sync_running = True
+            self._poll_sync_progress()
+    
+    def cancel_sync(self):
+        """Stop a running push after the uploads in flight"""
+        self.push_synchronizer.cancel()
+        self.cancel_sync_button.configure(state="disabled")
+        self.status_var.set("Cancelling...")
+    
+    def _drain_latest(self, progress_queue):
+        """Get the most recent item from a progress queue, or None if it is empty"""
+        latest = None
+        try:
+            while True:
+                latest = progress_queue.get_nowait()
+        except queue.Empty:
+            pass
+        return latest
+    
+    def _poll_sync_progress(self):
+        """
+        Drain push and image download progress from their queues into the status bar
+        
+        The sync runs in two phases: the push, which can be cancelled, then
+        the pull of the latest data, which cannot. Only the current phase's
+        progress is shown, prefixed with the phase.
+        """
+        push_progress = self._drain_latest(self.push_synchronizer.progress_queue)
+        image_progress = self._drain_latest(self.synchronizer.image_processor.image_downloader.progress_queue)
+        
+        if push_progress and self._sync_running:
+            kind, completed, total, elapsed = push_progress
+            if kind == "pull":
+                self._sync_phase = "pull"
+                self.cancel_sync_button.configure(state="disabled")
+                self.status_var.set("Pull: fetching the latest data...")
+            else:
+                status = f"Push: {completed}/{total} changes"
+                if completed and elapsed > 0:
+                    rate = completed / elapsed
+                    eta = (total - completed) / rate
+                    status += f" ({rate:.1f}/s, ETA {int(eta)}s)"
+                self.status_var.set(status)
+        
+        if image_progress and self._sync_running and self._sync_phase == "pull":
+            kind, completed, total = image_progress
+            self.status_var.set(f"Pull: downloading {kind} images {completed}/{total}")
+        
+        if self._sync_running:
+            self.root.after(200, self._poll_sync_progress)
 
     def _sync_completed(self, success):
         """Called when sync is complete"""
+        self._sync_running = False
         self.sync_button.configure(state="normal")
+        self.cancel_sync_button.configure(state="disabled")
         self.status_var.set("")
         
         if success:
@@ -367,9 +433,12 @@ class BookCatalogFormatter:
                 parent=self.root
             )
         else:
+            # One summary of every failed upload instead of a dialog per failure
+            report = self.push_synchronizer.format_report()
             messagebox.showerror(
                 "Sync Failed", 
-                "Some errors occurred during synchronization. Check the error log for details.", 
+                "Some errors occurred during synchronization. Check the error log for details."
+                + (f"\n\n{report}" if report else ""), 
                 parent=self.root
             )
             # Show the error log
@@ -456,6 +525,60 @@ class BookCatalogFormatter:
                                           command=logger.clear_error_log)
         self.clear_error_btn.pack(side=tk.LEFT, padx=5)
         
+        # Create timings tab with the stage breakdown of the last sync, push or import
+        self.timings_tab = ttk.Frame(self.debug_notebook)
+        self.debug_notebook.add(self.timings_tab, text="Timings")
+        
+        self.timings_label = ttk.Label(self.timings_tab, text="No sync, push or import timed yet")
+        self.timings_label.pack(anchor=tk.W, padx=5, pady=(5, 0))
+        
+        self.timings_scroll = ttk.Scrollbar(self.timings_tab)
+        self.timings_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.timings_tree = ttk.Treeview(self.timings_tab, columns=("calls", "total", "share"), height=8,
+                                         yscrollcommand=self.timings_scroll.set)
+        self.timings_tree.heading("#0", text="Stage")
+        self.timings_tree.heading("calls", text="Calls")
+        self.timings_tree.heading("total", text="Total (s)")
+        self.timings_tree.heading("share", text="% of run")
+        for column in ("calls", "total", "share"):
+            self.timings_tree.column(column, width=90, anchor=tk.E, stretch=False)
+        self.timings_tree.pack(fill=tk.BOTH, expand=True)
+        self.timings_scroll.config(command=self.timings_tree.yview)
+        
+        self.shown_trace = None
+        self.root.after(1000, self.poll_timings)
+        
+        # Create queries tab listing the costliest SQL statements while profiling is on
+        self.queries_tab = ttk.Frame(self.debug_notebook)
+        self.debug_notebook.add(self.queries_tab, text="Queries")
+        
+        self.queries_controls = ttk.Frame(self.queries_tab)
+        self.queries_controls.pack(fill=tk.X, pady=5)
+        
+        self.profile_queries = tk.BooleanVar(value=self.db_manager.connection_manager.profiler is not None)
+        ttk.Checkbutton(self.queries_controls, text="Profile Queries", variable=self.profile_queries,
+                        command=self.toggle_query_profiling).pack(side=tk.LEFT, padx=5)
+        
+        self.query_order = tk.StringVar(value="total")
+        ttk.Label(self.queries_controls, text="Order by:").pack(side=tk.LEFT, padx=(10, 2))
+        query_order_combo = ttk.Combobox(self.queries_controls, textvariable=self.query_order, width=8,
+                                         values=("total", "mean", "p95", "max", "count"), state="readonly")
+        query_order_combo.pack(side=tk.LEFT)
+        query_order_combo.bind("<<ComboboxSelected>>", lambda e: self.refresh_query_report())
+        
+        ttk.Button(self.queries_controls, text="Refresh", command=self.refresh_query_report).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.queries_controls, text="Reset", command=self.reset_query_profile).pack(side=tk.LEFT, padx=5)
+        
+        self.queries_scroll = ttk.Scrollbar(self.queries_tab)
+        self.queries_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.queries_text = tk.Text(self.queries_tab, height=10, yscrollcommand=self.queries_scroll.set,
+                                    wrap=tk.NONE, font=("Courier", 9))
+        self.queries_text.pack(fill=tk.BOTH, expand=True)
+        self.queries_scroll.config(command=self.queries_text.yview)
+        self.refresh_query_report()
+        
         # Collapse button to minimize the debug section
         self.debug_visible = tk.BooleanVar(value=True)
         self.toggle_debug_btn = ttk.Button(self.debug_frame, text="▲ Hide Debug", command=self.toggle_debug_visibility)
@@ -464,6 +587,72 @@ class BookCatalogFormatter:
         # Initialize the logger module with our UI components
         logger.initialize(self.root, self.debug_text, self.error_text, self.warning_text, self.debug_notebook)
         
+    def poll_timings(self):
+        """Show each newly finished trace in the Timings tab (checked once a second)"""
+        latest = tracing.latest()
+        if latest is not None and latest is not self.shown_trace:
+            self.show_trace(latest)
+        self.root.after(1000, self.poll_timings)
+    
+    def show_trace(self, trace):
+        """Fill the Timings tab with a trace's per-stage breakdown"""
+        self.shown_trace = trace
+        self.timings_tree.delete(*self.timings_tree.get_children())
+        
+        for stage in trace.breakdown():
+            parent = " > ".join(stage['path'][:-1])
+            self.timings_tree.insert(
+                parent if self.timings_tree.exists(parent) else "", tk.END,
+                iid=" > ".join(stage['path']), text=stage['name'], open=stage['depth'] < 2,
+                values=(stage['count'], f"{stage['total_ms'] / 1000:.2f}", f"{stage['share']:.0%}")
+            )
+        
+        summary = f"{trace.name} at {trace.started_at.strftime('%H:%M:%S')}: {trace.duration:.1f}s"
+        if trace.export_path:
+            summary += f" (trace saved to {trace.export_path})"
+        self.timings_label.configure(text=summary)
+        
+        # List the top queries of the run that just finished
+        profiler = self.db_manager.connection_manager.profiler
+        if profiler is not None:
+            self.refresh_query_report()
+            logger.log_debug("Queries after %s:\n%s", trace.name,
+                             logger.LazyArg(lambda: profiler.format_report(10)))
+    
+    def toggle_query_profiling(self):
+        """Turn SQL query profiling on or off from the Queries tab"""
+        if self.profile_queries.get():
+            self.db_manager.connection_manager.enable_profiling()
+        else:
+            self.db_manager.connection_manager.disable_profiling()
+        self.refresh_query_report()
+    
+    def reset_query_profile(self):
+        """Forget the queries profiled so far"""
+        profiler = self.db_manager.connection_manager.profiler
+        if profiler is not None:
+            profiler.reset()
+        self.refresh_query_report()
+    
+    def refresh_query_report(self):
+        """Show the top queries and the recent slow queries in the Queries tab"""
+        profiler = self.db_manager.connection_manager.profiler
+        if profiler is None:
+            report = "Query profiling is off. Tick Profile Queries, then run a sync or import."
+        else:
+            report = profiler.format_report(30, self.query_order.get())
+            slow_queries = list(profiler.slow_log)[-20:]
+            if slow_queries:
+                report += f"\n\nSlowest recent queries (over {profiler.slow_query_ms} ms):"
+                for entry in reversed(slow_queries):
+                    report += f"\n{entry['ms']:9.1f} ms  {entry['rows']} rows  {entry['query']}"
+                    report += "".join(f"\n              {line}" for line in entry['plan'])
+        
+        self.queries_text.configure(state="normal")
+        self.queries_text.delete(1.0, tk.END)
+        self.queries_text.insert(tk.END, report)
+        self.queries_text.configure(state="disabled")
+    
     def toggle_debug_visibility(self):
         """Toggle the visibility of the debug section"""
         if self.debug_visible.get():
@@ -1,9 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import os
-import io
 from utils import parse_dimensions
+from thumbnail_cache import ThumbnailCache
 import app_logger as logger
 
 class BookImagePreview:
@@ -13,6 +12,10 @@ class BookImagePreview:
         self.image_labels = {}
         self.image_tk_refs = {}  # Keep references to prevent garbage collection
         
+        # Thumbnails come from the on-disk cache (built during image download),
+        # so selecting a book never decodes the full-size originals
+        self.thumbnails = ThumbnailCache()
+        
         # Create preview frame
         self.preview_frame = ttk.LabelFrame(parent_frame, text="Image Previews")
         self.preview_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=10, pady=10)
@@ -119,36 +122,35 @@ class BookImagePreview:
                 
                 # Try to determine image type from dimensions
                 try:
-                    with Image.open(local_path) as img:
-                        width, height = img.size
-                        logger.log_debug(f"Image {image_id} dimensions: {width}x{height}")
+                    img_tk, (width, height) = self.thumbnails.get_photo(local_path)
+                    logger.log_debug(f"Image {image_id} dimensions: {width}x{height}")
+                    
+                    # Find matching image type
+                    matched_type = None
+                    for img_type in self.image_types:
+                        type_width, type_height = parse_dimensions(img_type)
                         
-                        # Find matching image type
-                        matched_type = None
-                        for img_type in self.image_types:
-                            type_width, type_height = parse_dimensions(img_type)
-                            
-                            # If dimensions match or are very close
-                            if (abs(width - type_width) < 5 and abs(height - type_height) < 5):
-                                matched_type = img_type.split(" (")[0]
+                        # If dimensions match or are very close
+                        if (abs(width - type_width) < 5 and abs(height - type_height) < 5):
+                            matched_type = img_type.split(" (")[0]
+                            break
+                    
+                    # If we found a match, display the image
+                    if matched_type and matched_type in self.image_labels:
+                        logger.log_debug(f"Displaying image {image_id} as {matched_type}")
+                        self._display_image(img_tk, matched_type)
+                    else:
+                        # Try to guess from filename
+                        matched_by_name = False
+                        for type_key, type_name in type_map.items():
+                            if type_key.lower() in os.path.basename(local_path).lower():
+                                logger.log_debug(f"Matched image {image_id} by filename as {type_name}")
+                                self._display_image(img_tk, type_name)
+                                matched_by_name = True
                                 break
                         
-                        # If we found a match, display the image
-                        if matched_type and matched_type in self.image_labels:
-                            logger.log_debug(f"Displaying image {image_id} as {matched_type}")
-                            self._display_image(local_path, matched_type)
-                        else:
-                            # Try to guess from filename
-                            matched_by_name = False
-                            for type_key, type_name in type_map.items():
-                                if type_key.lower() in os.path.basename(local_path).lower():
-                                    logger.log_debug(f"Matched image {image_id} by filename as {type_name}")
-                                    self._display_image(local_path, type_name)
-                                    matched_by_name = True
-                                    break
-                            
-                            if not matched_by_name:
-                                logger.log_debug(f"Could not match image {image_id} to any type")
+                        if not matched_by_name:
+                            logger.log_debug(f"Could not match image {image_id} to any type")
                         
                 except Exception as e:
                     logger.log_debug(f"Error processing image {image_id}: {str(e)}")
@@ -158,27 +160,14 @@ class BookImagePreview:
             for type_name, label in self.image_labels.items():
                 label.config(text=f"Error loading images")
     
-    def _display_image(self, image_path, type_name):
-        """Display a scaled image for the given type"""
+    def _display_image(self, img_tk, type_name):
+        """Display a cached 128px-wide thumbnail for the given type"""
         try:
-            # Load image with PIL
-            with Image.open(image_path) as img:
-                # Scale to 128px width while maintaining aspect ratio
-                width, height = img.size
-                new_width = 128
-                new_height = int((height / width) * new_width)
-                
-                # Resize using LANCZOS for better quality
-                img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Convert to PhotoImage
-                img_tk = ImageTk.PhotoImage(img_resized)
-                
-                # Update label
-                self.image_labels[type_name].config(image=img_tk, text="")
-                
-                # Keep reference to prevent garbage collection
-                self.image_tk_refs[type_name] = img_tk
+            # Update label
+            self.image_labels[type_name].config(image=img_tk, text="")
+            
+            # Keep reference to prevent garbage collection
+            self.image_tk_refs[type_name] = img_tk
                 
         except Exception as e:
             logger.log_debug(f"Error displaying image for {type_name}: {str(e)}")
@@ -174,7 +174,7 @@ class BooksTab:
                 if len(author) > 2 and author[2]:
                     author_name = author[2]
                     author_names.append(author_name)
-                    logger.log_debug(f"Added author: {author_name}")
+            logger.log_debug(f"Added {len(author_names)} authors to the dropdown")
         
         except Exception as e:
             logger.log_error(f"Error getting authors: {str(e)}")
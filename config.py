@@ -14,12 +14,103 @@ GENRE_ENDPOINT = "/api/genres"
 UPLOAD_AUTHOR_ENDPOINT = "/api/publisher/author/"
 UPLOAD_BOOK_ENDPOINT = "/api/publisher/book/"
 
+# HTTP Client Configuration
+HTTP_POOL_SIZE = 16  # Keep-alive connections per host, at least IMAGE_DOWNLOAD_WORKERS
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5  # Retry delays of 0.5s, 1s, 2s, ...
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# (connect, read) timeouts in seconds, by endpoint prefix
+HTTP_TIMEOUTS = {
+    "default": (5, 30),
+    PUBLISHER_AUTHORS_ENDPOINT: (5, 120),  # Full catalogue payloads
+    AUTHORS_ENDPOINT: (5, 120),
+}
+
 # Database Configuration
 DATABASE_PATH = "book_catalog.db"
+DB_POOL_SIZE = 8  # Max long-lived connections (one per thread)
+
+# SQLite PRAGMA profiles applied to every pooled connection.
+# WAL lets the UI read while the background sync thread writes.
+DB_PRAGMA_PROFILES = {
+    # Fastest writes for large imports; a crash may lose the last commits
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,  # 256MB (negative values are KiB)
+        "mmap_size": 536870912,  # 512MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,  # ms
+    },
+    # Default: safe in WAL mode, only the last commit can be lost on power failure
+    "interactive": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,  # 64MB
+        "mmap_size": 268435456,  # 256MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Every commit is fsynced before returning
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16384,  # 16MB
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+}
+DB_PRAGMA_PROFILE = "interactive"
+
+# Query profiling (off by default; can also be switched on from the Queries debug tab)
+DB_PROFILE_QUERIES = False  # Time every statement run through DatabaseConnectionManager
+DB_SLOW_QUERY_MS = 50  # Statements slower than this go to the slow-query log with their query plan
+DB_PROFILE_SAMPLES = 1000  # Recent durations kept per statement for the p95
+DB_SLOW_LOG_SIZE = 200  # Slow-query log entries kept
 
 # Image Upload Configuration
 UPLOAD_FOLDER = "uploads"
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
 
+# Image Download Configuration
+IMAGE_DOWNLOAD_WORKERS = 8  # Concurrent downloads across all hosts
+IMAGE_DOWNLOAD_PER_HOST = 4  # Concurrent downloads to any single host
+IMAGE_DOWNLOAD_TIMEOUT = 30  # Seconds
+IMAGE_DB_BATCH_SIZE = 50  # Downloaded images recorded per DB write
+IMAGE_STORE_PATH = "image_store"  # Content-addressed store for downloaded images
+IMAGE_STORE_GC_GRACE_MINUTES = 10  # Unreferenced blobs registered more recently than this are kept by GC
+
+# Thumbnail Cache Configuration
+THUMBNAIL_CACHE_PATH = "thumbnails"
+THUMBNAIL_PREVIEW_SIZE = (128, 4096)  # Book preview thumbnails: 128px wide, any height
+THUMBNAIL_MEMORY_ITEMS = 64  # Decoded thumbnails kept in memory
+
+# Sync Configuration
+SYNC_PIPELINE = True  # Overlap fetching, parsing, DB writes and image downloads
+SYNC_PIPELINE_QUEUE_SIZE = 32  # Body chunks / parsed authors buffered between stages
+SYNC_PIPELINE_IMAGE_QUEUE_SIZE = 256  # Image jobs buffered ahead of the download stage
+SYNC_INCREMENTAL = True  # Request only authors updated since the last sync, resuming interrupted ones
+SYNC_STAGED_MERGE = False  # Bulk-load the catalogue into staging tables and merge it in one transaction
+SYNC_WATERMARK_HEADER = "X-Sync-Watermark"  # Response header with the server time the catalogue is current to
+SYNC_WATERMARK_OVERLAP_SECONDS = 300  # Taken off the response Date when the server sends no watermark header
+
+# Logging Configuration
+LOG_UI_REFRESH_MS = 100  # How often queued log lines are drawn into the log tabs
+LOG_UI_MAX_LINES = 5000  # Lines kept in each log tab; older lines are dropped
+LOG_MAX_ARG_LENGTH = 500  # Longer log arguments are cut short, e.g. whole API payloads
+LOG_FILE_PATH = "logs/sirened_manager.jsonl"  # Structured log, one JSON record per line; empty to disable
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024  # Rotate the log file at this size
+LOG_FILE_BACKUPS = 5  # Rotated log files kept (.1 is the newest)
+
+# Tracing Configuration
+TRACE_ENABLED = True  # Time the stages of each sync, push and import (see the Timings debug tab)
+TRACE_EXPORT_PATH = "traces"  # Finished traces are saved here as Chrome trace-event JSON; empty to disable
+TRACE_MAX_SPANS = 50000  # Individual spans kept per trace for export; stage totals are always complete
+TRACE_HISTORY = 10  # Finished traces kept in memory, and exported files kept per kind of run
+
+# Push Configuration
+PUSH_WORKERS = 4  # Concurrent uploads when pushing local changes
+
 # Export Configuration
 EXPORT_FOLDER = "exports"
@@ -5,6 +5,7 @@ Author data processing functionality.
 import requests
 import sqlite3
 import app_logger as logger
+import tracing
 from exceptions import AuthorProcessingError, DatabaseError
 
 class AuthorProcessor:
@@ -15,32 +16,49 @@ class AuthorProcessor:
         self.db_manager = db_manager
         self.synchronizer = synchronizer
         
+    def author_row(self, author_info):
+        """
+        Validate API author data and build its authors table row
+        
+        Raises:
+            ValueError: If the author is empty or has no ID or name
+        """
+        if not author_info:
+            raise ValueError("Author information cannot be None or empty")
+        
+        if not author_info.get("id"):
+            raise ValueError("Author must have an ID")
+        
+        if not author_info.get("author_name", ""):
+            raise ValueError("Author must have a name")
+        
+        user_info = author_info.get("user", {})
+        
+        return {
+            'id': author_info.get("id"),
+            'userId': user_info.get("id") if user_info else None,
+            'author_name': author_info.get("author_name", ""),
+            'author_image_url': author_info.get("author_image_url"),
+            'birth_date': author_info.get("birth_date"),
+            'death_date': author_info.get("death_date"),
+            'website': author_info.get("website"),
+            'bio': author_info.get("bio")
+        }
+        
+    @tracing.span("process_author")
     def process_author(self, author_info):
         """Process and store author data in the database"""
         try:
-            if not author_info:
-                raise ValueError("Author information cannot be None or empty")
-            
             # Extract author data
-            api_author_id = author_info.get("id")
-            if not api_author_id:
-                raise ValueError("Author must have an ID")
-                
-            author_name = author_info.get("author_name", "")
-            if not author_name:
-                raise ValueError("Author must have a name")
-                
-            author_image_url = author_info.get("author_image_url")
-            birth_date = author_info.get("birth_date")
-            death_date = author_info.get("death_date")
-            website = author_info.get("website")
-            bio = author_info.get("bio")
+            author_data = self.author_row(author_info)
+            api_author_id = author_data['id']
+            author_name = author_data['author_name']
+            author_image_url = author_data['author_image_url']
             
             # Get user info if available
-            user_id = None
+            user_id = author_data['userId']
             user_info = author_info.get("user", {})
             if user_info:
-                user_id = user_info.get("id")
                 # Add user to database if it doesn't exist
                 if user_id:
                     try:
@@ -59,17 +77,6 @@ class AuthorProcessor:
                     (author_name,)
                 )
                 
-                author_data = {
-                    'id': api_author_id,
-                    'userId': user_id,
-                    'author_name': author_name,
-                    'author_image_url': author_image_url,
-                    'birth_date': birth_date,
-                    'death_date': death_date,
-                    'website': website,
-                    'bio': bio
-                }
-                
                 local_id = None
                 
                 if existing_authors:
@@ -82,16 +89,18 @@ class AuthorProcessor:
                     local_id = self.db_manager.authors.add(author_data)
                     if not local_id:
                         raise DatabaseError("Failed to add new author to database")
-                        
-                    # Store the mapping between API ID and local ID
-                    if not self.db_manager.settings.set(f"author_api_id_{api_author_id}", str(local_id)):
-                        logger.log_warning(f"Failed to store mapping for author ID {api_author_id}")
+                
+                # Store the mapping between API ID and local ID
+                self.db_manager.id_map.set("author", api_author_id, local_id)
                 
                 # Download author image if URL is provided
                 if author_image_url and local_id:
                     # Get image processor from synchronizer
                     image_processor = self.synchronizer.image_processor
                     
+                    if image_processor.defer_author_image(local_id, author_image_url):
+                        return local_id
+                    
                     try:
                         if not image_processor.download_author_image(local_id, author_image_url):
                             logger.log_warning(f"Failed to download image from {author_image_url}")
@@ -107,6 +116,6 @@ class AuthorProcessor:
                 raise DatabaseError(f"Error accessing database: {db_error}")
                 
         except Exception as e:
-            logger.log_error(f"Unexpected error processing author '{author_info.get('author_name', 'unknown')}': {e}")
+            logger.log_error(f"Unexpected error processing author '{(author_info or {}).get('author_name', 'unknown')}': {e}")
             raise AuthorProcessingError(f"Failed to process author: {e}")
 
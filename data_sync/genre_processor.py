@@ -5,35 +5,55 @@ Genre data processing functionality.
 import json
 from datetime import datetime
 import app_logger as logger
+import tracing
 from config import GENRE_ENDPOINT
+from .sync_utils import content_hash
 
 class GenreProcessor:
     """
     Handles processing and storing genre data
     """
+    # Settings key of the snapshot describing the last imported genre list
+    SNAPSHOT_KEY = "genres_snapshot"
+    
     def __init__(self, db_manager, synchronizer=None):
         self.db_manager = db_manager
         self.synchronizer = synchronizer
         
-    def sync_genres(self, cookies=None):
-        """Sync genre data from the API or import from provided format"""
+    @tracing.span("genre_fetch")
+    def fetch_genres(self, cookies):
+        """Fetch the genre list from the API; returns None if the request fails"""
+        response = self.synchronizer.make_api_request(GENRE_ENDPOINT, cookies)
+        
+        if response.status_code == 200:
+            return response.json()
+        
+        logger.log_error("unable to fetch genre data")
+        return None
+    
+    @tracing.span("genres")
+    def sync_genres(self, cookies=None, genres_data=None):
+        """
+        Sync genre data from the API or import from provided format
+        
+        genres_data, if given, is a genre list the caller already fetched
+        (e.g. the sync pipeline fetching concurrently with the catalogue).
+        """
         try:
             # Try to fetch genres from API first
-            if cookies and hasattr(self, 'synchronizer'):
-                response = self.synchronizer.make_api_request(GENRE_ENDPOINT, cookies)
-                
-                if response.status_code == 200:
-                    genres_data = response.json()
-                    self.import_genres(genres_data)
-                    return True
-                else:
-                    logger.log_error("unable to fetch genre data")
-            # If API fetch fails or no cookies, check if we have cached genres
-            cached_genres = self.db_manager.settings.get("cached_genres")
-            if cached_genres:
-                genres_data = json.loads(cached_genres)
+            if genres_data is None and cookies and hasattr(self, 'synchronizer'):
+                genres_data = self.fetch_genres(cookies)
+            
+            if genres_data is not None:
                 self.import_genres(genres_data)
                 return True
+            
+            # If API fetch fails or no cookies, the genres table still holds
+            # the last imported list for offline use
+            snapshot = self.get_snapshot()
+            if snapshot:
+                logger.log_debug(f"Using genre list v{snapshot['version']} from the last import")
+                return True
                 
             return False
             
@@ -41,22 +61,52 @@ class GenreProcessor:
             logger.log_error(f"Error syncing genres: {str(e)}")
             return False
     
+    def get_snapshot(self):
+        """
+        Describe the last imported genre list
+        
+        Returns:
+            dict or None: version, hash, count and imported_at, or None if
+                          no list has been imported
+        """
+        snapshot = self.db_manager.settings.get(self.SNAPSHOT_KEY)
+        return json.loads(snapshot) if snapshot else None
+    
+    @logger.operation("genre_import")
     def import_genres(self, genres_data):
-        """Import genres from the provided data structure"""
+        """
+        Import genres from the provided data structure
+        
+        Nothing is written when the list hashes the same as the last import.
+        Otherwise only new and changed genres are written, and the snapshot
+        moves to the next version.
+        """
         if not genres_data:
             logger.log_debug(f"give me something you piece of shit I'm so sick of stupid html responses")
             return False
-        logger.log_debug(f"importing genres: {genres_data}") 
+        
+        genres_hash = content_hash(genres_data)
+        snapshot = self.get_snapshot()
+        if snapshot and snapshot.get("hash") == genres_hash:
+            logger.log_debug(f"Genre list unchanged since v{snapshot['version']} ({len(genres_data)} genres), skipping import")
+            return True
+        
         try:
-            # Process each genre
-            for genre in genres_data:
-                # Add the genre to the database
-                self.db_manager.genres.add(genre)
+            with self.db_manager.transaction():
+                counts = self.db_manager.genres.upsert_changed(genres_data)
                 
-            # Cache the genres data for offline use
-            self.db_manager.settings.set("cached_genres", json.dumps(genres_data))
-            self.db_manager.settings.set("genres_last_updated", datetime.now().isoformat())
+                snapshot = {
+                    "version": (snapshot or {}).get("version", 0) + 1,
+                    "hash": genres_hash,
+                    "count": len(genres_data),
+                    "imported_at": datetime.now().isoformat()
+                }
+                self.db_manager.settings.set(self.SNAPSHOT_KEY, json.dumps(snapshot))
             
+            logger.log_debug(
+                f"Imported genre list v{snapshot['version']}: {counts['inserted']} added, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+            )
             return True
             
         except Exception as e:
@@ -85,20 +135,15 @@ class GenreProcessor:
             logger.log_error(f"Error importing genres from JSON: {str(e)}")
             return False
     
+    @tracing.span("book_genres")
     def process_book_genres(self, genres, book_id):
         """Process and store book genre associations"""
         if not genres or not book_id:
             return
             
-        # Clear existing genre associations for this book
-        self.db_manager.execute_query(
-            "DELETE FROM book_genres WHERE book_id = ?", 
-            (book_id,)
+        # Write only the associations that changed
+        self.db_manager.genres.reconcile_book_genres(
+            book_id,
+            [(genre["id"], 0, 0.0) for genre in genres if genre.get("id")]
         )
-        
-        # Add new genre associations
-        for genre in genres:
-            genre_id = genre.get("id")
-            if genre_id:
-                self.db_manager.books.add_genre(book_id, genre_id)
 
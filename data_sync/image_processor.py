@@ -3,6 +3,7 @@ Image processing and download functionality.
 """
 
 import app_logger as logger
+import tracing
 from image_downloader import ImageDownloader
 
 class ImageProcessor:
@@ -13,6 +14,11 @@ class ImageProcessor:
         self.db_manager = db_manager
         self.image_downloader = ImageDownloader(db_manager)
         
+        # When set to a list (by the sync pipeline), downloads are queued
+        # here as jobs instead of being fetched inline
+        self.deferred_jobs = None
+        
+    @tracing.span("image_downloads")
     def download_all_images(self):
         """Download all author and book images"""
         author_results = self.image_downloader.batch_download_author_images()
@@ -25,8 +31,28 @@ class ImageProcessor:
             'total_failed': author_results['failed'] + book_results['failed']
         }
         
+        # Drop blobs whose owners moved to other images, then report dedupe savings
+        try:
+            image_store = self.image_downloader.image_store
+            results['garbage_collected'] = image_store.garbage_collect()
+            results['store'] = image_store.report()
+        except Exception as e:
+            logger.log_error(f"Error maintaining image store: {str(e)}")
+        
         return results
         
+    def defer_author_image(self, author_id, image_url):
+        """
+        Queue an author image for the pipeline's download stage
+        
+        Returns:
+            bool: False when downloads aren't being deferred
+        """
+        if self.deferred_jobs is None:
+            return False
+        self.deferred_jobs.append({'kind': 'author', 'id': author_id, 'name': None, 'url': image_url})
+        return True
+    
     def download_author_image(self, author_id, image_url):
         """Download an author's profile image"""
         return self.image_downloader.download_author_image(author_id, image_url)
@@ -35,55 +61,48 @@ class ImageProcessor:
         """Download a book image"""
         return self.image_downloader.download_book_image(book_id, image_url, image_id)
     
+    def image_rows(self, images, book_local_id=None):
+        """Build images table rows for a book's API images, skipping any without a URL"""
+        return [
+            {
+                'bookId': book_local_id,
+                'imageUrl': image.get("imageUrl"),
+                'width': image.get("width"),
+                'height': image.get("height"),
+                'sizeKb': image.get("sizeKb")
+            }
+            for image in images or []
+            if image.get("imageUrl", "")
+        ]
+    
+    @tracing.span("book_images")
     def process_book_images(self, images, book_id):
         """Process and store book images in the database"""
         if not images:
             return
         
         # Find local book ID
-        book_local_id_setting = self.db_manager.settings.get(f"book_api_id_{book_id}")
-        if not book_local_id_setting:
+        book_local_id = self.db_manager.id_map.get("book", book_id)
+        if not book_local_id:
             logger.log_warning(f"Could not find local book ID for remote book ID {book_id}")
             return
         
-        book_local_id = int(book_local_id_setting)
+        image_rows = self.image_rows(images, book_local_id)
+        
+        # Insert or update all of the book's images in one batch
+        local_image_ids = self.db_manager.images.upsert_many(image_rows)
         
-        for image in images:
-            image_id = image.get("id")
-            image_url = image.get("imageUrl", "")
-            image_type = image.get("imageType", "")
-            width = image.get("width")
-            height = image.get("height")
-            size_kb = image.get("sizeKb")
-            
-            # Check if image already exists
-            existing_images = self.db_manager.execute_query(
-                "SELECT id FROM images WHERE bookId = ? AND imageUrl = ?",
-                (book_local_id, image_url)
-            )
-            
-            local_image_id = None
-            
-            if existing_images:
-                # Update existing image
-                local_image_id = existing_images[0][0]
-                self.db_manager.images.update(local_image_id, {
-                    'remote_url': image_url,
-                    'width': width,
-                    'height': height,
-                    'sizeKb': size_kb
-                })
+        # Download the images, or hand them to the pipeline's download stage
+        # grouped by URL, so an image listed twice is fetched once
+        jobs_by_url = {}
+        for image_row, local_image_id in zip(image_rows, local_image_ids):
+            if not local_image_id:
+                continue
+            if self.deferred_jobs is not None:
+                job = jobs_by_url.get(image_row['imageUrl'])
+                if job is None:
+                    job = jobs_by_url[image_row['imageUrl']] = {'kind': 'book', 'url': image_row['imageUrl'], 'images': []}
+                    self.deferred_jobs.append(job)
+                job['images'].append({'image_id': local_image_id, 'book_id': book_local_id, 'title': None})
             else:
-                # Insert new image record
-                local_image_id = self.db_manager.images.add({
-                    'bookId': book_local_id,
-                    'imageUrl': image_url,
-                    'width': width,
-                    'height': height,
-                    'sizeKb': size_kb
-                })
-            
-            # Download the image if URL is provided
-            if image_url and local_image_id:
-                self.download_book_image(book_local_id, image_url, local_image_id)
-
+                self.download_book_image(book_local_id, image_row['imageUrl'], local_image_id)
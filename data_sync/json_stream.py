@@ -0,0 +1,189 @@
+"""
+Incremental JSON reading for large API responses.
+"""
+
+import json
+import codecs
+
+class JsonStreamReader:
+    """
+    Pull-style reader over a stream of JSON text chunks
+
+    Containers are walked token by token (begin_array/next_item,
+    begin_object/next_key) so a large outer structure never has to be
+    held in memory; values the caller wants are decoded whole with
+    read_value(). Only the unread part of the text is buffered.
+    """
+    WHITESPACE = " \t\n\r"
+
+    def __init__(self, chunks, encoding="utf-8"):
+        """
+        Args:
+            chunks (iterable): bytes (or str) chunks, e.g. response.iter_content()
+            encoding (str): Encoding of byte chunks
+        """
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+        self._decode = json.JSONDecoder().raw_decode
+
+        # One entry per open container: True until its first member is read
+        self._first = []
+
+    def _fill(self):
+        """Append the next chunk to the buffer; returns False at end of stream"""
+        if self._exhausted:
+            return False
+
+        # Drop consumed text before growing the buffer
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        for chunk in self._chunks:
+            text = chunk if isinstance(chunk, str) else self._decoder.decode(chunk)
+            if text:
+                self._buffer += text
+                return True
+
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._exhausted = True
+        return False
+
+    def peek(self):
+        """Next non-whitespace character without consuming it, or '' at end of stream"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self.WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        """Consume one structural character"""
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expected '{char}', found '{found or 'end of data'}'",
+                                       self._buffer, self._pos)
+        self._pos += 1
+
+    def read_value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decode(self._buffer, self._pos)
+                # A number or literal at the very end may continue in the next chunk
+                if end < len(self._buffer) or self._exhausted:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._exhausted:
+                    raise
+
+            # Read at least as much again as is buffered, so a large value
+            # is re-scanned a logarithmic number of times, not once per chunk
+            target = 2 * (len(self._buffer) - self._pos) + 1
+            while len(self._buffer) - self._pos < target and self._fill():
+                pass
+
+    def begin_array(self):
+        """Enter the array at the current position"""
+        self._expect("[")
+        self._first.append(True)
+
+    def next_item(self):
+        """
+        Move to the next element of the current array
+
+        Returns:
+            bool: False once the closing bracket has been consumed
+        """
+        if self.peek() == "]":
+            self._pos += 1
+            self._first.pop()
+            return False
+        if not self._first[-1]:
+            self._expect(",")
+        self._first[-1] = False
+        return True
+
+    def begin_object(self):
+        """Enter the object at the current position"""
+        self._expect("{")
+        self._first.append(True)
+
+    def next_key(self):
+        """
+        Read the next key of the current object, leaving its value unread
+
+        Returns:
+            str: The key, or None once the closing brace has been consumed
+        """
+        if self.peek() == "}":
+            self._pos += 1
+            self._first.pop()
+            return None
+        if not self._first[-1]:
+            self._expect(",")
+        self._first[-1] = False
+
+        if self.peek() != '"':
+            raise json.JSONDecodeError("Expected object key", self._buffer, self._pos)
+        key = self.read_value()
+        self._expect(":")
+        return key
+
+
+def iter_publisher_catalogue(chunks):
+    """
+    Walk a /api/catalogue/publisher response as it streams in
+
+    The response is a list of {"publisher": {...}, "catalogue": [author entry, ...]}
+    objects. Each author entry is decoded and yielded on its own, so memory
+    stays bounded by the largest single author rather than the whole catalogue.
+
+    Args:
+        chunks (iterable): Response body chunks
+
+    Yields:
+        tuple: ("publisher", publisher dict) or ("author", author entry dict)
+    """
+    reader = JsonStreamReader(chunks)
+
+    reader.begin_array()
+    while reader.next_item():
+        reader.begin_object()
+        while True:
+            key = reader.next_key()
+            if key is None:
+                break
+
+            if key == "catalogue" and reader.peek() == "[":
+                reader.begin_array()
+                while reader.next_item():
+                    yield "author", reader.read_value()
+            elif key == "publisher":
+                yield "publisher", reader.read_value()
+            else:
+                reader.read_value()
+
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a top-level JSON array as they stream in
+
+    Args:
+        chunks (iterable): Response body chunks
+
+    Yields:
+        Each decoded array element
+    """
+    reader = JsonStreamReader(chunks)
+
+    reader.begin_array()
+    while reader.next_item():
+        yield reader.read_value()
@@ -0,0 +1,281 @@
+"""
+Staged sync pipeline overlapping network, parsing, database writes and image downloads.
+"""
+
+import time
+import queue
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import app_logger as logger
+import tracing
+from config import SYNC_PIPELINE_QUEUE_SIZE, SYNC_PIPELINE_IMAGE_QUEUE_SIZE
+from .json_stream import iter_publisher_catalogue, iter_json_array
+
+# Marks the end of a stage's output
+_DONE = object()
+
+class _StageFailed:
+    """Carries an exception from a worker stage to the writer"""
+    def __init__(self, stage, error):
+        self.stage = stage
+        self.error = error
+
+class _Stopped(Exception):
+    """Raised inside a worker stage when the pipeline is shutting down"""
+    pass
+
+class SyncPipeline:
+    """
+    Runs a catalogue sync as concurrent stages joined by bounded queues
+
+        fetch  -> chunks  -> parse -> entries -> DB writer -> image jobs -> download
+                                                     ^                         |
+                                                     +------ image results ----+
+
+    - fetch streams the response body (and the genre list, alongside);
+      the catalogue request itself is made on the calling thread first
+    - parse turns the byte stream into author entries
+    - the DB writer is the calling thread and the only one that writes;
+      it processes each entry in its own transaction and also records
+      the downloaded images' paths in batches
+    - download fetches images on the downloader's worker pool
+
+    Full queues block the stage feeding them, so a slow stage slows its
+    producers instead of letting work pile up in memory. Image results
+    flow back on an unbounded queue, which can never hold more than the
+    bounded image job queue let through, so the writer and the download
+    stage cannot deadlock on each other.
+
+    The writer is the calling thread rather than a stage of its own:
+    SQLite takes one writer at a time, and the transaction and
+    change_tracking_paused() state the sync runs under are per thread,
+    so each author is written (and its checkpoint recorded) in the same
+    transaction on the thread that opened the sync.
+
+    Every worker stage ends its output with _DONE, even when it fails; a
+    failure is first sent downstream as _StageFailed and re-raised by
+    whichever stage reads it, so it reaches the writer. When the writer
+    stops for any reason (a failure, or an interrupt such as
+    KeyboardInterrupt), it sets _stop, which makes any stage blocked on
+    a full or empty queue raise _Stopped and exit, and joins the threads
+    before the exception propagates.
+    """
+    def __init__(self, synchronizer, queue_size=SYNC_PIPELINE_QUEUE_SIZE,
+                 image_queue_size=SYNC_PIPELINE_IMAGE_QUEUE_SIZE):
+        self.synchronizer = synchronizer
+        self.db_manager = synchronizer.db_manager
+        self.image_processor = synchronizer.image_processor
+        self.downloader = synchronizer.image_processor.image_downloader
+        self.queue_size = queue_size
+        self.image_queue_size = image_queue_size
+        self._stop = threading.Event()
+
+    def run(self, endpoint, cookies, publisher=False, state=None):
+        """
+        Sync a catalogue endpoint through the pipeline
+
+        Args:
+            endpoint (str): PUBLISHER_AUTHORS_ENDPOINT or AUTHORS_ENDPOINT
+            cookies: Authentication cookies
+            publisher (bool): Whether the response is the publisher catalogue shape
+            state (dict, optional): Incremental sync state from begin_catalogue_sync()
+
+        Returns:
+            dict: Counts of authors and images processed
+        """
+        started = time.monotonic()
+        self._stop.clear()
+        stats = {'authors': 0, 'authors_failed': 0, 'images': {'success': 0, 'failed': 0}}
+
+        chunks = queue.Queue(maxsize=self.queue_size)
+        entries = queue.Queue(maxsize=self.queue_size)
+        image_jobs = queue.Queue(maxsize=self.image_queue_size)
+        image_results = queue.Queue()
+
+        genre_fetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sync-genres")
+        genres_future = genre_fetcher.submit(
+            contextvars.copy_context().run, self.synchronizer.genre_processor.fetch_genres, cookies
+        )
+
+        # The catalogue is requested here, on the writer thread, because
+        # open_catalogue() may write sync state (e.g. restarting a rejected
+        # incremental sync in full); the fetch stage only streams the body
+        try:
+            response = self.synchronizer.open_catalogue(endpoint, cookies, state, stream=True)
+        except BaseException:
+            genre_fetcher.shutdown(wait=False)
+            raise
+
+        def fetch():
+            with response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"Failed to fetch catalogue data: {response.status_code}")
+                for chunk in response.iter_content(chunk_size=self.synchronizer.STREAM_CHUNK_SIZE):
+                    self._put(chunks, chunk)
+
+        def parse():
+            body = self._drain(chunks)
+            if publisher:
+                items = iter_publisher_catalogue(body)
+            else:
+                items = (("author", entry) for entry in iter_json_array(body))
+            for item in items:
+                self._put(entries, item)
+
+        def download():
+            counts = self.downloader.download_stream(
+                self._drain(image_jobs),
+                lambda kind, batch: image_results.put((kind, batch))
+            )
+            stats['images'] = counts
+
+        threads = [
+            self._start_stage("fetch", fetch, chunks),
+            self._start_stage("parse", parse, entries),
+            self._start_stage("download", download, image_results),
+        ]
+
+        # The writer stage runs here; processors queue image jobs instead of downloading
+        self.image_processor.deferred_jobs = []
+        try:
+            for kind, entry in self._receive(entries, image_results):
+                if kind == "publisher":
+                    self.synchronizer.store_publisher_info(entry or {})
+                elif self.synchronizer.process_catalogue_entry(entry, state):
+                    stats['authors'] += 1
+                else:
+                    stats['authors_failed'] += 1
+
+                jobs, self.image_processor.deferred_jobs = self.image_processor.deferred_jobs, []
+                if jobs:
+                    # One manifest lookup per entry rather than one per image
+                    self.downloader.attach_cache_entries(jobs)
+                for job in jobs:
+                    self._put_job(image_jobs, job, image_results)
+
+            catalogue_done = time.monotonic()
+
+            try:
+                genres_data = genres_future.result()
+            except Exception as e:
+                logger.log_error(f"Error fetching genres: {str(e)}")
+                genres_data = None
+            self.synchronizer.genre_processor.sync_genres(cookies, genres_data=genres_data)
+
+            # Let the download stage finish, recording its results as they come
+            self._put_job(image_jobs, _DONE, image_results)
+            while self._record_results(image_results, block=True):
+                pass
+
+        except BaseException:
+            self._stop.set()
+            raise
+
+        finally:
+            self.image_processor.deferred_jobs = None
+            genre_fetcher.shutdown(wait=False)
+            for thread in threads:
+                thread.join()
+
+        logger.log_debug(
+            f"Sync pipeline finished in {time.monotonic() - started:.1f}s "
+            f"(catalogue written after {catalogue_done - started:.1f}s): "
+            f"{stats['authors']} authors, {stats['authors_failed']} failed, "
+            f"{stats['images']['success']} images downloaded, {stats['images']['failed']} failed"
+        )
+        return stats
+
+    def _start_stage(self, name, work, output):
+        """Run a stage on its own thread, inside the caller's log operation; it always ends its output with _DONE"""
+        def run():
+            try:
+                with tracing.span(f"{name}_stage"):
+                    work()
+            except _Stopped:
+                pass
+            except Exception as e:
+                logger.log_error(f"Sync pipeline {name} stage failed: {str(e)}")
+                output.put(_StageFailed(name, e))
+            finally:
+                output.put(_DONE)
+
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(run,), name=f"sync-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _put(self, target, item):
+        """Put with backpressure, giving up if the pipeline is stopping"""
+        while True:
+            if self._stop.is_set():
+                raise _Stopped()
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _drain(self, source):
+        """Yield a stage's output until _DONE, re-raising a failure upstream"""
+        while True:
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise _Stopped()
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _StageFailed):
+                raise item.error
+            yield item
+
+    def _receive(self, entries, image_results):
+        """Yield parsed entries to the writer, recording image results while waiting"""
+        while True:
+            self._record_results(image_results)
+            try:
+                item = entries.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _StageFailed):
+                raise item.error
+            yield item
+
+    def _put_job(self, image_jobs, job, image_results):
+        """Queue an image job, recording results while the download stage catches up"""
+        while True:
+            try:
+                image_jobs.put(job, timeout=0.05)
+                return
+            except queue.Full:
+                if not self._record_results(image_results):
+                    raise RuntimeError("Image download stage stopped unexpectedly")
+
+    def _record_results(self, image_results, block=False):
+        """
+        Write finished image batches (writer thread only)
+
+        Returns:
+            bool: False once the download stage has finished
+        """
+        while True:
+            try:
+                item = image_results.get(timeout=0.1) if block else image_results.get_nowait()
+            except queue.Empty:
+                return True
+            if item is _DONE:
+                return False
+            if isinstance(item, _StageFailed):
+                raise item.error
+
+            kind, batch = item
+            if kind == 'author':
+                self.downloader.record_author_results(batch)
+            else:
+                self.downloader.record_book_results(batch)
+            if block:
+                return True
@@ -4,33 +4,60 @@ Specialized synchronization utilities for pushing data to the server.
 import json
 import tkinter as tk
 from tkinter import messagebox
+import time
+import queue
 import requests
 import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import app_logger as logger
+import tracing
+from api_client import get_api_client
 from config import (
     API_BASE_URL, 
     UPLOAD_AUTHOR_ENDPOINT, 
-    UPLOAD_BOOK_ENDPOINT
+    UPLOAD_BOOK_ENDPOINT,
+    PUSH_WORKERS
 )
 
 class DataPushSynchronizer:
     """Handles pushing local data to the server"""
     
-    def __init__(self, parent, db_manager):
+    def __init__(self, parent, db_manager, max_workers=PUSH_WORKERS):
         self.parent = parent
         self.db_manager = db_manager
+        self.max_workers = max_workers
         self.cookies = None
         self.is_syncing = False
         self.sync_lock = threading.Lock()
+        self.api_client = get_api_client()
+        
+        # Push progress as (kind, completed, total, elapsed seconds) tuples, drained by the Tk thread.
+        # A final ('pull', 0, 0, 0.0) marks the end of the push and the start
+        # of the pull from the server, which cancel() does not stop.
+        self.progress_queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        
+        # Report of the most recent push_changes() run
+        self.last_report = None
         
     def set_auth_cookies(self, cookies):
         """Set authentication cookies for API requests"""
         self.cookies = cookies
         
+    def cancel(self):
+        """Ask a running push to stop; uploads already in flight are allowed to finish"""
+        self._cancel_event.set()
+        
+    @logger.operation("push")
+    @tracing.trace("push")
     def push_all_data(self):
         """
-        Push all authors and books to the server
+        Push authors and books changed since the last successful push
         Returns True if successful, False otherwise
+        
+        Failures don't interrupt the push; they are collected into
+        self.last_report, which format_report() turns into one summary.
         """
         if not self.cookies:
             logger.log_error("No authentication cookies provided")
@@ -44,31 +71,29 @@ class DataPushSynchronizer:
                 return False
                 
             self.is_syncing = True
+            self._cancel_event.clear()
+            self.last_report = None
             
         try:
             # Lock UI
             self._toggle_ui_lock(True)
             
-            # Push authors first
-            authors_result = self.push_authors()
-            if not authors_result:
-                logger.log_error("Failed to push authors")
+            report = self.push_changes()
+            
+            if report['cancelled']:
+                logger.log_warning("Push cancelled")
                 return False
-                
-            # Push books
-            books_result = self.push_books()
-            if not books_result:
-                logger.log_error("Failed to push books")
+            
+            if report['failures']:
+                logger.log_error(f"Push finished with {len(report['failures'])} failures")
                 return False
                 
             # If everything succeeded, pull the latest data
-            if authors_result and books_result:
-                sync_result = self._sync_from_server()
-                if sync_result:
-                    self._show_success("Sync Completed", "All data successfully synchronized with the server")
-                return sync_result
-                
-            return False
+            self.progress_queue.put(('pull', 0, 0, 0.0))
+            sync_result = self._sync_from_server()
+            if sync_result:
+                self._show_success("Sync Completed", "All data successfully synchronized with the server")
+            return sync_result
             
         except Exception as e:
             logger.log_error(f"Error during data push: {str(e)}")
@@ -80,171 +105,211 @@ class DataPushSynchronizer:
             self.is_syncing = False
             self._toggle_ui_lock(False)
     
-    def push_authors(self):
-        """Push all authors to the server"""
-        try:
-            # Get all authors from database
-            authors = self.db_manager.authors.get_all()
+    def push_changes(self):
+        """
+        Upload changed authors and books on a bounded worker pool
+        
+        A book whose author is also being pushed is only submitted once that
+        author's upload has succeeded; books of unchanged authors start right
+        away. Workers only talk to the server - the pushed rows are marked on
+        this thread once the pool has drained.
+        
+        Returns:
+            dict: Report with pushed/failed counts, a list of failures and
+                  whether the push was cancelled (also kept as self.last_report)
+        """
+        authors = self.db_manager.pending_push.get_authors()
+        books = self.db_manager.pending_push.get_books()
+        taxonomies_by_book = self.db_manager.pending_push.get_book_taxonomies()
+        
+        report = {
+            'authors_pushed': 0,
+            'books_pushed': 0,
+            'failures': [],
+            'skipped': 0,
+            'cancelled': False,
+            'total': len(authors) + len(books)
+        }
+        self.last_report = report
+        
+        if not report['total']:
+            logger.log_debug("Nothing to push")
+            return report
+        
+        # Books wait for their author when the author is part of this push
+        pending_author_ids = {author[0] for author in authors}
+        books_waiting = {}
+        ready_books = []
+        for book in books:
+            if book[3] in pending_author_ids:  # authorId is at index 3
+                books_waiting.setdefault(book[3], []).append(book)
+            else:
+                ready_books.append(book)
+        
+        pushed = {'author': {}, 'book': {}}
+        completed = 0
+        started_at = time.monotonic()
+        self.progress_queue.put(('push', completed, report['total'], 0.0))
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="push") as executor:
+            futures = {}
             
-            success_count = 0
-            total_count = len(authors)
+            def submit_author(author):
+                payload = self._author_payload(author)
+                future = executor.submit(contextvars.copy_context().run, self._push_entity, UPLOAD_AUTHOR_ENDPOINT, payload)
+                futures[future] = ('author', author, payload['author_name'])
+            
+            def submit_book(book):
+                payload = self._book_payload(book, taxonomies_by_book.get(book[0], []))
+                future = executor.submit(contextvars.copy_context().run, self._push_entity, UPLOAD_BOOK_ENDPOINT, payload)
+                futures[future] = ('book', book, payload['title'])
             
             for author in authors:
-                # Format author data for API
-                author_data = {
-                    'id': author[0],
-                    'userId': author[1],
-                    'author_name': author[2],
-                    'author_image_url': author[3],
-                    'birth_date': author[4],
-                    'death_date': author[5],
-                    'website': author[6],
-                    'bio': author[7]
-                }
-                
-                # Send the author data to server
-                response = self._make_api_request(
-                    "POST", 
-                    f"{UPLOAD_AUTHOR_ENDPOINT}", 
-                    data=author_data
-                )
+                submit_author(author)
+            for book in ready_books:
+                submit_book(book)
+            
+            while futures:
+                if self._cancel_event.is_set() and not report['cancelled']:
+                    report['cancelled'] = True
+                    # Drop everything that hasn't started yet
+                    for future in list(futures):
+                        if future.cancel():
+                            del futures[future]
+                    books_waiting.clear()
+                    if not futures:
+                        break
                 
-                if response and response.status_code in (200, 201):
-                    success_count += 1
-                    logger.log_debug(f"Successfully pushed author: {author_data['author_name']}")
-                else:
-                    # Handle error
-                    error_msg = "Unknown error"
-                    if response:
-                        try:
-                            error_data = response.json()
-                            error_msg = error_data.get("message", f"Error {response.status_code}")
-                            status = error_data.get("status", "Error")
-                            
-                            error_display = f"Failed to upload author: {author_data['author_name']}\n"
-                            error_display += f"Message: {error_msg}\n"
-                            error_display += f"Status: {status}"
-                            
-                            self._show_error("Author Upload Failed", error_display)
-                        except:
-                            self._show_error("Author Upload Failed", 
-                                            f"Failed to upload author: {author_data['author_name']}\n"
-                                            f"Status code: {response.status_code}")
+                done, _ = wait(futures, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, row, name = futures.pop(future)
+                    error = future.exception() or future.result()
+                    completed += 1
+                    
+                    if error:
+                        report['failures'].append({'type': kind, 'name': name, 'error': str(error)})
+                        logger.log_error(f"Failed to push {kind} {name}: {error}")
                     else:
-                        self._show_error("Author Upload Failed", 
-                                        f"Failed to upload author: {author_data['author_name']}\n"
-                                        "No response from server")
+                        pushed[kind][row[0]] = row[-1]  # change_seq is the last column
+                        report[f'{kind}s_pushed'] += 1
+                        logger.log_debug("Successfully pushed %s: %s", kind, name)
                     
-                    logger.log_error(f"Failed to push author {author_data['author_name']}: {error_msg}")
-            
-            logger.log_debug(f"Author push completed: {success_count}/{total_count} successful")
-            return success_count == total_count
-            
-        except Exception as e:
-            logger.log_error(f"Error pushing authors: {str(e)}")
-            self._show_error("Author Push Error", f"An unexpected error occurred: {str(e)}")
-            return False
+                    if kind == 'author':
+                        for book in books_waiting.pop(row[0], []):
+                            if error:
+                                completed += 1
+                                report['failures'].append({
+                                    'type': 'book',
+                                    'name': book[1],
+                                    'error': f"Not sent because author '{name}' failed to upload"
+                                })
+                            else:
+                                submit_book(book)
+                    
+                    self.progress_queue.put(('push', completed, report['total'], time.monotonic() - started_at))
+        
+        if report['cancelled']:
+            report['skipped'] = report['total'] - completed
+        
+        self.db_manager.pending_push.mark_pushed('author', pushed['author'])
+        self.db_manager.pending_push.mark_pushed('book', pushed['book'])
+        
+        logger.log_debug(
+            f"Push completed: {report['authors_pushed']} authors and {report['books_pushed']} books pushed, "
+            f"{len(report['failures'])} failed, {report['skipped']} skipped"
+        )
+        return report
     
-    def push_books(self):
-        """Push all books to the server"""
-        try:
-            # Get all books from database
-            books = self.db_manager.books.get_all()
-            
-            success_count = 0
-            total_count = len(books)
-            
-            for book in books:
-                # Format book data for API
-                book_data = {
-                    'id': book[0],
-                    'title': book[1],
-                    'authorId': book[3],  # AuthorId is at index 3
-                    'description': book[4],
-                    'promoted': bool(book[6]),
-                    'pageCount': book[7],
-                    'formats': self._parse_json_field(book[8]),
-                    'publishedDate': book[9],
-                    'awards': self._parse_json_field(book[10]),
-                    'originalTitle': book[11],
-                    'series': book[12],
-                    'setting': book[13],
-                    'characters': self._parse_json_field(book[14]),
-                    'isbn': book[15],
-                    'asin': book[16],
-                    'language': book[17],
-                    'referralLinks': self._parse_json_field(book[18])
+    def format_report(self, report=None, max_failures=15):
+        """Summarize a push report for display"""
+        report = report or self.last_report
+        if not report:
+            return ""
+        
+        lines = [
+            f"Authors pushed: {report['authors_pushed']}",
+            f"Books pushed: {report['books_pushed']}",
+            f"Failed: {len(report['failures'])}"
+        ]
+        if report['cancelled']:
+            lines.append(f"Cancelled, not sent: {report['skipped']}")
+        
+        for failure in report['failures'][:max_failures]:
+            lines.append(f"- {failure['type'].capitalize()} '{failure['name']}': {failure['error']}")
+        if len(report['failures']) > max_failures:
+            lines.append(f"... and {len(report['failures']) - max_failures} more (see the error log)")
+        
+        return "\n".join(lines)
+    
+    @tracing.span("author_payload")
+    def _author_payload(self, author):
+        """Format an author row for the API"""
+        return {
+            'id': author[0],
+            'userId': author[1],
+            'author_name': author[2],
+            'author_image_url': author[3],
+            'birth_date': author[4],
+            'death_date': author[5],
+            'website': author[6],
+            'bio': author[7]
+        }
+    
+    @tracing.span("book_payload")
+    def _book_payload(self, book, taxonomies):
+        """Format a book row and its (taxonomyId, rank, importance, name, type, description) rows for the API"""
+        return {
+            'id': book[0],
+            'title': book[1],
+            'authorId': book[3],  # AuthorId is at index 3
+            'description': book[4],
+            'promoted': bool(book[6]),
+            'pageCount': book[7],
+            'formats': self._parse_json_field(book[8]),
+            'publishedDate': book[9],
+            'awards': self._parse_json_field(book[10]),
+            'originalTitle': book[11],
+            'series': book[12],
+            'setting': book[13],
+            'characters': self._parse_json_field(book[14]),
+            'isbn': book[15],
+            'asin': book[16],
+            'language': book[17],
+            'referralLinks': self._parse_json_field(book[18]),
+            'genreTaxonomies': [
+                {
+                    'taxonomyId': tax[0],
+                    'rank': tax[1],
+                    'importance': tax[2],
+                    'name': tax[3],
+                    'type': tax[4],
+                    'description': tax[5]
                 }
-                
-                # Get genre taxonomies for this book
-                taxonomies = self.db_manager.execute_query(
-                    """
-                    SELECT g.id as taxonomyId, bg.rank, bg.importance, g.name, g.type, g.description
-                    FROM book_genres bg
-                    JOIN genres g ON bg.genre_id = g.id
-                    WHERE bg.book_id = ?
-                    ORDER BY bg.rank
-                    """,
-                    (book[0],)
-                )
-                
-                # Format taxonomies
-                genre_taxonomies = []
-                for tax in taxonomies:
-                    taxonomy = {
-                        'taxonomyId': tax[0],
-                        'rank': tax[1],
-                        'importance': tax[2],
-                        'name': tax[3],
-                        'type': tax[4],
-                        'description': tax[5]
-                    }
-                    genre_taxonomies.append(taxonomy)
-                
-                book_data['genreTaxonomies'] = genre_taxonomies
-                
-                # Send the book data to server
-                response = self._make_api_request(
-                    "POST", 
-                    f"{UPLOAD_BOOK_ENDPOINT}", 
-                    data=book_data
-                )
-                
-                if response and response.status_code in (200, 201):
-                    success_count += 1
-                    logger.log_debug(f"Successfully pushed book: {book_data['title']}")
-                else:
-                    # Handle error
-                    error_msg = "Unknown error"
-                    if response:
-                        try:
-                            error_data = response.json()
-                            error_msg = error_data.get("message", f"Error {response.status_code}")
-                            status = error_data.get("status", "Error")
-                            
-                            error_display = f"Failed to upload book: {book_data['title']}\n"
-                            error_display += f"Message: {error_msg}\n"
-                            error_display += f"Status: {status}"
-                            
-                            self._show_error("Book Upload Failed", error_display)
-                        except:
-                            self._show_error("Book Upload Failed", 
-                                            f"Failed to upload book: {book_data['title']}\n"
-                                            f"Status code: {response.status_code}")
-                    else:
-                        self._show_error("Book Upload Failed", 
-                                        f"Failed to upload book: {book_data['title']}\n"
-                                        "No response from server")
-                    
-                    logger.log_error(f"Failed to push book {book_data['title']}: {error_msg}")
-            
-            logger.log_debug(f"Book push completed: {success_count}/{total_count} successful")
-            return success_count == total_count
-            
-        except Exception as e:
-            logger.log_error(f"Error pushing books: {str(e)}")
-            self._show_error("Book Push Error", f"An unexpected error occurred: {str(e)}")
-            return False
+                for tax in taxonomies
+            ]
+        }
+    
+    @tracing.span("upload")
+    def _push_entity(self, endpoint, payload):
+        """
+        Upload one entity (runs on a push worker)
+        
+        Returns:
+            str: None on success, otherwise a description of the failure
+        """
+        response = self._make_api_request("POST", endpoint, data=payload)
+        
+        if response is None:
+            return "No response from server"
+        if response.status_code in (200, 201):
+            return None
+        
+        try:
+            error_data = response.json()
+            return (f"{error_data.get('message', f'Error {response.status_code}')} "
+                    f"(status: {error_data.get('status', 'Error')})")
+        except ValueError:
+            return f"Status code: {response.status_code}"
     
     def _parse_json_field(self, field_value):
         """Parse a JSON field from the database"""
@@ -266,18 +331,11 @@ class DataPushSynchronizer:
         url = f"{API_BASE_URL}{endpoint}"
         
         try:
-            logger.log_debug(f"Making {method} request to {url}")
+            logger.log_debug("Making %s request to %s", method, url)
             
-            if method.upper() == "GET":
-                return requests.get(url, cookies=self.cookies)
-            elif method.upper() == "POST":
-                return requests.post(url, json=data, cookies=self.cookies)
-            elif method.upper() == "PUT":
-                return requests.put(url, json=data, cookies=self.cookies)
-            elif method.upper() == "DELETE":
-                return requests.delete(url, cookies=self.cookies)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            if method.upper() in ("GET", "DELETE"):
+                return self.api_client.request(method, endpoint, cookies=self.cookies)
+            return self.api_client.request(method, endpoint, json=data, cookies=self.cookies)
                 
         except requests.RequestException as e:
             logger.log_error(f"API Request error: {str(e)}")
@@ -3,6 +3,7 @@ Utility functions for data synchronization.
 """
 
 import json
+import hashlib
 import app_logger as logger
 
 def serialize_complex_data(data_dict):
@@ -85,16 +86,21 @@ def get_local_id_for_remote(db_manager, entity_type, remote_id):
     if not remote_id:
         return None
         
-    setting_key = f"{entity_type}_api_id_{remote_id}"
-    local_id = db_manager.get_setting(setting_key)
+    return db_manager.id_map.get(entity_type, remote_id)
+
+def get_local_ids_for_remote(db_manager, entity_type, remote_ids):
+    """
+    Get the local database IDs for many remote entity IDs in one lookup
     
-    if local_id:
-        try:
-            return int(local_id)
-        except (ValueError, TypeError):
-            logger.log_error(f"Invalid local ID format for {setting_key}: {local_id}")
-            
-    return None
+    Args:
+        db_manager: Database manager instance
+        entity_type (str): Type of entity ('author', 'book', etc.)
+        remote_ids (iterable): Remote IDs from the API
+        
+    Returns:
+        dict: Mapping of remote ID to local ID for the IDs that are known
+    """
+    return db_manager.id_map.resolve_many(entity_type, [rid for rid in remote_ids if rid])
 
 def create_timestamp():
     """
@@ -106,6 +112,19 @@ def create_timestamp():
     from datetime import datetime
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+def content_hash(data):
+    """
+    Stable hash of an API payload, independent of key order
+    
+    Args:
+        data: JSON-compatible payload
+        
+    Returns:
+        str: SHA-256 hex digest
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
 def compare_versions(data1, data2, fields_to_check):
     """
     Compare two versions of the same entity to check if update is needed
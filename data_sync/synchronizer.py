@@ -3,25 +3,42 @@ Main DataSynchronizer class that orchestrates the synchronization process.
 """
 
 import json
-import requests
-from datetime import datetime
-from config import API_BASE_URL, AUTHORS_ENDPOINT, PUBLISHER_AUTHORS_ENDPOINT, GENRE_ENDPOINT
+from datetime import timedelta, timezone
+from email.utils import parsedate_to_datetime
+from config import (
+    API_BASE_URL, AUTHORS_ENDPOINT, PUBLISHER_AUTHORS_ENDPOINT, GENRE_ENDPOINT,
+    SYNC_PIPELINE, SYNC_INCREMENTAL, SYNC_STAGED_MERGE,
+    SYNC_WATERMARK_HEADER, SYNC_WATERMARK_OVERLAP_SECONDS
+)
 import app_logger as logger
+import tracing
+from api_client import get_api_client
 from .author_processor import AuthorProcessor
 from .book_processor import BookProcessor
 from .genre_processor import GenreProcessor
 from .image_processor import ImageProcessor
 from .taxonomy_processor import TaxonomyProcessor
+from .json_stream import iter_publisher_catalogue, iter_json_array
+from .sync_utils import content_hash
+from .pipeline import SyncPipeline
 from exceptions import DatabaseError
 
 class DataSynchronizer:
     """
     Synchronizes data between the API and local database
     """
+    # Bytes read per chunk when streaming large responses
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
+    # Statuses meaning the server can't serve an incremental request
+    # (e.g. a watermark it no longer has history for); sync in full instead
+    INCREMENTAL_UNSUPPORTED_STATUSES = (400, 410, 422)
+    
     def __init__(self, db_manager, parent=None):
         self.db_manager = db_manager
         self.parent = parent
         self.api_base_url = API_BASE_URL
+        self.api_client = get_api_client()
         
         # Initialize processors
         self.author_processor = AuthorProcessor(db_manager, self)
@@ -30,8 +47,19 @@ class DataSynchronizer:
         self.image_processor = ImageProcessor(db_manager)
         self.taxonomy_processor = TaxonomyProcessor(db_manager, self)
         
-    def synchronize_data(self, cookies=None):
-        """Main method to synchronize all data from the API to local database"""
+        # Authors and books written vs. skipped as unchanged in the last sync
+        self.sync_stats = self._new_sync_stats()
+        
+    @logger.operation("sync")
+    @tracing.trace("sync")
+    def synchronize_data(self, cookies=None, full=False):
+        """
+        Main method to synchronize all data from the API to local database
+        
+        With SYNC_INCREMENTAL, only entities updated since the last completed
+        sync are requested, and a sync interrupted part way resumes after the
+        last author it committed. full=True forgets that progress first.
+        """
         if not cookies:
             if self.parent and hasattr(self.parent, 'cookies'):
                 cookies = self.parent.cookies
@@ -43,17 +71,43 @@ class DataSynchronizer:
         if self.parent and hasattr(self.parent, 'is_publisher'):
             is_publisher = self.parent.is_publisher.get()
         
-        # Pull data based on user role
-        if is_publisher:
-            self.sync_publisher_data(cookies)
-        else:
-            self.sync_author_data(cookies)
+        # Load every known remote-to-local ID mapping and content hash once for this sync
+        self.db_manager.id_map.warm_cache()
+        self.db_manager.content_hashes.warm_cache()
+        self.taxonomy_processor.reset_genre_ids()
+        self.sync_stats = self._new_sync_stats()
+        
+        endpoint = PUBLISHER_AUTHORS_ENDPOINT if is_publisher else AUTHORS_ENDPOINT
+        if full:
+            self.db_manager.sync_state.reset(endpoint)
+        state = self.begin_catalogue_sync(endpoint) if SYNC_INCREMENTAL else None
         
-        # Always sync genres for both user types
-        self.genre_processor.sync_genres(cookies)
+        # Data written here comes from the server, so it is not a local change to push
+        with self.db_manager.change_tracking_paused():
+            if SYNC_STAGED_MERGE:
+                # Whole catalogue merged in one transaction, then genres
+                self.sync_staged(cookies, is_publisher, state)
+                self.genre_processor.sync_genres(cookies)
+            elif SYNC_PIPELINE:
+                # Catalogue, genres and images in overlapping stages
+                self.sync_pipelined(cookies, is_publisher, state)
+            else:
+                # Pull data based on user role
+                if is_publisher:
+                    self.sync_publisher_data(cookies, state)
+                else:
+                    self.sync_author_data(cookies, state)
+                
+                # Always sync genres for both user types
+                self.genre_processor.sync_genres(cookies)
+            
+            # Download all images (after the pipeline, only retries of failed ones)
+            self.image_processor.download_all_images()
         
-        # Download all images
-        self.image_processor.download_all_images()
+        logger.log_debug("Sync finished: " + ", ".join(
+            f"{entity_type}s {counts['written']} written, {counts['skipped']} unchanged"
+            for entity_type, counts in self.sync_stats.items()
+        ))
             
         # Update UI if parent reference exists
         if self.parent:
@@ -61,110 +115,448 @@ class DataSynchronizer:
             
         return True
     
-    def make_api_request(self, endpoint, cookies):
-        """Make a GET request to the API with authentication cookies"""
-        url = f"{self.api_base_url}{endpoint}"
-        return requests.get(url, cookies=cookies)
+    @tracing.span("pipeline")
+    def sync_pipelined(self, cookies, is_publisher=False, state=None):
+        """
+        Sync the catalogue and genres through the staged pipeline
         
-    def sync_publisher_data(self, cookies):
-        """Sync data for publisher users"""
+        Returns:
+            bool: True if the pipeline completed
+        """
+        endpoint = PUBLISHER_AUTHORS_ENDPOINT if is_publisher else AUTHORS_ENDPOINT
         try:
-            # Fetch publisher catalogue data
-            response = self.make_api_request(PUBLISHER_AUTHORS_ENDPOINT, cookies)
-      
-            if response.status_code != 200:
-                logger.log_error(f"Failed to fetch publisher data: {response.status_code}")
-                return False
-            
-            publisher_data = response.json()
+            stats = SyncPipeline(self).run(endpoint, cookies, publisher=is_publisher, state=state)
+            self.finish_catalogue_sync(state, stats['authors_failed'])
+            return True
+        except Exception as e:
+            logger.log_error(f"Error in sync pipeline: {str(e)}")
+            # Genres are synced even when the catalogue could not be
+            self.genre_processor.sync_genres(cookies)
+            return False
+    
+    @tracing.span("staged_merge")
+    def sync_staged(self, cookies, is_publisher=False, state=None):
+        """
+        Sync the catalogue by bulk-loading it into staging tables and merging
+        
+        The catalogue is streamed into TEMP tables and merged with set-based
+        SQL in a single transaction, so either all of it is written or none
+        of it is; there are no per-author checkpoints. Images are left for
+        download_all_images().
+        
+        Returns:
+            bool: True if the catalogue was merged
+        """
+        endpoint = PUBLISHER_AUTHORS_ENDPOINT if is_publisher else AUTHORS_ENDPOINT
+        staging = self.db_manager.catalogue_staging
+        try:
+            response = self.open_catalogue(endpoint, cookies, state, stream=True)
             
-            # Process each publisher in the data
-            for publisher_entry in publisher_data:
-                publisher_info = publisher_entry.get("publisher", {})
-                catalogue = publisher_entry.get("catalogue", [])
+            with response:
+                if response.status_code != 200:
+                    logger.log_error(f"Failed to fetch catalogue data: {response.status_code}")
+                    return False
                 
-                # Store publisher info in settings
-                self.store_publisher_info(publisher_info)
+                chunks = response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE)
+                if is_publisher:
+                    items = iter_publisher_catalogue(chunks)
+                else:
+                    items = (("author", entry) for entry in iter_json_array(chunks))
                 
-                # Process authors and books in the catalogue
-                for author_entry in catalogue:
-                    author_info = author_entry.get("author", {})
-                    books = author_entry.get("books", [])
-                    
-                    # Process author data
-                    author_id = self.author_processor.process_author(author_info)
-                    
-                    # Process books for this author
-                    for book in books:
-                        # Ensure the book is associated with the correct author
-                        book["authorId"] = author_info.get("id")
-                        book["author"] = author_info.get("author_name")
-                        book["authorImageUrl"] = author_info.get("author_image_url")
-                        
-                        book_id = self.book_processor.process_book(book, author_id)
-                        
-                        # Process images if any
-                        if "images" in book and book["images"]:
-                            self.image_processor.process_book_images(book["images"], book["id"])
-                        
-                        # Process genres if any
-                        if "genres" in book and book["genres"]:
-                            self.genre_processor.process_book_genres(book["genres"], book_id)
-                        if "genreTaxonomies" in book and book["genreTaxonomies"]:
-                            self.taxonomy_processor.process_book_taxonomies(book["genreTaxonomies"], book_id)
+                with self.db_manager.transaction():
+                    staging.begin()
+                    for kind, entry in items:
+                        if kind == "publisher":
+                            self.store_publisher_info(entry or {})
+                        else:
+                            self.stage_catalogue_entry(staging, entry)
+                    staging.merge()
+            
+            self.finish_catalogue_sync(state)
+            return True
+            
+        except Exception as e:
+            logger.log_error(f"Error syncing catalogue through staging tables: {str(e)}")
+            return False
+        
+        finally:
+            # The merge wrote mappings and hashes behind the caches' backs
+            self.db_manager.id_map.clear_cache()
+            self.db_manager.id_map.warm_cache()
+            self.db_manager.content_hashes.warm_cache()
+            self.taxonomy_processor.reset_genre_ids()
+    
+    @tracing.span("stage_entry")
+    def stage_catalogue_entry(self, staging, author_entry):
+        """
+        Stage one author and their books for sync_staged(), skipping
+        unchanged ones and invalid ones as process_catalogue_entry() would
+        """
+        author_info = author_entry.get("author", {})
+        try:
+            author_row = self.author_processor.author_row(author_info)
+        except ValueError as e:
+            logger.log_error(f"Skipping author '{author_info.get('author_name', 'unknown')}': {str(e)}")
+            return
+        
+        author_hash = content_hash(author_info)
+        if self.unchanged_local_id("author", author_info.get("id"), author_hash) is None:
+            staging.add_author(author_row, author_hash)
+            self.sync_stats["author"]["written"] += 1
         
+        for book in author_entry.get("books", []):
+            self.attach_book_author(book, author_info)
+            book_hash = content_hash(book)
+            if self.unchanged_local_id("book", book.get("id"), book_hash) is not None:
+                continue
             
+            try:
+                book_row = self.book_processor.book_row(book)
+            except ValueError as e:
+                logger.log_error(f"Skipping book '{book.get('title', 'unknown')}': {str(e)}")
+                continue
+            
+            staging.add_book(
+                book_row, book_hash,
+                images=self.image_processor.image_rows(book.get("images")),
+                genres=self.book_genre_links(book)
+            )
+            self.sync_stats["book"]["written"] += 1
+    
+    def book_genre_links(self, book):
+        """
+        The genre associations an API book replaces its current ones with,
+        or None to keep them; taxonomies take precedence over plain genres
+        """
+        if book.get("genreTaxonomies"):
+            return [
+                {
+                    'genre_id': taxonomy["taxonomyId"],
+                    'rank': taxonomy.get("rank", 0),
+                    'importance': taxonomy.get("importance", 0.0),
+                    'name': taxonomy.get("name", ""),
+                    'description': taxonomy.get("description", ""),
+                    'type': taxonomy.get("type", "genre")
+                }
+                for taxonomy in book["genreTaxonomies"]
+                if taxonomy.get("taxonomyId")
+            ]
+        if book.get("genres"):
+            return [{'genre_id': genre["id"]} for genre in book["genres"] if genre.get("id")]
+        return None
+    
+    @staticmethod
+    def _new_sync_stats():
+        return {entity_type: {'written': 0, 'skipped': 0} for entity_type in ('author', 'book')}
+    
+    def unchanged_local_id(self, entity_type, remote_id, payload_hash):
+        """
+        Local ID of an entity last written from a payload with this hash
+        
+        Returns:
+            int or None: The local ID if the entity can be skipped, else None
+        """
+        local_id = self.db_manager.id_map.get(entity_type, remote_id)
+        if local_id is None or self.db_manager.content_hashes.get(entity_type, local_id) != payload_hash:
+            return None
+        
+        self.sync_stats[entity_type]['skipped'] += 1
+        return local_id
+    
+    def record_written(self, entity_type, local_id, payload_hash):
+        """Store the hash of the payload an entity was just written from"""
+        self.db_manager.content_hashes.set(entity_type, local_id, payload_hash)
+        self.sync_stats[entity_type]['written'] += 1
+    
+    @tracing.span("http")
+    def make_api_request(self, endpoint, cookies, stream=False, params=None):
+        """Make a GET request to the API with authentication cookies"""
+        return self.api_client.get(endpoint, cookies=cookies, stream=stream, params=params)
+    
+    def begin_catalogue_sync(self, endpoint):
+        """
+        Start (or resume) an incremental sync of a catalogue endpoint and return its state
+        
+        The sync's start time is taken from the server's first catalogue
+        response, in open_catalogue().
+        """
+        return self.db_manager.sync_state.begin(endpoint)
+    
+    def server_watermark(self, response):
+        """
+        The server time a catalogue response is current to, as a UTC ISO 8601 string
+        
+        Taken from the SYNC_WATERMARK_HEADER header, or else from the HTTP
+        Date header less SYNC_WATERMARK_OVERLAP_SECONDS, for changes the
+        server was still committing when it answered. The local clock is
+        never used, as it may be skewed against the server's.
+        
+        Returns:
+            str or None: The watermark, or None if the response has neither header
+        """
+        watermark = response.headers.get(SYNC_WATERMARK_HEADER)
+        if watermark:
+            return watermark
+        
+        try:
+            date = parsedate_to_datetime(response.headers.get("Date"))
+        except (TypeError, ValueError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        date -= timedelta(seconds=SYNC_WATERMARK_OVERLAP_SECONDS)
+        return date.astimezone(timezone.utc).isoformat(timespec="seconds")
+    
+    def finish_catalogue_sync(self, state, authors_failed=0):
+        """
+        Record the end of a catalogue sync
+        
+        The watermark only moves when every author was committed; otherwise
+        the next sync asks again for everything since the old watermark, so
+        authors skipped this time are not lost.
+        """
+        if state is None:
+            return
+        if authors_failed:
+            logger.log_warning(f"{authors_failed} authors failed to sync; keeping the previous sync watermark")
+            self.db_manager.sync_state.restart(state['endpoint'])
+        else:
+            self.db_manager.sync_state.complete(state['endpoint'])
+    
+    def open_catalogue(self, endpoint, cookies, state=None, stream=False):
+        """
+        Request a catalogue endpoint, incrementally when state allows
+        
+        With a watermark, only authors updated since then are requested
+        (updatedSince); with a checkpoint, only authors after the last one
+        committed (after). Falls back to the full catalogue if the server
+        rejects either. The server time of the first successful response
+        of a sync is recorded as its start, to become the next watermark.
+        
+        after assumes the server lists authors in ascending ID order, with
+        updatedSince only filtering that list; checkpoint_in_order() stops
+        recording checkpoints for a sync whose catalogue turns out not to be.
+        
+        Returns:
+            requests.Response: The catalogue response
+        """
+        params = {}
+        if state is not None:
+            if state.get('watermark'):
+                params['updatedSince'] = state['watermark']
+            if state.get('checkpoint') is not None:
+                params['after'] = state['checkpoint']
+        
+        response = self.make_api_request(endpoint, cookies, stream=stream, params=params or None)
+        
+        if params and response.status_code in self.INCREMENTAL_UNSUPPORTED_STATUSES:
+            logger.log_warning(
+                f"Incremental sync of {endpoint} rejected ({response.status_code}); syncing in full"
+            )
+            response.close()
+            self.db_manager.sync_state.restart(endpoint)
+            state['checkpoint'] = None
+            response = self.make_api_request(endpoint, cookies, stream=stream)
+        elif params:
+            logger.log_debug("Requested %s incrementally: %s", endpoint, params)
+        
+        if state is not None and response.status_code == 200:
+            started_at = self.server_watermark(response)
+            if started_at:
+                self.db_manager.sync_state.set_run_started(endpoint, started_at)
+            else:
+                logger.log_warning(
+                    f"{endpoint} sent no {SYNC_WATERMARK_HEADER} or Date header; the sync watermark will not move"
+                )
+        
+        return response
+    
+    def checkpoint_in_order(self, state, remote_id):
+        """
+        Whether an author can be recorded as the sync's checkpoint
+        
+        Resuming after a checkpoint relies on the server listing authors
+        in ascending ID order. An author listed at or below the last
+        checkpoint shows the catalogue is not; the checkpoint is then
+        cleared and none are recorded for the rest of the sync, so an
+        interrupted sync starts again from the first author rather than
+        skip any.
+        """
+        if state.get('unordered'):
+            return False
+        if state.get('checkpoint') is None or remote_id > state['checkpoint']:
+            return True
+        
+        logger.log_warning(
+            f"{state['endpoint']} listed author {remote_id} after {state['checkpoint']}, "
+            f"not in ascending ID order; this sync will not resume part way"
+        )
+        state['unordered'] = True
+        self.db_manager.sync_state.restart(state['endpoint'])
+        return False
+        
+    def sync_publisher_data(self, cookies, state=None):
+        """
+        Sync data for publisher users
+        
+        The catalogue is parsed as it streams in: each author entry is
+        written as soon as it has arrived, so memory is bounded by the
+        largest single author rather than the whole catalogue.
+        """
+        try:
+            # Fetch publisher catalogue data
+            response = self.open_catalogue(PUBLISHER_AUTHORS_ENDPOINT, cookies, state, stream=True)
+            
+            with response:
+                if response.status_code != 200:
+                    logger.log_error(f"Failed to fetch publisher data: {response.status_code}")
+                    return False
+                
+                authors_processed = 0
+                authors_failed = 0
+                for kind, entry in iter_publisher_catalogue(response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE)):
+                    if kind == "publisher":
+                        # Store publisher info in settings
+                        self.store_publisher_info(entry or {})
+                    else:
+                        # Process the author and their books
+                        if not self.process_catalogue_entry(entry, state):
+                            authors_failed += 1
+                        authors_processed += 1
+            
+            self.finish_catalogue_sync(state, authors_failed)
+            logger.log_debug(f"Processed {authors_processed} authors from the publisher catalogue")
             return True
             
         except Exception as e:
             logger.log_error(f"Error syncing publisher data: {str(e)}")
             return False
             
-    def sync_author_data(self, cookies):
+    def sync_author_data(self, cookies, state=None):
         """Sync data for author or regular users"""
         try:
             # Fetch author data
-            response = self.make_api_request(AUTHORS_ENDPOINT, cookies)
+            response = self.open_catalogue(AUTHORS_ENDPOINT, cookies, state)
             
             if response.status_code != 200:
                 logger.log_error(f"Failed to fetch author data: {response.status_code}")
                 return False
             
-            author_data = response.json()
+            with tracing.span("json_decode"):
+                author_data = response.json()
             
             # Process each author in the data
+            authors_failed = 0
             for author_entry in author_data:
-                author_info = author_entry.get("author", {})
-                books = author_entry.get("books", [])
-                
-                # Process author data
-                author_id = self.author_processor.process_author(author_info)
+                if not self.process_catalogue_entry(author_entry, state):
+                    authors_failed += 1
+            
+            self.finish_catalogue_sync(state, authors_failed)
+            return True
+            
+        except Exception as e:
+            logger.log_error(f"Error syncing author data: {str(e)}")
+            return False
+    
+    @tracing.span("author_entry")
+    def process_catalogue_entry(self, author_entry, state=None):
+        """
+        Process one author and all of their books as a single transaction
+        
+        Each book runs in its own nested batch, so a book that fails to
+        process is rolled back and logged without losing the author or the
+        other books. A failing author rolls back only that author's batch.
+        Authors and books whose payload hash matches the one they were last
+        written from are skipped, along with their images and genres.
+        
+        With an incremental sync state, the author is recorded as the sync's
+        checkpoint in the same transaction, while the catalogue stays in
+        ascending ID order (see checkpoint_in_order()).
+        
+        Returns:
+            bool: True if the author batch was committed
+        """
+        author_info = author_entry.get("author", {})
+        books = author_entry.get("books", [])
+        
+        # Image jobs queued for the pipeline must not outlive rolled-back rows
+        deferred = self.image_processor.deferred_jobs
+        author_mark = len(deferred) if deferred is not None else 0
+        
+        remote_id = author_info.get("id")
+        checkpoint = state is not None and remote_id is not None and self.checkpoint_in_order(state, remote_id)
+        
+        try:
+            with self.db_manager.transaction():
+                # Process author data, unless it hasn't changed since the last sync
+                author_hash = content_hash(author_info)
+                author_id = self.unchanged_local_id("author", author_info.get("id"), author_hash)
+                if author_id is None:
+                    author_id = self.author_processor.process_author(author_info)
+                    self.record_written("author", author_id, author_hash)
                 
                 # Process books for this author
                 for book in books:
-                    # Ensure the book is associated with the correct author
-                    book["authorId"] = author_info.get("id")
-                    book["author"] = author_info.get("author_name")
-                    book["authorImageUrl"] = author_info.get("author_image_url")
-                    
-                    book_id = self.book_processor.process_book(book, author_id)
-                    
-                    # Process images if any
-                    if "images" in book and book["images"]:
-                        self.image_processor.process_book_images(book["images"], book["id"])
-                    
-                    # Process genres if any
-                    if "genres" in book and book["genres"]:
-                        self.genre_processor.process_book_genres(book["genres"], book_id)
-                    if "genreTaxonomies" in book and book["genreTaxonomies"]:
-                        self.taxonomy_processor.process_book_taxonomies(book["genreTaxonomies"], book_id)
-    
+                    book_mark = len(deferred) if deferred is not None else 0
+                    try:
+                        with self.db_manager.transaction():
+                            self.process_book_entry(book, author_info, author_id)
+                    except Exception as e:
+                        logger.log_error(f"Skipping book '{book.get('title', 'unknown')}': {str(e)}")
+                        # Cached ID mappings and hashes may point at rolled-back rows
+                        self.db_manager.id_map.clear_cache()
+                        self.db_manager.content_hashes.clear_cache()
+                        self.taxonomy_processor.reset_genre_ids()
+                        if deferred is not None:
+                            del deferred[book_mark:]
+                
+                if checkpoint:
+                    self.db_manager.sync_state.set_checkpoint(state['endpoint'], remote_id)
+            if checkpoint:
+                state['checkpoint'] = remote_id
             return True
-            
         except Exception as e:
-            logger.log_error(f"Error syncing author data: {str(e)}")
+            logger.log_error(f"Skipping author '{author_info.get('author_name', 'unknown')}': {str(e)}")
+            self.db_manager.id_map.clear_cache()
+            self.db_manager.content_hashes.clear_cache()
+            self.taxonomy_processor.reset_genre_ids()
+            if deferred is not None:
+                del deferred[author_mark:]
             return False
     
+    @tracing.span("book_entry")
+    def process_book_entry(self, book, author_info, author_id):
+        """Process a single book with its images, genres and taxonomies"""
+        self.attach_book_author(book, author_info)
+        
+        # The hash covers the images, genres and taxonomies too, so an
+        # unchanged book needs none of the work below
+        book_hash = content_hash(book)
+        book_id = self.unchanged_local_id("book", book.get("id"), book_hash)
+        if book_id is not None:
+            return book_id
+        
+        book_id = self.book_processor.process_book(book, author_id)
+        
+        # Process images if any
+        if "images" in book and book["images"]:
+            self.image_processor.process_book_images(book["images"], book["id"])
+        
+        # Process genres if any; taxonomies, when present, replace them
+        if "genreTaxonomies" in book and book["genreTaxonomies"]:
+            self.taxonomy_processor.process_book_taxonomies(book["genreTaxonomies"], book_id)
+        elif "genres" in book and book["genres"]:
+            self.genre_processor.process_book_genres(book["genres"], book_id)
+        
+        self.record_written("book", book_id, book_hash)
+        return book_id
+    
+    def attach_book_author(self, book, author_info):
+        """Ensure the book is associated with the correct author"""
+        book["authorId"] = author_info.get("id")
+        book["author"] = author_info.get("author_name")
+        book["authorImageUrl"] = author_info.get("author_image_url")
+    
     def store_publisher_info(self, publisher_info):
         """Store publisher information in the settings table"""
         if not publisher_info:
@@ -176,15 +568,16 @@ class DataSynchronizer:
         business_email = publisher_info.get("business_email", "")
         website = publisher_info.get("website", "")
         
-        # Store relevant publisher details in settings
-        self.db_manager.settings.set("publisher_id", str(publisher_id))
-        self.db_manager.settings.set("publisher_name", publisher_name)
-        self.db_manager.settings.set("publisher_description", publisher_description)
-        self.db_manager.settings.set("publisher_email", business_email)
-        self.db_manager.settings.set("publisher_website", website)
-        
-        # Mark user as a publisher
-        self.db_manager.settings.set("is_publisher", "1")
+        with self.db_manager.transaction():
+            # Store relevant publisher details in settings
+            self.db_manager.settings.set("publisher_id", str(publisher_id))
+            self.db_manager.settings.set("publisher_name", publisher_name)
+            self.db_manager.settings.set("publisher_description", publisher_description)
+            self.db_manager.settings.set("publisher_email", business_email)
+            self.db_manager.settings.set("publisher_website", website)
+            
+            # Mark user as a publisher
+            self.db_manager.settings.set("is_publisher", "1")
     
     def update_parent_data(self):
         """Update parent application's data structures with fresh database data"""
@@ -5,6 +5,7 @@ Taxonomy data processing functionality.
 import json
 from datetime import datetime
 import app_logger as logger
+import tracing
 from exceptions import InvalidDataError, DatabaseError
 
 class TaxonomyProcessor:
@@ -15,6 +16,20 @@ class TaxonomyProcessor:
         self.db_manager = db_manager
         self.synchronizer = synchronizer
         
+        # IDs of the genres table, loaded once per sync (see reset_genre_ids)
+        self._genre_ids = None
+        
+    def reset_genre_ids(self):
+        """Forget the preloaded genre IDs, e.g. at the start of a sync or after a rollback"""
+        self._genre_ids = None
+        
+    def known_genre_ids(self):
+        """Set of genre IDs in the database, loaded on first use"""
+        if self._genre_ids is None:
+            self._genre_ids = self.db_manager.genres.get_ids()
+        return self._genre_ids
+        
+    @tracing.span("taxonomies")
     def process_book_taxonomies(self, taxonomies, book_id):
         """Process and store book taxonomy associations"""
         if not taxonomies or not book_id:
@@ -27,60 +42,36 @@ class TaxonomyProcessor:
             if isinstance(book_id, str) and book_id.isdigit():
                 local_book_id = int(book_id)
             
-            # Clear existing taxonomy associations for this book
-            self.db_manager.execute_query(
-                "DELETE FROM book_genres WHERE book_id = ?", 
-                (local_book_id,)
-            )
+            known_ids = self.known_genre_ids()
+            new_genres = {}
+            links = []
             
-            # Add each taxonomy item to the database if it doesn't exist
-            # and create the association with the book
             for taxonomy in taxonomies:
                 taxonomy_id = taxonomy.get("taxonomyId")
                 if not taxonomy_id:
                     logger.log_warning(f"Taxonomy without ID found for book {local_book_id}")
                     continue
                 
-                # Check if taxonomy exists, if not add it
-                existing_taxonomy = self.db_manager.execute_query(
-                    "SELECT id FROM genres WHERE id = ?", 
-                    (taxonomy_id,)
-                )
-                
-                # If taxonomy doesn't exist, add it
-                if not existing_taxonomy:
-                    taxonomy_data = {
+                # Taxonomies the genres table doesn't know yet are added with the book
+                if taxonomy_id not in known_ids and taxonomy_id not in new_genres:
+                    new_genres[taxonomy_id] = {
                         'id': taxonomy_id,
                         'name': taxonomy.get("name", ""),
                         'description': taxonomy.get("description", ""),
                         'type': taxonomy.get("type", "genre"),
                         'parentId': None  # Parent relationship would need to be determined separately
                     }
-                    
-                    try:
-                        self.db_manager.genres.add(taxonomy_data)
-                        logger.log_debug(f"Added new taxonomy: {taxonomy.get('name')}")
-                    except Exception as e:
-                        logger.log_error(f"Error adding taxonomy {taxonomy_id}: {str(e)}")
-                        continue
                 
-                # Create the book-taxonomy relationship with rank and importance
-                try:
-                    query = """
-                    INSERT INTO book_genres (book_id, genre_id, rank, importance) 
-                    VALUES (?, ?, ?, ?)
-                    """
-                    params = (
-                        local_book_id, 
-                        taxonomy_id, 
-                        taxonomy.get("rank", 0),
-                        taxonomy.get("importance", 0.0)
-                    )
-                    
-                    self.db_manager.execute_query(query, params)
-                    
-                except Exception as e:
-                    logger.log_error(f"Error associating taxonomy {taxonomy_id} with book {local_book_id}: {str(e)}")
+                links.append((taxonomy_id, taxonomy.get("rank", 0), taxonomy.get("importance", 0.0)))
+            
+            if new_genres:
+                for genre in new_genres.values():
+                    self.db_manager.genres.add(genre)
+                    logger.log_debug("Added new taxonomy: %s", genre['name'])
+                known_ids.update(new_genres)
+            
+            # Write only the associations that changed
+            self.db_manager.genres.reconcile_book_genres(local_book_id, links)
             
             return True
             
@@ -1,58 +1,390 @@
 # database/connection.py
+import time
 import sqlite3
 import contextlib
+import threading
 import app_logger as logger
+from config import DB_POOL_SIZE, DB_PRAGMA_PROFILES, DB_PRAGMA_PROFILE, DB_PROFILE_QUERIES
+from exceptions import ConfigurationError
+from .profiler import QueryProfiler
 
 class DatabaseConnectionManager:
-    def __init__(self, db_path):
+    def __init__(self, db_path, pool_size=DB_POOL_SIZE, pragma_profile=DB_PRAGMA_PROFILE):
+        if pragma_profile not in DB_PRAGMA_PROFILES:
+            raise ConfigurationError(
+                f"Unknown PRAGMA profile '{pragma_profile}', "
+                f"expected one of: {', '.join(DB_PRAGMA_PROFILES)}"
+            )
+
         self.db_path = db_path
+        self.pool_size = pool_size
+        self.pragma_profile = pragma_profile
+
+        # One long-lived connection per thread, keyed by thread ident
+        self._pool = {}
+        # Connections of threads beyond pool_size, also kept per thread
+        self._overflow = {}
+        self._pool_lock = threading.Lock()
+        self._closed = False
+
+        # Per-thread transaction nesting depth
+        self._local = threading.local()
+
+        # QueryProfiler while profiling is enabled
+        self.profiler = None
+        if DB_PROFILE_QUERIES:
+            self.enable_profiling()
+
+    def enable_profiling(self, slow_query_ms=None):
+        """
+        Start timing every statement run through execute() and executemany()
+
+        :param slow_query_ms: Slow-query threshold (default DB_SLOW_QUERY_MS)
+        :return: The QueryProfiler collecting the statistics
+        """
+        if self.profiler is None:
+            self.profiler = QueryProfiler() if slow_query_ms is None else QueryProfiler(slow_query_ms)
+        elif slow_query_ms is not None:
+            self.profiler.slow_query_ms = slow_query_ms
+        return self.profiler
+
+    def disable_profiling(self):
+        """Stop profiling; returns the profiler with what it recorded, if any"""
+        profiler, self.profiler = self.profiler, None
+        return profiler
+
+    def _transaction_depth(self):
+        """Get the calling thread's transaction nesting depth"""
+        return getattr(self._local, 'depth', 0)
+
+    def in_transaction(self):
+        """Whether the calling thread is inside a transaction() block"""
+        return self._transaction_depth() > 0
+
+    def _open(self):
+        """Open a new SQLite connection to the database file"""
+        # Connections are owned by a single thread, but close_all() may run
+        # from another thread at shutdown, so same-thread checking is disabled
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            self._apply_pragmas(conn)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def _apply_pragmas(self, conn):
+        """Apply the configured PRAGMA profile to a new connection"""
+        for pragma, value in DB_PRAGMA_PROFILES[self.pragma_profile].items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+    def _tracking_paused(self):
+        """Whether the calling thread is inside change_tracking_paused()"""
+        return getattr(self._local, 'tracking_paused', 0) > 0
+
+    def _raise_pause_flag(self, conn):
+        """Set change_tracking.paused inside the calling thread's open transaction"""
+        conn.execute("UPDATE change_tracking SET paused = 1")
+        self._local.pause_flag = True
+
+    def _lower_pause_flag(self, conn):
+        """Clear change_tracking.paused before the calling thread's transaction commits"""
+        conn.execute("UPDATE change_tracking SET paused = 0")
+        self._local.pause_flag = False
+
+    @contextlib.contextmanager
+    def change_tracking_paused(self):
+        """
+        Context manager that stops the calling thread's writes from being
+        recorded as local changes to push (e.g. while applying server data)
+
+        The tracking triggers skip writes while change_tracking.paused is
+        set. Each of the thread's write transactions sets it after BEGIN
+        and clears it again before committing, so it is never committed
+        set: SQLite's single writer keeps other connections out until
+        then, and they only ever see it cleared.
+        """
+        self._local.tracking_paused = getattr(self._local, 'tracking_paused', 0) + 1
+        try:
+            if self.in_transaction() and not getattr(self._local, 'pause_flag', False):
+                self._raise_pause_flag(self._local.conn)
+            yield
+        finally:
+            self._local.tracking_paused -= 1
+            if not self._tracking_paused() and getattr(self._local, 'pause_flag', False) \
+                    and self.in_transaction():
+                self._lower_pause_flag(self._local.conn)
+
+
+    def get_pragmas(self):
+        """Read back the active PRAGMA values on the calling thread's connection"""
+        with self.connection() as conn:
+            return {
+                pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+                for pragma in DB_PRAGMA_PROFILES[self.pragma_profile]
+            }
+
+    def _prune_dead_threads(self):
+        """Close pooled and overflow connections whose owning thread has exited (lock held)"""
+        alive = {thread.ident for thread in threading.enumerate()}
+        for connections in (self._pool, self._overflow):
+            for ident in [ident for ident in connections if ident not in alive]:
+                try:
+                    connections.pop(ident).close()
+                except sqlite3.Error as e:
+                    logger.log_warning(f"Error closing stale connection: {e}")
+
+    def _checkout(self):
+        """
+        Get the calling thread's connection, opening it if needed
+
+        Past pool_size threads, each further thread gets an overflow
+        connection that it also keeps until it exits. The pool being
+        exhausted is logged once, not per query, until the overflow
+        threads are gone.
+        """
+        # Reuse the connection an open transaction() is running on
+        txn_conn = getattr(self._local, 'conn', None)
+        if txn_conn is not None:
+            return txn_conn
+
+        ident = threading.get_ident()
+        with self._pool_lock:
+            conn = self._pool.get(ident) or self._overflow.get(ident)
+            if conn is not None:
+                return conn
+
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool has been closed")
+
+            if len(self._pool) >= self.pool_size:
+                self._prune_dead_threads()
+
+            conn = self._open()
+            if len(self._pool) < self.pool_size:
+                self._pool[ident] = conn
+                return conn
+
+            if not self._overflow:
+                logger.log_warning(
+                    "Connection pool exhausted (%s), opening overflow connections per thread",
+                    self.pool_size
+                )
+            self._overflow[ident] = conn
+            return conn
 
     @contextlib.contextmanager
     def connection(self):
         """
         Context manager for database connections
-        Ensures connections are always closed, even if exceptions occur
+        Checks out the calling thread's pooled connection; it stays open after
+        the block. Uncommitted work is rolled back if an exception occurs.
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._checkout()
             yield conn
-        except sqlite3.Error as e:
-            logger.log_error(f"Database connection error: {e}")
+        except Exception as e:
+            if isinstance(e, sqlite3.Error):
+                logger.log_error(f"Database connection error: {e}")
+            # Inside transaction() the enclosing block decides what to undo
+            if conn is not None and conn.in_transaction and not self.in_transaction():
+                conn.rollback()
             raise
-        finally:
-            if conn:
-                conn.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Context manager for a unit of work on the calling thread's connection
+
+        Queries run through execute() inside the block join the transaction
+        instead of committing on their own. The outermost block commits once
+        on success and rolls back on error. Nested blocks use savepoints, so
+        a failing inner batch only undoes its own work and the outer
+        transaction can carry on if the caller handles the exception.
+        """
+        with self.connection() as conn:
+            depth = self._transaction_depth()
+            savepoint = f"sp_{depth}"
+
+            if depth == 0:
+                if conn.in_transaction:
+                    conn.commit()
+                conn.execute("BEGIN")
+                if self._tracking_paused():
+                    self._raise_pause_flag(conn)
+            else:
+                conn.execute(f"SAVEPOINT {savepoint}")
+
+            self._local.depth = depth + 1
+            self._local.conn = conn
+            try:
+                yield conn
+            except BaseException:
+                self._local.depth = depth
+                if depth == 0:
+                    self._local.conn = None
+                    self._local.pause_flag = False
+                    conn.rollback()
+                else:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                    # The savepoint may have been where the flag was set
+                    if getattr(self._local, 'pause_flag', False):
+                        self._raise_pause_flag(conn)
+                raise
+            else:
+                self._local.depth = depth
+                if depth == 0:
+                    self._local.conn = None
+                    if getattr(self._local, 'pause_flag', False):
+                        self._lower_pause_flag(conn)
+                    conn.commit()
+                else:
+                    conn.execute(f"RELEASE {savepoint}")
+
+    def close_all(self):
+        """Close every pooled and overflow connection and refuse new checkouts"""
+        with self._pool_lock:
+            self._closed = True
+            for connections in (self._pool, self._overflow):
+                for conn in connections.values():
+                    try:
+                        conn.close()
+                    except sqlite3.Error as e:
+                        logger.log_warning(f"Error closing database connection: {e}")
+                connections.clear()
 
     def execute(self, query, params=None, commit=True):
         """
         Execute a query with enhanced error handling and connection management
-        
+
         :param query: SQL query to execute
         :param params: Optional query parameters
-        :param commit: Whether to commit the transaction (default True)
+        :param commit: Whether to commit the transaction (default True);
+                       ignored inside transaction(), which commits once at the end
         :return: Query results or last row ID
         """
+        # Determine query type and handle accordingly
+        query_type = query.strip().upper().split()[0]
+        in_transaction = self.in_transaction()
+        if query_type != "SELECT" and not in_transaction and self._tracking_paused():
+            # The pause flag only exists inside a transaction
+            with self.transaction():
+                return self.execute(query, params, commit)
+
+        profiler = self.profiler
         with self.connection() as conn:
             cursor = conn.cursor()
-            
+
             try:
+                started = time.perf_counter()
                 if params:
                     cursor.execute(query, params)
                 else:
                     cursor.execute(query)
-                
-                # Determine query type and handle accordingly
-                query_type = query.strip().upper().split()[0]
-                
+
                 if query_type == "SELECT":
-                    return cursor.fetchall()
+                    result = cursor.fetchall()
+                    rows = len(result)
                 else:
-                    if commit:
+                    if commit and not in_transaction:
                         conn.commit()
-                    return cursor.lastrowid
-            
+                    result = cursor.lastrowid
+                    rows = cursor.rowcount
+
+                if profiler is not None:
+                    profiler.record(query, time.perf_counter() - started, rows, conn, params)
+                return result
+
+            except sqlite3.Error as e:
+                # A failed statement is undone by SQLite on its own; only
+                # roll back when we are not part of a larger unit of work
+                if not in_transaction:
+                    conn.rollback()
+                logger.log_error(f"Query execution error: {e}")
+                raise
+            finally:
+                cursor.close()
+
+    def executemany(self, query, param_rows, commit=True):
+        """
+        Execute a write query once per parameter row in a single round trip
+
+        :param query: SQL query to execute
+        :param param_rows: Iterable of parameter tuples
+        :param commit: Whether to commit the transaction (default True);
+                       ignored inside transaction(), which commits once at the end
+        :return: Number of rows affected
+        """
+        in_transaction = self.in_transaction()
+        if not in_transaction and self._tracking_paused():
+            # The pause flag only exists inside a transaction
+            with self.transaction():
+                return self.executemany(query, param_rows, commit)
+
+        profiler = self.profiler
+        if profiler is not None:
+            # Keep the first row to explain the statement with if it is slow
+            param_rows = list(param_rows)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                started = time.perf_counter()
+                cursor.executemany(query, param_rows)
+                if commit and not in_transaction:
+                    conn.commit()
+
+                if profiler is not None:
+                    profiler.record(query, time.perf_counter() - started, cursor.rowcount, conn,
+                                    param_rows[0] if param_rows else None)
+                return cursor.rowcount
+
+            except sqlite3.Error as e:
+                if not in_transaction:
+                    conn.rollback()
+                logger.log_error(f"Query execution error: {e}")
+                raise
+            finally:
+                cursor.close()
+
+    def executemany_with_ids(self, query, param_rows):
+        """
+        Run an INSERT once per parameter row and return the ID of each row written
+
+        The query is run with RETURNING rowid (SQLite 3.35+), one row at a
+        time on a single prepared statement inside one transaction, so each
+        ID is the one SQLite reports for that row. A row that took an
+        ON CONFLICT DO UPDATE path gets the ID of the row it updated, and
+        one skipped by DO NOTHING or OR IGNORE gets None.
+
+        :param query: INSERT query, without a RETURNING clause
+        :param param_rows: Iterable of parameter tuples
+        :return: List of IDs, in input order
+        """
+        param_rows = list(param_rows)
+        if not param_rows:
+            return []
+
+        returning_query = f"{query.rstrip()} RETURNING rowid"
+        profiler = self.profiler
+        ids = []
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            try:
+                started = time.perf_counter()
+                for params in param_rows:
+                    row = cursor.execute(returning_query, params).fetchone()
+                    ids.append(row[0] if row else None)
+
+                if profiler is not None:
+                    profiler.record(returning_query, time.perf_counter() - started,
+                                    len(param_rows), conn, param_rows[0])
             except sqlite3.Error as e:
-                conn.rollback()
                 logger.log_error(f"Query execution error: {e}")
                 raise
+            finally:
+                cursor.close()
+
+        return ids
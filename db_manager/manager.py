@@ -7,6 +7,7 @@ import app_logger as logger
 
 from .connection import DatabaseConnectionManager
 from .schema import initialize_tables
+from .migrations import apply_migrations
 from .models.author import AuthorModel
 from .models.book import BookModel
 from .models.genre import GenreModel
@@ -14,6 +15,13 @@ from .models.publisher import PublisherModel
 from .models.image import ImageModel
 from .models.settings import SettingsModel
 from .models.user import UserModel
+from .models.id_map import IdMapModel
+from .models.http_cache import HttpCacheModel
+from .models.image_blob import ImageBlobModel
+from .models.pending_push import PendingPushModel
+from .models.sync_state import SyncStateModel
+from .models.content_hash import ContentHashModel
+from .models.catalogue_staging import CatalogueStagingModel
 
 from exceptions import (
     ConnectionError, 
@@ -38,11 +46,18 @@ class DatabaseManager:
         self.publishers = PublisherModel(self.connection_manager)
         self.settings = SettingsModel(self.connection_manager)
         self.users = UserModel(self.connection_manager)
+        self.id_map = IdMapModel(self.connection_manager)
+        self.http_cache = HttpCacheModel(self.connection_manager)
+        self.image_blobs = ImageBlobModel(self.connection_manager)
+        self.pending_push = PendingPushModel(self.connection_manager)
+        self.sync_state = SyncStateModel(self.connection_manager)
+        self.content_hashes = ContentHashModel(self.connection_manager)
+        self.catalogue_staging = CatalogueStagingModel(self.connection_manager, self.books)
 
         self.initialize_db()
     
     def initialize_db(self):
-        """Create database tables if they don't exist"""
+        """Create database tables if they don't exist and apply pending migrations"""
         # Ensure the database directory exists
         os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
         
@@ -52,10 +67,43 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 initialize_tables(cursor)
                 conn.commit()
+                
+                schema_version = apply_migrations(cursor)
+                logger.log_debug(f"Database schema at version {schema_version}")
+            
+            logger.log_debug(
+                f"Database opened with '{self.connection_manager.pragma_profile}' profile: "
+                f"{self.connection_manager.get_pragmas()}"
+            )
         except Exception as e:
             logger.log_error(f"Database initialization error: {e}")
             raise
             
+    def transaction(self):
+        """
+        Group model calls into one unit of work that commits once
+        
+        Usage:
+            with db_manager.transaction():
+                db_manager.authors.add(...)
+                db_manager.books.add(...)
+        
+        Blocks can be nested; an inner block that raises only rolls back
+        its own changes.
+        """
+        return self.connection_manager.transaction()
+    
+    def change_tracking_paused(self):
+        """
+        Don't record writes made in this block (on this thread) as local
+        changes to push, e.g. while applying data pulled from the server
+        """
+        return self.connection_manager.change_tracking_paused()
+    
+    def close(self):
+        """Close all pooled database connections"""
+        self.connection_manager.close_all()
+            
     def execute_query(self, query, params=None):
         """Legacy method to maintain compatibility with existing code"""
         return self.connection_manager.execute(query, params)
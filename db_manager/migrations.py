@@ -0,0 +1,412 @@
+# database/migrations.py
+"""Versioned schema migrations"""
+
+import app_logger as logger
+from exceptions import SchemaError
+
+
+def _add_images_local_file_path(cursor):
+    """Add local_file_path to images tables created before the column existed"""
+    cursor.execute("PRAGMA table_info(images)")
+    columns = cursor.fetchall()
+
+    if not any(col[1] == 'local_file_path' for col in columns):
+        cursor.execute("ALTER TABLE images ADD COLUMN local_file_path TEXT DEFAULT NULL")
+
+
+def _add_lookup_indexes(cursor):
+    """Index the columns the models and sync processors filter on"""
+    # book_genres(book_id) is already covered by its UNIQUE(book_id, genre_id) index
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_author_id ON books (authorId)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_title_author_id ON books (title, authorId)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_title_author ON books (title, author)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_images_book_id_url ON images (bookId, imageUrl)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_genres_type ON genres (type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_genres_parent_id ON genres (parentId)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_authors_author_name ON authors (author_name)")
+
+
+def _add_id_map(cursor):
+    """Move remote-to-local ID mappings out of user_settings into id_map"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS id_map (
+        entity_type TEXT NOT NULL,
+        remote_id INTEGER NOT NULL,
+        local_id INTEGER NOT NULL,
+        PRIMARY KEY (entity_type, remote_id)
+    ) WITHOUT ROWID
+    ''')
+
+    # Settings keys look like "<entity_type>_api_id_<remote_id>"
+    cursor.execute('''
+    INSERT OR REPLACE INTO id_map (entity_type, remote_id, local_id)
+    SELECT substr(key, 1, instr(key, '_api_id_') - 1),
+           CAST(substr(key, instr(key, '_api_id_') + 8) AS INTEGER),
+           CAST(value AS INTEGER)
+    FROM user_settings
+    WHERE key GLOB '*_api_id_[0-9]*' AND value GLOB '[0-9]*'
+    ''')
+    cursor.execute("DELETE FROM user_settings WHERE key GLOB '*_api_id_[0-9]*'")
+
+
+def _unique_image_urls_per_book(cursor):
+    """Make (bookId, imageUrl) unique so image rows can be upserted in bulk"""
+    # Keep the oldest row of any duplicate pair
+    cursor.execute('''
+    DELETE FROM images
+    WHERE imageUrl IS NOT NULL
+    AND id NOT IN (
+        SELECT MIN(id) FROM images WHERE imageUrl IS NOT NULL GROUP BY bookId, imageUrl
+    )
+    ''')
+    cursor.execute("DROP INDEX IF EXISTS idx_images_book_id_url")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_images_book_id_url ON images (bookId, imageUrl)")
+
+
+def _add_http_cache(cursor):
+    """Add the HTTP validator manifest used for conditional image downloads"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS http_cache (
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        size INTEGER,
+        content_hash TEXT,
+        local_path TEXT,
+        checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _add_image_blobs(cursor):
+    """Add the content-addressed image store index with reference counting"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS image_blobs (
+        hash TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        size INTEGER,
+        ref_count INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_image_blobs_ref_count ON image_blobs (ref_count)")
+
+    # owner_type is 'image' (images.id), 'author' (authors.id) or 'book'
+    # (books.id, one per role for manually picked images)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS image_blob_refs (
+        owner_type TEXT NOT NULL,
+        owner_id INTEGER NOT NULL,
+        role TEXT NOT NULL DEFAULT '',
+        blob_hash TEXT NOT NULL,
+        PRIMARY KEY (owner_type, owner_id, role),
+        FOREIGN KEY (blob_hash) REFERENCES image_blobs (hash)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_image_blob_refs_hash ON image_blob_refs (blob_hash)")
+
+    # Keep image_blobs.ref_count in step with image_blob_refs
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_image_blob_refs_insert AFTER INSERT ON image_blob_refs
+    BEGIN
+        UPDATE image_blobs SET ref_count = ref_count + 1 WHERE hash = NEW.blob_hash;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_image_blob_refs_delete AFTER DELETE ON image_blob_refs
+    BEGIN
+        UPDATE image_blobs SET ref_count = ref_count - 1 WHERE hash = OLD.blob_hash;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_image_blob_refs_update AFTER UPDATE OF blob_hash ON image_blob_refs
+    WHEN OLD.blob_hash != NEW.blob_hash
+    BEGIN
+        UPDATE image_blobs SET ref_count = ref_count - 1 WHERE hash = OLD.blob_hash;
+        UPDATE image_blobs SET ref_count = ref_count + 1 WHERE hash = NEW.blob_hash;
+    END
+    ''')
+
+    # Drop references when their owner row goes away
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_images_delete_blob_ref AFTER DELETE ON images
+    BEGIN
+        DELETE FROM image_blob_refs WHERE owner_type = 'image' AND owner_id = OLD.id;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_authors_delete_blob_ref AFTER DELETE ON authors
+    BEGIN
+        DELETE FROM image_blob_refs WHERE owner_type = 'author' AND owner_id = OLD.id;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_books_delete_blob_ref AFTER DELETE ON books
+    BEGIN
+        DELETE FROM image_blob_refs WHERE owner_type = 'book' AND owner_id = OLD.id;
+    END
+    ''')
+
+
+def _add_pending_push(cursor):
+    """Track locally changed authors and books so push only sends those"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS pending_push (
+        entity_type TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        change_seq INTEGER NOT NULL,
+        PRIMARY KEY (entity_type, entity_id)
+    ) WITHOUT ROWID
+    ''')
+
+    # change_seq increases on every change, so push can tell whether a row
+    # was edited again while its upload was in flight
+    mark = '''
+        INSERT OR REPLACE INTO pending_push (entity_type, entity_id, change_seq)
+        VALUES ('{entity_type}', {entity_id},
+                (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM pending_push));
+    '''
+    author_columns = "userId, author_name, author_image_url, birth_date, death_date, website, bio"
+    book_columns = (
+        "title, author, authorId, description, promoted, pageCount, formats, publishedDate, "
+        "awards, originalTitle, series, setting, characters, isbn, asin, language, referralLinks"
+    )
+    triggers = [
+        ("trg_authors_insert_push", "AFTER INSERT ON authors", mark.format(entity_type='author', entity_id='NEW.id')),
+        ("trg_authors_update_push", f"AFTER UPDATE OF {author_columns} ON authors",
+         mark.format(entity_type='author', entity_id='NEW.id')),
+        ("trg_books_insert_push", "AFTER INSERT ON books", mark.format(entity_type='book', entity_id='NEW.id')),
+        ("trg_books_update_push", f"AFTER UPDATE OF {book_columns} ON books",
+         mark.format(entity_type='book', entity_id='NEW.id')),
+        ("trg_book_genres_insert_push", "AFTER INSERT ON book_genres",
+         mark.format(entity_type='book', entity_id='NEW.book_id')),
+        ("trg_book_genres_update_push", "AFTER UPDATE ON book_genres",
+         mark.format(entity_type='book', entity_id='NEW.book_id')),
+        ("trg_book_genres_delete_push", "AFTER DELETE ON book_genres",
+         mark.format(entity_type='book', entity_id='OLD.book_id')),
+    ]
+    for name, event, body in triggers:
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {name} {event}
+        WHEN change_tracking_enabled()
+        BEGIN
+            {body}
+        END
+        ''')
+
+    # Deleted rows have nothing left to push
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_authors_delete_push AFTER DELETE ON authors
+    BEGIN
+        DELETE FROM pending_push WHERE entity_type = 'author' AND entity_id = OLD.id;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_books_delete_push AFTER DELETE ON books
+    BEGIN
+        DELETE FROM pending_push WHERE entity_type = 'book' AND entity_id = OLD.id;
+    END
+    ''')
+
+    # Nothing has been tracked before this migration, so the first push
+    # after upgrading sends everything, as every push used to
+    cursor.execute('''
+    INSERT OR IGNORE INTO pending_push (entity_type, entity_id, change_seq)
+    SELECT 'author', id, 1 FROM authors
+    ''')
+    cursor.execute('''
+    INSERT OR IGNORE INTO pending_push (entity_type, entity_id, change_seq)
+    SELECT 'book', id, 1 FROM books
+    ''')
+
+
+def _add_sync_state(cursor):
+    """Track per-endpoint sync watermarks and checkpoints for incremental sync"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sync_state (
+        endpoint TEXT PRIMARY KEY,
+        watermark TEXT,
+        run_started TEXT,
+        checkpoint INTEGER,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _add_content_hashes(cursor):
+    """Store the payload hash synced rows were written from, so unchanged ones can be skipped"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS content_hashes (
+        entity_type TEXT NOT NULL,
+        local_id INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        PRIMARY KEY (entity_type, local_id)
+    ) WITHOUT ROWID
+    ''')
+
+    # A deleted row has nothing to compare against
+    for entity_type, table in (('author', 'authors'), ('book', 'books')):
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_hash AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM content_hashes WHERE entity_type = '{entity_type}' AND local_id = OLD.id;
+        END
+        ''')
+
+    # A row changed locally no longer matches its hash, so the next sync
+    # rewrites it from the server as it always did
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_pending_push_insert_hash AFTER INSERT ON pending_push
+    BEGIN
+        DELETE FROM content_hashes WHERE entity_type = NEW.entity_type AND local_id = NEW.entity_id;
+    END
+    ''')
+
+
+def _drop_cached_genres_setting(cursor):
+    """Drop the full genre list cached in user_settings; the genres table is the offline copy"""
+    cursor.execute("DELETE FROM user_settings WHERE key IN ('cached_genres', 'genres_last_updated')")
+
+
+def _add_image_blob_registered_at(cursor):
+    """Record when each blob was last registered, so GC can spare ones not yet referenced"""
+    cursor.execute("PRAGMA table_info(image_blobs)")
+    columns = cursor.fetchall()
+
+    if not any(col[1] == 'registered_at' for col in columns):
+        cursor.execute("ALTER TABLE image_blobs ADD COLUMN registered_at TIMESTAMP")
+    cursor.execute("UPDATE image_blobs SET registered_at = created_at WHERE registered_at IS NULL")
+
+
+def _add_change_tracking_table(cursor):
+    """
+    Move the change-tracking switch and sequence into a change_tracking row
+
+    The migration 7 triggers asked a per-connection SQL function whether to
+    track, so any connection without it (the sqlite3 shell, a backup tool)
+    failed every write, and numbered changes with a MAX(change_seq) scan of
+    pending_push per row written. They now read the switch from the one
+    change_tracking row, which every connection sees, and take the next
+    number from its counter.
+    """
+    # paused is only ever set inside the write transaction of a thread
+    # running in change_tracking_paused(), and cleared before it commits
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS change_tracking (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        paused INTEGER NOT NULL DEFAULT 0,
+        last_seq INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute('''
+    INSERT OR IGNORE INTO change_tracking (id, paused, last_seq)
+    SELECT 1, 0, COALESCE(MAX(change_seq), 0) FROM pending_push
+    ''')
+
+    # An upsert rather than INSERT OR REPLACE: the conflict policy of an
+    # outer UPSERT statement would override OR REPLACE inside the trigger
+    mark = '''
+        UPDATE change_tracking SET last_seq = last_seq + 1;
+        INSERT INTO pending_push (entity_type, entity_id, change_seq)
+        VALUES ('{entity_type}', {entity_id}, (SELECT last_seq FROM change_tracking))
+        ON CONFLICT (entity_type, entity_id) DO UPDATE SET change_seq = excluded.change_seq;
+    '''
+    author_columns = "userId, author_name, author_image_url, birth_date, death_date, website, bio"
+    book_columns = (
+        "title, author, authorId, description, promoted, pageCount, formats, publishedDate, "
+        "awards, originalTitle, series, setting, characters, isbn, asin, language, referralLinks"
+    )
+    triggers = [
+        ("trg_authors_insert_push", "AFTER INSERT ON authors", mark.format(entity_type='author', entity_id='NEW.id')),
+        ("trg_authors_update_push", f"AFTER UPDATE OF {author_columns} ON authors",
+         mark.format(entity_type='author', entity_id='NEW.id')),
+        ("trg_books_insert_push", "AFTER INSERT ON books", mark.format(entity_type='book', entity_id='NEW.id')),
+        ("trg_books_update_push", f"AFTER UPDATE OF {book_columns} ON books",
+         mark.format(entity_type='book', entity_id='NEW.id')),
+        ("trg_book_genres_insert_push", "AFTER INSERT ON book_genres",
+         mark.format(entity_type='book', entity_id='NEW.book_id')),
+        ("trg_book_genres_update_push", "AFTER UPDATE ON book_genres",
+         mark.format(entity_type='book', entity_id='NEW.book_id')),
+        ("trg_book_genres_delete_push", "AFTER DELETE ON book_genres",
+         mark.format(entity_type='book', entity_id='OLD.book_id')),
+    ]
+    for name, event, body in triggers:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f'''
+        CREATE TRIGGER {name} {event}
+        WHEN NOT EXISTS (SELECT 1 FROM change_tracking WHERE paused)
+        BEGIN
+            {body}
+        END
+        ''')
+
+
+# Ordered list of (version, description, migration function).
+# Append new migrations at the end with the next version number; never
+# renumber or edit one that has shipped.
+MIGRATIONS = [
+    (1, "Add images.local_file_path", _add_images_local_file_path),
+    (2, "Add lookup indexes", _add_lookup_indexes),
+    (3, "Add id_map table and migrate settings-based ID mappings", _add_id_map),
+    (4, "Make images (bookId, imageUrl) unique", _unique_image_urls_per_book),
+    (5, "Add http_cache manifest", _add_http_cache),
+    (6, "Add content-addressed image store index", _add_image_blobs),
+    (7, "Add pending_push change tracking", _add_pending_push),
+    (8, "Add sync_state watermarks and checkpoints", _add_sync_state),
+    (9, "Add content_hashes for skipping unchanged synced rows", _add_content_hashes),
+    (10, "Replace the cached_genres setting with a genre list snapshot", _drop_cached_genres_setting),
+    (11, "Add image_blobs.registered_at for the GC grace period", _add_image_blob_registered_at),
+    (12, "Switch change tracking to a change_tracking table", _add_change_tracking_table),
+]
+
+
+def get_schema_version(cursor):
+    """Get the highest applied migration version (0 for a fresh database)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    row = cursor.fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(cursor):
+    """
+    Apply every migration newer than the recorded schema version
+
+    Each migration runs in an explicit transaction committed together with
+    its schema_version row, so an interrupted upgrade resumes from the first
+    unapplied migration. The explicit BEGIN matters: sqlite3 only opens a
+    transaction implicitly before INSERT/UPDATE/DELETE, so CREATE, ALTER and
+    DROP would otherwise commit on their own and survive a rollback.
+
+    :return: The schema version after migrating
+    """
+    conn = cursor.connection
+    current_version = get_schema_version(cursor)
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+
+        try:
+            logger.log_debug(f"Applying schema migration {version}: {description}")
+            if conn.in_transaction:
+                conn.commit()
+            cursor.execute("BEGIN")
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+            current_version = version
+        except Exception as e:
+            conn.rollback()
+            raise SchemaError(f"Schema migration {version} ({description}) failed: {e}")
+
+    return current_version
@@ -4,6 +4,27 @@ import app_logger as logger
 from exceptions import InvalidDataError, DataIntegrityError, EntityNotFoundError
 
 class AuthorModel:
+    INSERT_QUERY = """
+        INSERT INTO authors (
+            id, userId, author_name, author_image_url, 
+            birth_date, death_date, website, bio, local_image_path
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+    
+    # local_image_path is only overwritten when the incoming row provides one
+    UPSERT_QUERY = INSERT_QUERY + """
+        ON CONFLICT (id) DO UPDATE SET
+            userId = excluded.userId,
+            author_name = excluded.author_name,
+            author_image_url = excluded.author_image_url,
+            birth_date = excluded.birth_date,
+            death_date = excluded.death_date,
+            website = excluded.website,
+            bio = excluded.bio,
+            local_image_path = COALESCE(excluded.local_image_path, authors.local_image_path)
+        """
+    
     def __init__(self, connection_manager):
         self.connection_manager = connection_manager
     
@@ -15,17 +36,13 @@ class AuthorModel:
         if not author_data.get('author_name'):
             raise InvalidDataError("Author must have a name")
         
-        logger.log_debug(f"adding author {author_data}")
-        
-        query = """
-        INSERT INTO authors (
-            id, userId, author_name, author_image_url, 
-            birth_date, death_date, website, bio, local_image_path
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
+        logger.log_debug("adding author %s", author_data)
         
-        params = (
+        return self.connection_manager.execute(self.INSERT_QUERY, self._params(author_data))
+    
+    def _params(self, author_data):
+        """Build the INSERT parameter tuple for an author dict"""
+        return (
             author_data.get('id'),
             author_data.get('userId'),
             author_data.get('author_name'),
@@ -36,8 +53,42 @@ class AuthorModel:
             author_data.get('bio'),
             author_data.get('local_image_path')
         )
+    
+    def add_many(self, authors):
+        """
+        Insert many authors in one transaction
         
-        return self.connection_manager.execute(query, params)
+        :param authors: Iterable of author dicts
+        :return: List of local author IDs, in input order
+        """
+        return self._write_many(authors, self.INSERT_QUERY)
+    
+    def upsert_many(self, authors):
+        """
+        Insert or update many authors (matched on id) in one transaction
+        
+        :param authors: Iterable of author dicts
+        :return: List of local author IDs, in input order
+        """
+        return self._write_many(authors, self.UPSERT_QUERY)
+    
+    def _write_many(self, authors, query):
+        """Validate and write author rows with one executemany per ID kind"""
+        authors = list(authors)
+        for author_data in authors:
+            if not author_data or not author_data.get('author_name'):
+                raise InvalidDataError("Author must have a name")
+        
+        with_id = [a for a in authors if a.get('id') is not None]
+        without_id = [a for a in authors if a.get('id') is None]
+        
+        with self.connection_manager.transaction():
+            self.connection_manager.executemany(query, [self._params(a) for a in with_id])
+            new_ids = iter(self.connection_manager.executemany_with_ids(
+                query, [self._params(a) for a in without_id]
+            ))
+        
+        return [a['id'] if a.get('id') is not None else next(new_ids) for a in authors]
     
     def get_all(self):
         """Get all authors from the database"""
@@ -95,6 +146,20 @@ class AuthorModel:
             logger.log_error(f"Error updating author {author_id}: {str(e)}")
             return False
     
+    def update_local_image_paths(self, paths):
+        """
+        Record the downloaded profile image path of many authors in one write
+        
+        :param paths: dict of author_id -> local_image_path
+        :return: Number of rows updated
+        """
+        if not paths:
+            return 0
+        return self.connection_manager.executemany(
+            "UPDATE authors SET local_image_path = ? WHERE id = ?",
+            [(path, author_id) for author_id, path in paths.items()]
+        )
+    
     def get_books(self, author_id):
         """Get all books by an author"""
         query = "SELECT * FROM books WHERE authorId = ?"
@@ -4,6 +4,40 @@ import app_logger as logger
 from exceptions import InvalidDataError, DataIntegrityError, EntityNotFoundError
 
 class BookModel:
+    JSON_FIELDS = ['formats', 'awards', 'characters', 'referralLinks', 'images']
+    
+    INSERT_QUERY = """
+        INSERT INTO books (
+            id, title, author, authorId, description, authorImageUrl,
+            promoted, pageCount, formats, publishedDate, awards,
+            originalTitle, series, setting, characters, isbn, asin,
+            language, referralLinks, impressionCount, clickThroughCount,
+            lastImpressionAt, lastClickThroughAt, internal_details, images
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+    
+    # Also used by the catalogue staging merge
+    UPSERT_CLAUSE = """
+        ON CONFLICT (id) DO UPDATE SET
+            title = excluded.title, author = excluded.author,
+            authorId = excluded.authorId, description = excluded.description,
+            authorImageUrl = excluded.authorImageUrl, promoted = excluded.promoted,
+            pageCount = excluded.pageCount, formats = excluded.formats,
+            publishedDate = excluded.publishedDate, awards = excluded.awards,
+            originalTitle = excluded.originalTitle, series = excluded.series,
+            setting = excluded.setting, characters = excluded.characters,
+            isbn = excluded.isbn, asin = excluded.asin, language = excluded.language,
+            referralLinks = excluded.referralLinks,
+            impressionCount = excluded.impressionCount,
+            clickThroughCount = excluded.clickThroughCount,
+            lastImpressionAt = excluded.lastImpressionAt,
+            lastClickThroughAt = excluded.lastClickThroughAt,
+            internal_details = excluded.internal_details, images = excluded.images
+        """
+    
+    UPSERT_QUERY = INSERT_QUERY + UPSERT_CLAUSE
+    
     def __init__(self, connection_manager):
         self.connection_manager = connection_manager
     
@@ -16,21 +50,14 @@ class BookModel:
             raise InvalidDataError("Book must have a title")
         
         # Format complex fields
-        for field in ['formats', 'awards', 'characters', 'referralLinks', 'images']:
+        for field in self.JSON_FIELDS:
             book_data[field] = self._format_json_field(book_data.get(field, ""))
         
-        query = """
-        INSERT INTO books (
-            id, title, author, authorId, description, authorImageUrl,
-            promoted, pageCount, formats, publishedDate, awards,
-            originalTitle, series, setting, characters, isbn, asin,
-            language, referralLinks, impressionCount, clickThroughCount,
-            lastImpressionAt, lastClickThroughAt, internal_details, images
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
-        params = (
+        return self.connection_manager.execute(self.INSERT_QUERY, self._params(book_data))
+    
+    def _params(self, book_data):
+        """Build the INSERT parameter tuple for a book dict"""
+        return (
             book_data.get('id'),
             book_data.get('title'),
             book_data.get('author'),
@@ -39,26 +66,60 @@ class BookModel:
             book_data.get('authorImageUrl'),
             1 if book_data.get('promoted') else 0,
             book_data.get('pageCount'),
-            book_data['formats'],
+            self._format_json_field(book_data.get('formats', "")),
             book_data.get('publishedDate'),
-            book_data['awards'],
+            self._format_json_field(book_data.get('awards', "")),
             book_data.get('originalTitle'),
             book_data.get('series'),
             book_data.get('setting'),
-            book_data['characters'],
+            self._format_json_field(book_data.get('characters', "")),
             book_data.get('isbn'),
             book_data.get('asin'),
             book_data.get('language'),
-            book_data['referralLinks'],
+            self._format_json_field(book_data.get('referralLinks', "")),
             book_data.get('impressionCount'),
             book_data.get('clickThroughCount'),
             book_data.get('lastImpressionAt'),
             book_data.get('lastClickThroughAt'),
             book_data.get('internal_details'),
-            book_data['images']
+            self._format_json_field(book_data.get('images', ""))
         )
+    
+    def add_many(self, books):
+        """
+        Insert many books in one transaction
         
-        return self.connection_manager.execute(query, params)
+        :param books: Iterable of book dicts
+        :return: List of local book IDs, in input order
+        """
+        return self._write_many(books, self.INSERT_QUERY)
+    
+    def upsert_many(self, books):
+        """
+        Insert or update many books (matched on id) in one transaction
+        
+        :param books: Iterable of book dicts
+        :return: List of local book IDs, in input order
+        """
+        return self._write_many(books, self.UPSERT_QUERY)
+    
+    def _write_many(self, books, query):
+        """Validate and write book rows with one executemany per ID kind"""
+        books = list(books)
+        for book_data in books:
+            if not book_data or not book_data.get('title'):
+                raise InvalidDataError("Book must have a title")
+        
+        with_id = [b for b in books if b.get('id') is not None]
+        without_id = [b for b in books if b.get('id') is None]
+        
+        with self.connection_manager.transaction():
+            self.connection_manager.executemany(query, [self._params(b) for b in with_id])
+            new_ids = iter(self.connection_manager.executemany_with_ids(
+                query, [self._params(b) for b in without_id]
+            ))
+        
+        return [b['id'] if b.get('id') is not None else next(new_ids) for b in books]
     
     def _format_json_field(self, value):
         """Helper method to format JSON fields consistently"""
@@ -68,7 +129,7 @@ class BookModel:
     
     def update(self, book_id, book_data):
         """Update a book"""
-        for field in ['formats', 'awards', 'characters', 'referralLinks', 'images']:
+        for field in self.JSON_FIELDS:
             book_data[field] = self._format_json_field(book_data.get(field, ""))
         
         query = """
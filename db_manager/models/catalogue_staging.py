@@ -0,0 +1,372 @@
+# database/models/catalogue_staging.py
+import app_logger as logger
+from .book import BookModel
+
+# books columns in BookModel.INSERT_QUERY order
+BOOK_COLUMNS = (
+    "id", "title", "author", "authorId", "description", "authorImageUrl",
+    "promoted", "pageCount", "formats", "publishedDate", "awards",
+    "originalTitle", "series", "setting", "characters", "isbn", "asin",
+    "language", "referralLinks", "impressionCount", "clickThroughCount",
+    "lastImpressionAt", "lastClickThroughAt", "internal_details", "images"
+)
+
+AUTHOR_COLUMNS = (
+    "id", "userId", "author_name", "author_image_url",
+    "birth_date", "death_date", "website", "bio"
+)
+
+class CatalogueStagingModel:
+    """
+    Bulk ingestion of a parsed catalogue through TEMP staging tables
+
+    Rows are buffered and loaded into per-connection TEMP tables with
+    executemany, then merge() reconciles them against the real tables with
+    a fixed number of set-based statements. The staged id columns hold
+    remote IDs; merge() resolves each to a local ID with the same rules as
+    the per-row processors:
+
+    - an author matches an existing author with the same name
+    - a book matches the book with its remote ID, otherwise one with the
+      same title and author
+    - staged rows that match nothing but share a name (authors) or title
+      and author (books) with an earlier staged row become that row, and
+      the last staged version of a row wins
+
+    Every call must be made on one thread inside a single transaction():
+
+        with db_manager.transaction():
+            staging.begin()
+            staging.add_author(...)
+            staging.add_book(...)
+            counts = staging.merge()
+    """
+    # Buffered rows loaded per executemany
+    BATCH_SIZE = 500
+
+    def __init__(self, connection_manager, books):
+        self.connection_manager = connection_manager
+        self.books = books
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._authors = []
+        self._books = []
+        self._images = []
+        self._genres = []
+        self._next_book_seq = 0
+
+    def begin(self):
+        """Create empty staging tables on the calling thread's connection"""
+        if not self.connection_manager.in_transaction():
+            raise RuntimeError("Catalogue staging must run inside a transaction")
+
+        self._reset_buffers()
+        self._drop_tables()
+
+        execute = self.connection_manager.execute
+        execute(f'''
+        CREATE TEMP TABLE stage_authors (
+            seq INTEGER PRIMARY KEY,
+            {", ".join(AUTHOR_COLUMNS)},
+            content_hash TEXT,
+            local_id INTEGER
+        )
+        ''')
+        execute(f'''
+        CREATE TEMP TABLE stage_books (
+            seq INTEGER PRIMARY KEY,
+            {", ".join(BOOK_COLUMNS)},
+            content_hash TEXT,
+            replace_genres INTEGER NOT NULL,
+            local_id INTEGER
+        )
+        ''')
+        execute('''
+        CREATE TEMP TABLE stage_images (
+            book_seq INTEGER NOT NULL,
+            imageUrl TEXT NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            sizeKb INTEGER
+        )
+        ''')
+        execute('''
+        CREATE TEMP TABLE stage_book_genres (
+            book_seq INTEGER NOT NULL,
+            genre_id INTEGER NOT NULL,
+            rank INTEGER,
+            importance REAL,
+            creates_genre INTEGER NOT NULL,
+            name TEXT,
+            description TEXT,
+            type TEXT
+        )
+        ''')
+        execute("CREATE INDEX temp.idx_stage_authors_name ON stage_authors (author_name, seq)")
+        execute("CREATE INDEX temp.idx_stage_books_title ON stage_books (title, authorId, seq)")
+        execute("CREATE INDEX temp.idx_stage_books_local_id ON stage_books (local_id, seq)")
+
+    def _drop_tables(self):
+        for table in ("stage_authors", "stage_books", "stage_images", "stage_book_genres"):
+            self.connection_manager.execute(f"DROP TABLE IF EXISTS temp.{table}")
+
+    def add_author(self, author_row, content_hash=None):
+        """
+        Stage an author
+
+        :param author_row: authors table row dict with the remote ID as 'id'
+        :param content_hash: Hash of the API payload, stored with the merged row
+        """
+        self._authors.append(
+            tuple(author_row.get(column) for column in AUTHOR_COLUMNS) + (content_hash,)
+        )
+        if len(self._authors) >= self.BATCH_SIZE:
+            self.flush()
+
+    def add_book(self, book_row, content_hash=None, images=(), genres=None):
+        """
+        Stage a book with its images and genre associations
+
+        :param book_row: books table row dict with the remote ID as 'id'
+        :param content_hash: Hash of the API payload, stored with the merged row
+        :param images: images table row dicts (imageUrl, width, height, sizeKb)
+        :param genres: None to keep the book's genre associations, otherwise
+                       the dicts that replace them: genre_id, rank, importance,
+                       and name/description/type to create a missing genre
+        """
+        self._next_book_seq += 1
+        seq = self._next_book_seq
+
+        self._books.append(
+            (seq,) + self.books._params(book_row) + (content_hash, 1 if genres is not None else 0)
+        )
+        self._images.extend(
+            (seq, image['imageUrl'], image.get('width'), image.get('height'), image.get('sizeKb'))
+            for image in images
+        )
+        self._genres.extend(
+            (
+                seq, genre['genre_id'], genre.get('rank', 0), genre.get('importance', 0.0),
+                1 if genre.get('name') is not None else 0,
+                genre.get('name'), genre.get('description'), genre.get('type')
+            )
+            for genre in genres or ()
+        )
+        if len(self._books) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Load buffered rows into the staging tables"""
+        executemany = self.connection_manager.executemany
+        if self._authors:
+            executemany(
+                f"INSERT INTO stage_authors ({', '.join(AUTHOR_COLUMNS)}, content_hash) "
+                f"VALUES ({', '.join('?' for _ in AUTHOR_COLUMNS)}, ?)",
+                self._authors
+            )
+        if self._books:
+            executemany(
+                f"INSERT INTO stage_books (seq, {', '.join(BOOK_COLUMNS)}, content_hash, replace_genres) "
+                f"VALUES (?, {', '.join('?' for _ in BOOK_COLUMNS)}, ?, ?)",
+                self._books
+            )
+        if self._images:
+            executemany("INSERT INTO stage_images VALUES (?, ?, ?, ?, ?)", self._images)
+        if self._genres:
+            executemany("INSERT INTO stage_book_genres VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._genres)
+
+        self._authors, self._books, self._images, self._genres = [], [], [], []
+
+    def merge(self):
+        """
+        Reconcile the staged catalogue with the real tables and drop the staging tables
+
+        :return: dict of staged author, book, image and genre link counts
+        """
+        self.flush()
+        execute = self.connection_manager.execute
+
+        counts = {
+            table: execute(f"SELECT COUNT(*) FROM stage_{table}")[0][0]
+            for table in ("authors", "books", "images", "book_genres")
+        }
+
+        self._merge_authors(execute)
+        self._merge_books(execute)
+
+        # Images, matched on (bookId, imageUrl) as ImageModel.upsert_many does
+        execute('''
+        INSERT INTO images (bookId, imageUrl, width, height, sizeKb, createdAt, updatedAt)
+        SELECT b.local_id, i.imageUrl, i.width, i.height, i.sizeKb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM stage_images i
+        JOIN stage_books b ON b.seq = i.book_seq
+        WHERE b.local_id IS NOT NULL
+        ON CONFLICT (bookId, imageUrl) DO UPDATE SET
+            width = excluded.width,
+            height = excluded.height,
+            sizeKb = excluded.sizeKb,
+            updatedAt = CURRENT_TIMESTAMP
+        ''')
+
+        self._merge_book_genres(execute)
+
+        self._drop_tables()
+        logger.log_debug(
+            f"Merged staged catalogue: {counts['authors']} authors, {counts['books']} books, "
+            f"{counts['images']} images, {counts['book_genres']} genre links"
+        )
+        return counts
+
+    def _merge_authors(self, execute):
+        # Existing author with the same name, else the first staged author with it
+        execute('''
+        UPDATE stage_authors SET local_id = (
+            SELECT a.id FROM authors a
+            WHERE a.author_name = stage_authors.author_name
+            ORDER BY a.id LIMIT 1
+        )
+        ''')
+        execute('''
+        UPDATE stage_authors SET local_id = (
+            SELECT s.id FROM stage_authors s
+            WHERE s.author_name = stage_authors.author_name
+            ORDER BY s.seq LIMIT 1
+        )
+        WHERE local_id IS NULL
+        ''')
+
+        # Updates keep userId, and the downloaded image unless its URL changed
+        execute(f'''
+        INSERT INTO authors (id, {", ".join(AUTHOR_COLUMNS[1:])})
+        SELECT local_id, {", ".join(AUTHOR_COLUMNS[1:])}
+        FROM stage_authors
+        WHERE seq IN (SELECT MAX(seq) FROM stage_authors GROUP BY local_id)
+        ON CONFLICT (id) DO UPDATE SET
+            author_name = excluded.author_name,
+            author_image_url = excluded.author_image_url,
+            birth_date = excluded.birth_date,
+            death_date = excluded.death_date,
+            website = excluded.website,
+            bio = excluded.bio,
+            local_image_path = CASE
+                WHEN authors.author_image_url IS excluded.author_image_url THEN authors.local_image_path
+            END
+        ''')
+
+        self._record_mappings(execute, "author", "stage_authors")
+
+    def _merge_books(self, execute):
+        # Existing book with the remote ID, else one with the same title and author
+        execute('''
+        UPDATE stage_books SET local_id = COALESCE(
+            (SELECT b.id FROM books b WHERE b.id = stage_books.id),
+            (SELECT b.id FROM books b
+             WHERE b.title = stage_books.title AND b.authorId = stage_books.authorId
+             ORDER BY b.id LIMIT 1)
+        )
+        ''')
+        # Else the first staged book with the same title and author
+        execute('''
+        UPDATE stage_books SET local_id = (
+            SELECT s.id FROM stage_books s
+            WHERE s.title = stage_books.title AND s.authorId = stage_books.authorId
+            ORDER BY s.seq LIMIT 1
+        )
+        WHERE local_id IS NULL
+        ''')
+
+        # Books still unresolved have no remote ID: insert them to get local IDs
+        columns = ", ".join(BOOK_COLUMNS[1:])
+        execute(f'''
+        INSERT INTO books ({columns})
+        SELECT {columns} FROM stage_books
+        WHERE seq IN (
+            SELECT MIN(seq) FROM stage_books WHERE local_id IS NULL GROUP BY title, authorId
+        )
+        ''')
+        execute('''
+        UPDATE stage_books SET local_id = (
+            SELECT b.id FROM books b
+            WHERE b.title = stage_books.title AND b.authorId = stage_books.authorId
+            ORDER BY b.id DESC LIMIT 1
+        )
+        WHERE local_id IS NULL
+        ''')
+
+        execute(f'''
+        INSERT INTO books (id, {columns})
+        SELECT local_id, {columns} FROM stage_books
+        WHERE seq IN (SELECT MAX(seq) FROM stage_books WHERE local_id IS NOT NULL GROUP BY local_id)
+        {BookModel.UPSERT_CLAUSE}
+        ''')
+
+        self._record_mappings(execute, "book", "stage_books")
+
+    def _record_mappings(self, execute, entity_type, table):
+        """Store the ID mappings and content hashes of a merged staging table"""
+        execute(f'''
+        INSERT INTO id_map (entity_type, remote_id, local_id)
+        SELECT '{entity_type}', id, local_id FROM {table}
+        WHERE id IS NOT NULL AND local_id IS NOT NULL
+        ORDER BY seq
+        ON CONFLICT (entity_type, remote_id) DO UPDATE SET local_id = excluded.local_id
+        ''')
+        execute(f'''
+        INSERT INTO content_hashes (entity_type, local_id, content_hash)
+        SELECT '{entity_type}', local_id, content_hash FROM {table}
+        WHERE seq IN (SELECT MAX(seq) FROM {table} WHERE local_id IS NOT NULL GROUP BY local_id)
+        AND content_hash IS NOT NULL
+        ON CONFLICT (entity_type, local_id) DO UPDATE SET content_hash = excluded.content_hash
+        ''')
+
+    def _merge_book_genres(self, execute):
+        # The last staged version of each book decides its associations
+        execute('''
+        CREATE TEMP TABLE stage_latest_books AS
+        SELECT seq, local_id FROM stage_books
+        WHERE replace_genres
+        AND seq IN (SELECT MAX(seq) FROM stage_books WHERE local_id IS NOT NULL GROUP BY local_id)
+        ''')
+
+        # First staged entry wins when a book lists a genre twice
+        execute('''
+        CREATE TEMP TABLE stage_latest_links AS
+        SELECT b.local_id AS book_id, g.genre_id, g.rank, g.importance
+        FROM stage_book_genres g
+        JOIN stage_latest_books b ON b.seq = g.book_seq
+        WHERE g.rowid IN (SELECT MIN(rowid) FROM stage_book_genres GROUP BY book_seq, genre_id)
+        ''')
+
+        # Write only the difference, as GenreModel.reconcile_book_genres does
+        execute('''
+        DELETE FROM book_genres
+        WHERE book_id IN (SELECT local_id FROM stage_latest_books)
+        AND NOT EXISTS (
+            SELECT 1 FROM stage_latest_links l
+            WHERE l.book_id = book_genres.book_id AND l.genre_id = book_genres.genre_id
+        )
+        ''')
+
+        # Taxonomies the genre catalogue doesn't know yet
+        execute('''
+        INSERT OR IGNORE INTO genres (id, name, description, type, parentId)
+        SELECT genre_id, COALESCE(name, ''), COALESCE(description, ''), COALESCE(type, 'genre'), NULL
+        FROM stage_book_genres
+        WHERE creates_genre AND genre_id NOT IN (SELECT id FROM genres)
+        GROUP BY genre_id
+        ''')
+
+        execute('''
+        INSERT INTO book_genres (book_id, genre_id, rank, importance)
+        SELECT book_id, genre_id, rank, importance FROM stage_latest_links
+        WHERE true
+        ON CONFLICT (book_id, genre_id) DO UPDATE SET
+            rank = excluded.rank,
+            importance = excluded.importance
+        WHERE book_genres.rank IS NOT excluded.rank
+        OR book_genres.importance IS NOT excluded.importance
+        ''')
+
+        execute("DROP TABLE temp.stage_latest_links")
+        execute("DROP TABLE temp.stage_latest_books")
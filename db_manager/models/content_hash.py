@@ -0,0 +1,68 @@
+# database/models/content_hash.py
+import threading
+import app_logger as logger
+from exceptions import InvalidDataError
+
+class ContentHashModel:
+    """
+    Hash of the API payload each synced author or book was last written from
+
+    The sync compares an incoming payload's hash with the stored one and
+    skips the write when they match. Hashes are dropped when their row is
+    deleted or changed locally (see migration 9), so such rows are always
+    rewritten from the server.
+
+    Lookups go through an in-memory cache; warm_cache() loads every hash in
+    one query at the start of a sync.
+    """
+    def __init__(self, connection_manager):
+        self.connection_manager = connection_manager
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+
+    def warm_cache(self):
+        """Replace the cache with every stored hash"""
+        rows = self.connection_manager.execute(
+            "SELECT entity_type, local_id, content_hash FROM content_hashes"
+        )
+
+        with self._cache_lock:
+            self._cache = {(entity_type, local_id): content_hash for entity_type, local_id, content_hash in rows}
+
+        logger.log_debug(f"Warmed content hash cache with {len(rows)} hashes")
+        return len(rows)
+
+    def clear_cache(self):
+        """Drop all cached hashes (e.g. after a rolled-back batch)"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def get(self, entity_type, local_id):
+        """Get the stored hash of an entity, or None"""
+        with self._cache_lock:
+            content_hash = self._cache.get((entity_type, local_id))
+        if content_hash is not None:
+            return content_hash
+
+        rows = self.connection_manager.execute(
+            "SELECT content_hash FROM content_hashes WHERE entity_type = ? AND local_id = ?",
+            (entity_type, local_id)
+        )
+        return rows[0][0] if rows else None
+
+    def set(self, entity_type, local_id, content_hash):
+        """Store the hash an entity was just written from"""
+        if not entity_type or local_id is None or not content_hash:
+            raise InvalidDataError("Entity type, local ID and hash are required for a content hash")
+
+        self.connection_manager.execute(
+            """
+            INSERT INTO content_hashes (entity_type, local_id, content_hash)
+            VALUES (?, ?, ?)
+            ON CONFLICT (entity_type, local_id) DO UPDATE SET content_hash = excluded.content_hash
+            """,
+            (entity_type, local_id, content_hash)
+        )
+
+        with self._cache_lock:
+            self._cache[(entity_type, local_id)] = content_hash
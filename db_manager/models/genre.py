@@ -4,6 +4,28 @@ import app_logger as logger
 from exceptions import InvalidDataError, EntityNotFoundError
 
 class GenreModel:
+    INSERT_QUERY = """
+        INSERT INTO genres (
+            id, name, description, type, parentId, 
+            createdAt, updatedAt, deletedAt
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+    
+    UPSERT_QUERY = INSERT_QUERY + """
+        ON CONFLICT (id) DO UPDATE SET
+            name = excluded.name,
+            description = excluded.description,
+            type = excluded.type,
+            parentId = excluded.parentId,
+            createdAt = excluded.createdAt,
+            updatedAt = excluded.updatedAt,
+            deletedAt = excluded.deletedAt
+        """
+    
+    # Max bound parameters per IN (...) query, below SQLite's default limit
+    BATCH_SIZE = 500
+    
     def __init__(self, connection_manager):
         self.connection_manager = connection_manager
     
@@ -21,7 +43,11 @@ class GenreModel:
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """
         
-        params = (
+        return self.connection_manager.execute(query, self._params(genre_data))
+    
+    def _params(self, genre_data):
+        """Build the INSERT parameter tuple for a genre dict"""
+        return (
             genre_data.get('id'),
             genre_data.get('name'),  # Map 'name' from input to 'genre' in DB
             genre_data.get('description'),
@@ -31,8 +57,79 @@ class GenreModel:
             genre_data.get('updatedAt'),
             genre_data.get('deletedAt')
         )
+    
+    def add_many(self, genres):
+        """
+        Insert many genres in one transaction
+        
+        :param genres: Iterable of genre dicts
+        :return: List of local genre IDs, in input order
+        """
+        return self._write_many(genres, self.INSERT_QUERY)
+    
+    def upsert_many(self, genres):
+        """
+        Insert or update many genres (matched on id) in one transaction
+        
+        :param genres: Iterable of genre dicts
+        :return: List of local genre IDs, in input order
+        """
+        return self._write_many(genres, self.UPSERT_QUERY)
+    
+    def _write_many(self, genres, query):
+        """Validate and write genre rows with one executemany per ID kind"""
+        genres = list(genres)
+        for genre_data in genres:
+            if not genre_data or not genre_data.get('name'):
+                raise InvalidDataError("Genre must have a name")
+        
+        with_id = [g for g in genres if g.get('id') is not None]
+        without_id = [g for g in genres if g.get('id') is None]
+        
+        with self.connection_manager.transaction():
+            self.connection_manager.executemany(query, [self._params(g) for g in with_id])
+            new_ids = iter(self.connection_manager.executemany_with_ids(
+                query, [self._params(g) for g in without_id]
+            ))
+        
+        return [g['id'] if g.get('id') is not None else next(new_ids) for g in genres]
+    
+    def upsert_changed(self, genres):
+        """
+        Insert or update only the genres that differ from the stored rows
+        
+        Stored rows are loaded with one query per batch of IDs and compared
+        column by column, so an unchanged genre is not written. Genres
+        without an ID are always inserted.
+        
+        :param genres: Iterable of genre dicts
+        :return: dict of inserted, updated and unchanged counts
+        """
+        genres = list(genres)
+        for genre_data in genres:
+            if not genre_data or not genre_data.get('name'):
+                raise InvalidDataError("Genre must have a name")
+        
+        genre_ids = list({g['id'] for g in genres if g.get('id') is not None})
+        stored = {}
+        for start in range(0, len(genre_ids), self.BATCH_SIZE):
+            batch = genre_ids[start:start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self.connection_manager.execute(
+                f"SELECT id, name, description, type, parentId, createdAt, updatedAt, deletedAt "
+                f"FROM genres WHERE id IN ({placeholders})",
+                batch
+            )
+            for row in rows:
+                stored[row[0]] = tuple(row)
         
-        return self.connection_manager.execute(query, params)
+        changed = [g for g in genres if g.get('id') is None or stored.get(g['id']) != self._params(g)]
+        inserted = sum(1 for g in changed if g.get('id') not in stored)
+        
+        if changed:
+            self._write_many(changed, self.UPSERT_QUERY)
+        
+        return {'inserted': inserted, 'updated': len(changed) - inserted, 'unchanged': len(genres) - len(changed)}
     
     def add_book_genre(self, book_id, genre_id, relation_id=None):
         """Associate a genre with a book"""
@@ -43,6 +140,78 @@ class GenreModel:
             query = "INSERT OR IGNORE INTO book_genres (book_id, genre_id) VALUES (?, ?)"
             return self.connection_manager.execute(query, (book_id, genre_id))
     
+    def get_ids(self):
+        """Get the IDs of every genre as a set"""
+        return {row[0] for row in self.connection_manager.execute("SELECT id FROM genres")}
+    
+    def reconcile_book_genres(self, book_id, links):
+        """
+        Make a book's genre associations match links, writing only the difference
+        
+        :param links: Iterable of (genre_id, rank, importance); the first
+                      entry wins if a genre is listed twice
+        :return: dict of inserted, updated and deleted counts
+        """
+        return self.reconcile_book_genres_many({book_id: links})
+    
+    def reconcile_book_genres_many(self, links_by_book):
+        """
+        Reconcile the genre associations of many books in one transaction
+        
+        Existing associations are loaded with one query per batch of books;
+        associations no longer listed are deleted, new ones inserted and
+        ones whose rank or importance changed updated. Unchanged rows are
+        not written at all.
+        
+        :param links_by_book: dict of book_id -> iterable of (genre_id, rank, importance)
+        :return: dict of inserted, updated and deleted counts
+        """
+        wanted = {}
+        for book_id, links in links_by_book.items():
+            book_links = wanted.setdefault(book_id, {})
+            for genre_id, rank, importance in links:
+                book_links.setdefault(genre_id, (rank, importance))
+        
+        book_ids = list(wanted)
+        existing = {book_id: {} for book_id in book_ids}
+        for start in range(0, len(book_ids), self.BATCH_SIZE):
+            batch = book_ids[start:start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self.connection_manager.execute(
+                f"SELECT book_id, genre_id, rank, importance FROM book_genres WHERE book_id IN ({placeholders})",
+                batch
+            )
+            for book_id, genre_id, rank, importance in rows:
+                existing[book_id][genre_id] = (rank, importance)
+        
+        inserts, updates, deletes = [], [], []
+        for book_id, book_links in wanted.items():
+            current = existing[book_id]
+            for genre_id, (rank, importance) in book_links.items():
+                if genre_id not in current:
+                    inserts.append((book_id, genre_id, rank, importance))
+                elif current[genre_id] != (rank, importance):
+                    updates.append((rank, importance, book_id, genre_id))
+            deletes.extend((book_id, genre_id) for genre_id in current if genre_id not in book_links)
+        
+        with self.connection_manager.transaction():
+            if deletes:
+                self.connection_manager.executemany(
+                    "DELETE FROM book_genres WHERE book_id = ? AND genre_id = ?", deletes
+                )
+            if updates:
+                self.connection_manager.executemany(
+                    "UPDATE book_genres SET rank = ?, importance = ? WHERE book_id = ? AND genre_id = ?",
+                    updates
+                )
+            if inserts:
+                self.connection_manager.executemany(
+                    "INSERT INTO book_genres (book_id, genre_id, rank, importance) VALUES (?, ?, ?, ?)",
+                    inserts
+                )
+        
+        return {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(deletes)}
+    
     def get_all(self):
         """Get all genres from the database"""
         return self.connection_manager.execute("SELECT * FROM genres ORDER BY id")
@@ -0,0 +1,70 @@
+# database/models/http_cache.py
+from exceptions import InvalidDataError
+
+class HttpCacheModel:
+    """
+    Manifest of downloaded URLs with their HTTP validators (ETag,
+    Last-Modified), size and content hash, used to make re-downloads
+    conditional
+    """
+    FIELDS = ('url', 'etag', 'last_modified', 'size', 'content_hash', 'local_path')
+
+    # Max bound parameters per IN (...) query, below SQLite's default limit
+    BATCH_SIZE = 500
+
+    def __init__(self, connection_manager):
+        self.connection_manager = connection_manager
+
+    def get(self, url):
+        """Get the manifest entry for a URL as a dict, or None"""
+        return self.get_many([url]).get(url)
+
+    def get_many(self, urls):
+        """
+        Get manifest entries for many URLs
+
+        :return: dict of url -> entry dict for the URLs that are cached
+        """
+        urls = list(urls)
+        entries = {}
+
+        for start in range(0, len(urls), self.BATCH_SIZE):
+            batch = urls[start:start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self.connection_manager.execute(
+                f"SELECT {', '.join(self.FIELDS)} FROM http_cache WHERE url IN ({placeholders})",
+                batch
+            )
+            for row in rows:
+                entries[row[0]] = dict(zip(self.FIELDS, row))
+
+        return entries
+
+    def upsert_many(self, entries):
+        """
+        Insert or replace many manifest entries in one statement
+
+        :param entries: Iterable of entry dicts keyed by FIELDS
+        :return: Number of rows written
+        """
+        rows = []
+        for entry in entries:
+            if not entry or not entry.get('url'):
+                raise InvalidDataError("HTTP cache entry must have a URL")
+            rows.append(tuple(entry.get(field) for field in self.FIELDS))
+
+        if not rows:
+            return 0
+
+        query = """
+        INSERT INTO http_cache (url, etag, last_modified, size, content_hash, local_path, checked_at)
+        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (url) DO UPDATE SET
+            etag = excluded.etag,
+            last_modified = excluded.last_modified,
+            size = excluded.size,
+            content_hash = excluded.content_hash,
+            local_path = excluded.local_path,
+            checked_at = CURRENT_TIMESTAMP
+        """
+        return self.connection_manager.executemany(query, rows)
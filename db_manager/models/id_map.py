@@ -0,0 +1,121 @@
+# database/models/id_map.py
+import threading
+import app_logger as logger
+from exceptions import InvalidDataError
+
+class IdMapModel:
+    """
+    Maps remote API IDs to local database IDs per entity type ('author', 'book', ...)
+
+    Lookups go through an in-memory cache. warm_cache() loads every mapping in
+    one query at the start of a sync; misses fall back to the database.
+    """
+    # Max bound parameters per IN (...) query, below SQLite's default limit
+    BATCH_SIZE = 500
+
+    def __init__(self, connection_manager):
+        self.connection_manager = connection_manager
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+
+    def warm_cache(self, entity_type=None):
+        """Load all mappings (optionally for one entity type) into the cache"""
+        if entity_type:
+            rows = self.connection_manager.execute(
+                "SELECT entity_type, remote_id, local_id FROM id_map WHERE entity_type = ?",
+                (entity_type,)
+            )
+        else:
+            rows = self.connection_manager.execute(
+                "SELECT entity_type, remote_id, local_id FROM id_map"
+            )
+
+        with self._cache_lock:
+            for row_type, remote_id, local_id in rows:
+                self._cache[(row_type, remote_id)] = local_id
+
+        logger.log_debug(f"Warmed ID map cache with {len(rows)} mappings")
+        return len(rows)
+
+    def clear_cache(self):
+        """Drop all cached mappings (e.g. after a rolled-back batch)"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def get(self, entity_type, remote_id):
+        """Get the local ID for a remote ID, or None if unmapped"""
+        if remote_id is None:
+            return None
+        return self.resolve_many(entity_type, [remote_id]).get(remote_id)
+
+    def resolve_many(self, entity_type, remote_ids):
+        """
+        Resolve many remote IDs at once
+
+        :return: dict of remote_id -> local_id for the IDs that are mapped
+        """
+        result = {}
+        missing = []
+
+        with self._cache_lock:
+            for remote_id in remote_ids:
+                if remote_id is None:
+                    continue
+                local_id = self._cache.get((entity_type, remote_id))
+                if local_id is None:
+                    missing.append(remote_id)
+                else:
+                    result[remote_id] = local_id
+
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            batch = missing[start:start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self.connection_manager.execute(
+                f"SELECT remote_id, local_id FROM id_map "
+                f"WHERE entity_type = ? AND remote_id IN ({placeholders})",
+                (entity_type, *batch)
+            )
+            with self._cache_lock:
+                for remote_id, local_id in rows:
+                    self._cache[(entity_type, remote_id)] = local_id
+                    result[remote_id] = local_id
+
+        return result
+
+    def set(self, entity_type, remote_id, local_id):
+        """Store a single remote-to-local mapping"""
+        if remote_id is None or local_id is None:
+            raise InvalidDataError("Both remote and local IDs are required for an ID mapping")
+        return self.set_many(entity_type, {remote_id: local_id})
+
+    def set_many(self, entity_type, mapping):
+        """
+        Store many mappings in one statement
+
+        :param mapping: dict of remote_id -> local_id
+        """
+        if not entity_type:
+            raise InvalidDataError("Entity type cannot be empty")
+
+        rows = [
+            (entity_type, remote_id, local_id)
+            for remote_id, local_id in mapping.items()
+            if remote_id is not None and local_id is not None
+        ]
+        if not rows:
+            return 0
+
+        self.connection_manager.executemany(
+            """
+            INSERT INTO id_map (entity_type, remote_id, local_id)
+            VALUES (?, ?, ?)
+            ON CONFLICT (entity_type, remote_id) DO UPDATE SET local_id = excluded.local_id
+            """,
+            rows
+        )
+
+        with self._cache_lock:
+            for row_type, remote_id, local_id in rows:
+                self._cache[(row_type, remote_id)] = local_id
+
+        return len(rows)
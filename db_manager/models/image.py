@@ -3,6 +3,27 @@ import app_logger as logger
 from exceptions import InvalidDataError, EntityNotFoundError
 
 class ImageModel:
+    INSERT_QUERY = """
+        INSERT INTO images (
+            bookId, imageUrl, width, height, 
+            sizeKb, local_file_path, createdAt, updatedAt
+        )
+        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        """
+    
+    # local_file_path is only overwritten when the incoming row provides one
+    UPSERT_QUERY = INSERT_QUERY + """
+        ON CONFLICT (bookId, imageUrl) DO UPDATE SET
+            width = excluded.width,
+            height = excluded.height,
+            sizeKb = excluded.sizeKb,
+            local_file_path = COALESCE(excluded.local_file_path, images.local_file_path),
+            updatedAt = CURRENT_TIMESTAMP
+        """
+    
+    # Max bound parameters per IN (...) query, below SQLite's default limit
+    BATCH_SIZE = 500
+    
     def __init__(self, connection_manager):
         self.connection_manager = connection_manager
     
@@ -11,15 +32,11 @@ class ImageModel:
         if not image_data:
             raise InvalidDataError("Image data cannot be None or empty")
         
-        query = """
-        INSERT INTO images (
-            bookId, imageUrl, width, height, 
-            sizeKb, local_file_path, createdAt, updatedAt
-        )
-        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-        """
-        
-        params = (
+        return self.connection_manager.execute(self.INSERT_QUERY, self._params(image_data))
+    
+    def _params(self, image_data):
+        """Build the INSERT parameter tuple for an image dict"""
+        return (
             image_data.get('bookId'),
             image_data.get('imageUrl'),
             image_data.get('width', 0),
@@ -27,8 +44,57 @@ class ImageModel:
             image_data.get('sizeKb', 0),
             image_data.get('local_file_path')
         )
+    
+    def add_many(self, images):
+        """
+        Insert many images in one transaction
+        
+        :param images: Iterable of image dicts
+        :return: List of local image IDs, in input order
+        """
+        images = list(images)
+        for image_data in images:
+            if not image_data:
+                raise InvalidDataError("Image data cannot be None or empty")
+        
+        return self.connection_manager.executemany_with_ids(
+            self.INSERT_QUERY, [self._params(i) for i in images]
+        )
+    
+    def upsert_many(self, images):
+        """
+        Insert or update many images, matched on (bookId, imageUrl), in one transaction
+        
+        :param images: Iterable of image dicts
+        :return: List of local image IDs, in input order
+        """
+        images = list(images)
+        for image_data in images:
+            if not image_data or not image_data.get('bookId') or not image_data.get('imageUrl'):
+                raise InvalidDataError("Image upsert requires a bookId and imageUrl")
+        
+        if not images:
+            return []
         
-        return self.connection_manager.execute(query, params)
+        with self.connection_manager.transaction():
+            self.connection_manager.executemany(
+                self.UPSERT_QUERY, [self._params(i) for i in images]
+            )
+            
+            # Read back the IDs of every touched row, one query per batch of books
+            book_ids = list({i['bookId'] for i in images})
+            id_by_key = {}
+            for start in range(0, len(book_ids), self.BATCH_SIZE):
+                batch = book_ids[start:start + self.BATCH_SIZE]
+                placeholders = ", ".join("?" for _ in batch)
+                rows = self.connection_manager.execute(
+                    f"SELECT id, bookId, imageUrl FROM images WHERE bookId IN ({placeholders})",
+                    batch
+                )
+                for image_id, book_id, image_url in rows:
+                    id_by_key[(book_id, image_url)] = image_id
+        
+        return [id_by_key.get((i['bookId'], i['imageUrl'])) for i in images]
     
     def get_by_book(self, book_id):
         """Get all images for a specific book"""
@@ -69,6 +135,32 @@ class ImageModel:
             logger.log_error(f"Error updating image {image_id}: {str(e)}")
             return False
     
+    def update_file_info_many(self, file_info):
+        """
+        Record the local file, dimensions and size of many downloaded images in one write
+        
+        :param file_info: Iterable of dicts with id, local_file_path, width, height, sizeKb
+        :return: Number of rows updated
+        """
+        rows = [
+            (info.get('local_file_path'), info.get('width'), info.get('height'),
+             info.get('sizeKb'), info['id'])
+            for info in file_info
+        ]
+        if not rows:
+            return 0
+        
+        query = """
+        UPDATE images SET
+            local_file_path = ?,
+            width = COALESCE(?, width),
+            height = COALESCE(?, height),
+            sizeKb = COALESCE(?, sizeKb),
+            updatedAt = CURRENT_TIMESTAMP
+        WHERE id = ?
+        """
+        return self.connection_manager.executemany(query, rows)
+    
     def delete(self, image_id):
         """Delete an image by its ID"""
         try:
@@ -0,0 +1,105 @@
+# database/models/image_blob.py
+from exceptions import InvalidDataError
+
+class ImageBlobModel:
+    """
+    Index of the content-addressed image store
+
+    image_blobs holds one row per distinct file (keyed by content hash);
+    image_blob_refs maps images.id, authors.id and books.id to blobs.
+    ref_count is maintained by triggers on image_blob_refs.
+    """
+    def __init__(self, connection_manager):
+        self.connection_manager = connection_manager
+
+    def register_many(self, blobs):
+        """
+        Record stored blobs; ones already indexed only get a new registered_at
+
+        :param blobs: Iterable of (hash, path, size) tuples
+        :return: Number of rows written
+        """
+        rows = [blob for blob in blobs if blob and blob[0]]
+        if not rows:
+            return 0
+        return self.connection_manager.executemany(
+            """
+            INSERT INTO image_blobs (hash, path, size, registered_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (hash) DO UPDATE SET registered_at = CURRENT_TIMESTAMP
+            """,
+            rows
+        )
+
+    def set_refs(self, owner_type, refs, role=''):
+        """
+        Point owners at blobs, replacing any previous blob for the same owner and role
+
+        :param owner_type: 'image' or 'author'
+        :param refs: dict of owner_id -> blob hash
+        :return: Number of rows written
+        """
+        if not owner_type:
+            raise InvalidDataError("Blob reference owner type cannot be empty")
+
+        rows = [
+            (owner_type, owner_id, role, blob_hash)
+            for owner_id, blob_hash in refs.items()
+            if owner_id is not None and blob_hash
+        ]
+        if not rows:
+            return 0
+
+        return self.connection_manager.executemany(
+            """
+            INSERT INTO image_blob_refs (owner_type, owner_id, role, blob_hash)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (owner_type, owner_id, role) DO UPDATE SET blob_hash = excluded.blob_hash
+            """,
+            rows
+        )
+
+    # Unreferenced and registered before the grace period began
+    COLLECTABLE = "ref_count <= 0 AND (registered_at IS NULL OR registered_at < datetime('now', ?))"
+
+    def get_unreferenced(self, grace_minutes=0):
+        """Get (hash, path, size) of every blob no owner points at, except ones registered in the last grace_minutes"""
+        return self.connection_manager.execute(
+            f"SELECT hash, path, size FROM image_blobs WHERE {self.COLLECTABLE}",
+            (f"-{grace_minutes} minutes",)
+        )
+
+    def delete_many(self, hashes, grace_minutes=0):
+        """Remove blob index rows by hash, if they are still unreferenced and outside the grace period"""
+        rows = [(blob_hash, f"-{grace_minutes} minutes") for blob_hash in hashes]
+        if not rows:
+            return 0
+        return self.connection_manager.executemany(
+            f"DELETE FROM image_blobs WHERE hash = ? AND {self.COLLECTABLE}",
+            rows
+        )
+
+    def get_stats(self):
+        """
+        Summarize the store
+
+        :return: dict with blob and reference counts, bytes on disk and the
+                 bytes the references would take without deduplication
+        """
+        blobs, stored_bytes = self.connection_manager.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM image_blobs"
+        )[0]
+        references, referenced_bytes = self.connection_manager.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(b.size), 0)
+            FROM image_blob_refs r
+            JOIN image_blobs b ON r.blob_hash = b.hash
+            """
+        )[0]
+        return {
+            'blobs': blobs,
+            'stored_bytes': stored_bytes,
+            'references': references,
+            'referenced_bytes': referenced_bytes,
+            'saved_bytes': max(referenced_bytes - stored_bytes, 0)
+        }
@@ -0,0 +1,102 @@
+# database/models/pending_push.py
+import app_logger as logger
+
+class PendingPushModel:
+    """
+    Authors and books changed locally since they were last pushed
+
+    Rows are recorded by triggers on authors, books and book_genres (see
+    migrations 7 and 12), numbered from the change_tracking counter. Writes
+    made inside change_tracking_paused(), such as applying data pulled
+    from the server, are not recorded.
+    """
+    # Max bound parameters per IN (...) query, below SQLite's default limit
+    BATCH_SIZE = 500
+
+    def __init__(self, connection_manager):
+        self.connection_manager = connection_manager
+
+    def count(self, entity_type=None):
+        """Number of entities waiting to be pushed"""
+        if entity_type:
+            return self.connection_manager.execute(
+                "SELECT COUNT(*) FROM pending_push WHERE entity_type = ?",
+                (entity_type,)
+            )[0][0]
+        return self.connection_manager.execute("SELECT COUNT(*) FROM pending_push")[0][0]
+
+    def get_authors(self):
+        """
+        Get changed authors
+
+        :return: List of author rows (authors table column order) with the
+                 change sequence appended as the last column
+        """
+        return self.connection_manager.execute(
+            """
+            SELECT a.*, p.change_seq
+            FROM pending_push p
+            JOIN authors a ON a.id = p.entity_id
+            WHERE p.entity_type = 'author'
+            ORDER BY a.id
+            """
+        )
+
+    def get_books(self):
+        """
+        Get changed books
+
+        :return: List of book rows (books table column order) with the
+                 change sequence appended as the last column
+        """
+        return self.connection_manager.execute(
+            """
+            SELECT b.*, p.change_seq
+            FROM pending_push p
+            JOIN books b ON b.id = p.entity_id
+            WHERE p.entity_type = 'book'
+            ORDER BY b.id
+            """
+        )
+
+    def get_book_taxonomies(self):
+        """
+        Get the genre taxonomies of every changed book in one query
+
+        :return: dict of book_id -> list of (taxonomyId, rank, importance,
+                 name, type, description) tuples ordered by rank
+        """
+        rows = self.connection_manager.execute(
+            """
+            SELECT bg.book_id, g.id, bg.rank, bg.importance, g.name, g.type, g.description
+            FROM pending_push p
+            JOIN book_genres bg ON bg.book_id = p.entity_id
+            JOIN genres g ON bg.genre_id = g.id
+            WHERE p.entity_type = 'book'
+            ORDER BY bg.book_id, bg.rank
+            """
+        )
+
+        taxonomies = {}
+        for book_id, *taxonomy in rows:
+            taxonomies.setdefault(book_id, []).append(tuple(taxonomy))
+        return taxonomies
+
+    def mark_pushed(self, entity_type, pushed):
+        """
+        Clear pushed entities, keeping any that changed again since they were read
+
+        :param pushed: dict of entity_id -> change_seq read with the entity
+        :return: Number of entities cleared
+        """
+        rows = [(entity_type, entity_id, change_seq) for entity_id, change_seq in pushed.items()]
+        if not rows:
+            return 0
+
+        cleared = self.connection_manager.executemany(
+            "DELETE FROM pending_push WHERE entity_type = ? AND entity_id = ? AND change_seq = ?",
+            rows
+        )
+        if cleared < len(rows):
+            logger.log_debug(f"{len(rows) - cleared} {entity_type}s changed during push and stay pending")
+        return cleared
@@ -11,7 +11,7 @@ class PublisherModel:
         if not publisher_data:
             raise InvalidDataError("Publisher data cannot be None or empty")
         
-        logger.log_debug(f"Adding publisher: {publisher_data}")
+        logger.log_debug("Adding publisher: %s", publisher_data)
         
         query = """
         INSERT INTO publishers (
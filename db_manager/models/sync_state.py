@@ -0,0 +1,102 @@
+# database/models/sync_state.py
+import app_logger as logger
+from exceptions import InvalidDataError
+
+class SyncStateModel:
+    """
+    Incremental sync progress per catalogue endpoint
+
+    - watermark: server time the last completed sync was current to; the
+      next sync asks only for entities updated since then
+    - run_started: server time of the first catalogue response of the sync
+      in progress, which becomes the watermark once it completes
+    - checkpoint: remote ID of the last author committed by the sync in
+      progress, so an interrupted sync resumes after it
+
+    Times come from the server (see DataSynchronizer.server_watermark()),
+    never the local clock, and are sent back as the updatedSince parameter.
+    """
+    FIELDS = ('endpoint', 'watermark', 'run_started', 'checkpoint')
+
+    def __init__(self, connection_manager):
+        self.connection_manager = connection_manager
+
+    def get(self, endpoint):
+        """Get the sync state of an endpoint as a dict, or None if never synced"""
+        rows = self.connection_manager.execute(
+            f"SELECT {', '.join(self.FIELDS)} FROM sync_state WHERE endpoint = ?",
+            (endpoint,)
+        )
+        return dict(zip(self.FIELDS, rows[0])) if rows else None
+
+    def begin(self, endpoint):
+        """
+        Start a sync of an endpoint, or pick up an interrupted one
+
+        An interrupted sync keeps its original start time and checkpoint,
+        so anything changed while it was stopped is fetched next time.
+
+        :return: The endpoint's sync state dict
+        """
+        if not endpoint:
+            raise InvalidDataError("Sync state must have an endpoint")
+
+        self.connection_manager.execute(
+            """
+            INSERT INTO sync_state (endpoint, checkpoint, updated_at)
+            VALUES (?, NULL, CURRENT_TIMESTAMP)
+            ON CONFLICT (endpoint) DO UPDATE SET updated_at = CURRENT_TIMESTAMP
+            """,
+            (endpoint,)
+        )
+
+        state = self.get(endpoint)
+        if state['checkpoint'] is not None:
+            logger.log_debug(f"Resuming sync of {endpoint} after author {state['checkpoint']}")
+        return state
+
+    def set_run_started(self, endpoint, started_at):
+        """Record the server time the sync in progress started at, unless an interrupted run already did"""
+        self.connection_manager.execute(
+            """
+            UPDATE sync_state
+            SET run_started = COALESCE(run_started, ?), updated_at = CURRENT_TIMESTAMP
+            WHERE endpoint = ?
+            """,
+            (started_at, endpoint)
+        )
+
+    def set_checkpoint(self, endpoint, remote_id):
+        """Record the last author committed by the sync in progress"""
+        self.connection_manager.execute(
+            "UPDATE sync_state SET checkpoint = ?, updated_at = CURRENT_TIMESTAMP WHERE endpoint = ?",
+            (remote_id, endpoint)
+        )
+
+    def restart(self, endpoint):
+        """Forget the checkpoint of the sync in progress (it restarts from the first author)"""
+        self.connection_manager.execute(
+            "UPDATE sync_state SET checkpoint = NULL, updated_at = CURRENT_TIMESTAMP WHERE endpoint = ?",
+            (endpoint,)
+        )
+
+    def complete(self, endpoint):
+        """Move the watermark to the start of the finished sync and clear its checkpoint"""
+        self.connection_manager.execute(
+            """
+            UPDATE sync_state
+            SET watermark = COALESCE(run_started, watermark),
+                run_started = NULL,
+                checkpoint = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE endpoint = ?
+            """,
+            (endpoint,)
+        )
+
+    def reset(self, endpoint=None):
+        """Forget sync progress (for one endpoint, or all) so the next sync is a full one"""
+        if endpoint:
+            self.connection_manager.execute("DELETE FROM sync_state WHERE endpoint = ?", (endpoint,))
+        else:
+            self.connection_manager.execute("DELETE FROM sync_state")
@@ -0,0 +1,162 @@
+# database/profiler.py
+import re
+import time
+import sqlite3
+import threading
+import collections
+import app_logger as logger
+from config import DB_SLOW_QUERY_MS, DB_PROFILE_SAMPLES, DB_SLOW_LOG_SIZE
+
+# Statements worth an EXPLAIN QUERY PLAN
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_PLACEHOLDER_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(query):
+    """
+    Reduce a query to its shape, so calls that differ only in literals or
+    in the length of an IN (?, ?, ...) list are counted together
+    """
+    shape = _STRING_LITERAL.sub("?", query)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(...)", shape)
+    shape = _PLACEHOLDER_ROWS.sub("(...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+class QueryProfiler:
+    """
+    Per-statement timing for DatabaseConnectionManager.execute/executemany
+
+    Statements are grouped by normalize_query(). For each group it keeps
+    the call count, total and max time, rows returned or affected, and the
+    last DB_PROFILE_SAMPLES durations for the p95. A statement slower than
+    slow_query_ms goes to the slow-query log with its EXPLAIN QUERY PLAN,
+    taken once per statement shape.
+    """
+    # Query texts whose normalized shape is remembered
+    SHAPE_CACHE_SIZE = 5000
+
+    def __init__(self, slow_query_ms=DB_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.started_at = time.time()
+        self.stats = {}  # shape -> dict of count, total, max, rows, samples
+        self.slow_log = collections.deque(maxlen=DB_SLOW_LOG_SIZE)
+        self._plans = {}  # shape -> EXPLAIN QUERY PLAN lines
+        self._shapes = {}  # query text -> shape
+        self._lock = threading.Lock()
+
+    def record(self, query, seconds, rows, conn=None, params=None):
+        """Add one statement run; conn and params are used to explain a slow one"""
+        shape = self._shapes.get(query)
+        if shape is None:
+            if len(self._shapes) >= self.SHAPE_CACHE_SIZE:
+                self._shapes.clear()
+            shape = self._shapes[query] = normalize_query(query)
+
+        with self._lock:
+            stat = self.stats.get(shape)
+            if stat is None:
+                stat = self.stats[shape] = {
+                    'count': 0, 'total': 0.0, 'max': 0.0, 'rows': 0,
+                    'samples': collections.deque(maxlen=DB_PROFILE_SAMPLES),
+                }
+            stat['count'] += 1
+            stat['total'] += seconds
+            stat['max'] = max(stat['max'], seconds)
+            stat['rows'] += max(rows or 0, 0)
+            stat['samples'].append(seconds)
+            needs_plan = shape not in self._plans
+
+        if seconds * 1000 < self.slow_query_ms:
+            return
+
+        if needs_plan:
+            plan = self._explain(conn, query, params)
+            with self._lock:
+                self._plans.setdefault(shape, plan)
+        with self._lock:
+            plan = self._plans[shape]
+            self.slow_log.append({
+                'at': time.time(),
+                'ms': seconds * 1000,
+                'rows': rows,
+                'query': shape,
+                'plan': plan,
+            })
+
+        logger.log_warning(
+            "Slow query (%.1f ms, %s rows): %s%s", seconds * 1000, rows, shape,
+            logger.LazyArg(lambda: "".join(f"\n    {line}" for line in plan))
+        )
+
+    def _explain(self, conn, query, params):
+        """EXPLAIN QUERY PLAN lines for a statement, or a note why there are none"""
+        if conn is None:
+            return ["(no plan: connection unavailable)"]
+        if query.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+            return ["(no plan for this kind of statement)"]
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+        except sqlite3.Error as e:
+            return [f"(no plan: {e})"]
+        return [row[-1] for row in rows] or ["(no table access to plan)"]
+
+    def report(self, top=20, order_by='total'):
+        """
+        The top statements by total, mean, p95 or max time, or count
+
+        Returns:
+            list: dicts with query, count, total_ms, mean_ms, p95_ms, max_ms,
+                  rows and plan (None unless the statement was slow)
+        """
+        with self._lock:
+            rows = []
+            for shape, stat in self.stats.items():
+                samples = sorted(stat['samples'])
+                rows.append({
+                    'query': shape,
+                    'count': stat['count'],
+                    'total_ms': stat['total'] * 1000,
+                    'mean_ms': stat['total'] * 1000 / stat['count'],
+                    'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+                    'max_ms': stat['max'] * 1000,
+                    'rows': stat['rows'],
+                    'plan': self._plans.get(shape),
+                })
+
+        key = 'count' if order_by == 'count' else f"{order_by}_ms"
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:top]
+
+    def format_report(self, top=20, order_by='total', width=100):
+        """The report as a plain-text table"""
+        rows = self.report(top, order_by)
+        if not rows:
+            return "No queries profiled"
+
+        with self._lock:
+            statements = sum(stat['count'] for stat in self.stats.values())
+            slow = len(self.slow_log)
+        lines = [
+            f"Top {len(rows)} queries by {order_by} ({statements} statements profiled, {slow} slow):",
+            f"{'calls':>8} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9} {'rows':>9}  query",
+        ]
+        for row in rows:
+            query = row['query'] if len(row['query']) <= width else row['query'][:width - 3] + "..."
+            lines.append(
+                f"{row['count']:>8} {row['total_ms']:>10.1f} {row['mean_ms']:>9.2f} "
+                f"{row['p95_ms']:>9.2f} {row['max_ms']:>9.2f} {row['rows']:>9}  {query}"
+            )
+        return "\n".join(lines)
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self.started_at = time.time()
+            self.stats.clear()
+            self.slow_log.clear()
+            self._plans.clear()
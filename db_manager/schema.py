@@ -146,13 +146,3 @@ def initialize_tables(cursor):
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     ''')
-
-    # Check and add local_file_path column to images table
-    cursor.execute("PRAGMA table_info(images)")
-    columns = cursor.fetchall()
-    
-    local_file_path_exists = any(col[1] == 'local_file_path' for col in columns)
-    
-    if not local_file_path_exists:
-        cursor.execute("ALTER TABLE images ADD COLUMN local_file_path TEXT DEFAULT NULL")
-
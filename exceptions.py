@@ -10,6 +10,10 @@ class ImageDownloadError(Exception):
     """Exception raised when image download fails"""
     pass
 
+class ImageStoreError(Exception):
+    """Exception raised when a file cannot be added to the image store"""
+    pass
+
 class ValidationError(Exception):
     """Exception raised when input validation fails"""
     pass
@@ -141,14 +141,20 @@ class GenresTab:
         # First try to get taxonomies from database
         if hasattr(self.parent, 'db_manager'):
             try:
-                query = """
+                # Untyped rows count as genres; the condition is chosen here
+                # rather than in SQL so the lookup can use idx_genres_type
+                if taxonomy_type == 'genre':
+                    condition = "type IN (?, '') OR type IS NULL"
+                else:
+                    condition = "type = ?"
+                query = f"""
                 SELECT id, name, description, type, parentId
                 FROM genres
-                WHERE type = ? OR (? = 'genre' AND (type IS NULL OR type = ''))
+                WHERE {condition}
                 ORDER BY name
                 """
                 
-                results = self.parent.db_manager.execute_query(query, (taxonomy_type, taxonomy_type))
+                results = self.parent.db_manager.execute_query(query, (taxonomy_type,))
                 
                 taxonomies = []
                 for result in results:
@@ -346,27 +352,14 @@ class GenresTab:
         # Store in database if needed
         if hasattr(self.parent, 'db_manager'):
             try:
-                # First delete existing associations
-                self.parent.db_manager.execute_query(
-                    "DELETE FROM book_genres WHERE book_id = ?", 
-                    (self.current_book_id,)
-                )
-                
-                # Then add new associations
+                # Write only the associations that changed
+                links = []
                 for taxonomy in self.current_taxonomies:
-                    taxonomy_id = taxonomy.get("taxonomyId")
                     rank = taxonomy.get("rank", 0)
                     importance = float(self.selected_taxonomies.calculate_importance(rank))
-                    
-                    query = """
-                    INSERT INTO book_genres (book_id, genre_id, rank, importance) 
-                    VALUES (?, ?, ?, ?)
-                    """
-                    
-                    self.parent.db_manager.execute_query(
-                        query, 
-                        (self.current_book_id, taxonomy_id, rank, importance)
-                    )
+                    links.append((taxonomy.get("taxonomyId"), rank, importance))
+                
+                self.parent.db_manager.genres.reconcile_book_genres(self.current_book_id, links)
                     
                 messagebox.showinfo("Success", "Taxonomies saved successfully")
                 
@@ -1,14 +1,58 @@
 import os
+import json
+import queue
+import hashlib
+import contextlib
+import threading
+import contextvars
 import requests
-import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from urllib.parse import urlparse
 import app_logger as logger
-from config import API_BASE_URL
-from PIL import Image
+import tracing
+from api_client import get_api_client
+from image_store import ImageStore
+from thumbnail_cache import ThumbnailCache
+from config import (
+    API_BASE_URL,
+    IMAGE_DOWNLOAD_WORKERS,
+    IMAGE_DOWNLOAD_PER_HOST,
+    IMAGE_DOWNLOAD_TIMEOUT,
+    IMAGE_DB_BATCH_SIZE
+)
 
 class ImageDownloader:
-    def __init__(self, db_manager):
+    # Bytes read per streamed chunk
+    CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, db_manager, max_workers=IMAGE_DOWNLOAD_WORKERS,
+                 per_host_limit=IMAGE_DOWNLOAD_PER_HOST, db_batch_size=IMAGE_DB_BATCH_SIZE):
         self.db_manager = db_manager
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.db_batch_size = db_batch_size
+        
+        # Downloads end up in the content-addressed store, one file per distinct image
+        self.image_store = ImageStore(db_manager)
+        
+        # Preview thumbnails are generated by the workers as images arrive
+        self.thumbnails = ThumbnailCache()
+        
+        # Latest batch progress as a (kind, completed, total) tuple, drained by
+        # the Tk thread; only the newest is shown, so older ones are dropped
+        self.progress_queue = queue.Queue(maxsize=1)
+        
+        # Keep-alive connections are pooled by the shared API client
+        self.api_client = get_api_client()
+        
+        # Per-host concurrency limits
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        
+        # Staging (.part) file -> [lock, holders and waiters], so one URL is fetched by one worker at a time
+        self._staging_locks = {}
+        self._staging_locks_lock = threading.Lock()
+        
         # Ensure base upload directory exists
         self.base_path = os.path.abspath("./")
         
@@ -17,81 +61,305 @@ class ImageDownloader:
             os.makedirs(self.base_path)
             logger.log_debug(f"Created base directory: {self.base_path}")
     
+    def _host_slot(self, url):
+        """Get the semaphore limiting concurrent downloads to the URL's host"""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+    
+    @contextlib.contextmanager
+    def _staging_lock(self, part_path):
+        """Hold the lock of a staging file, dropping it once nobody waits on it"""
+        with self._staging_locks_lock:
+            entry = self._staging_locks.setdefault(part_path, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._staging_locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._staging_locks[part_path]
+    
+    def _report_progress(self, kind, completed, total):
+        """Replace any progress the Tk thread has not read yet"""
+        while True:
+            try:
+                self.progress_queue.put_nowait((kind, completed, total))
+                return
+            except queue.Full:
+                try:
+                    self.progress_queue.get_nowait()
+                except queue.Empty:
+                    pass
+    
     def download_image(self, url, save_path=None):
         """
         Download an image from a URL and save it to the specified path
         
+        Re-downloads are conditional: if the file is already on disk and
+        matches the cache manifest, the server is asked for changes with
+        If-None-Match/If-Modified-Since and an unchanged image is skipped.
+        The finished file is moved into the image store; the caller is
+        responsible for referencing it (see ImageStore.set_refs).
+        
         Args:
             url (str): The URL of the image to download
-            save_path (str, optional): The full path where the image should be saved.
-                                      If None, it will be determined from the URL.
+            save_path (str, optional): Where the download is staged before it moves
+                                      into the store. If None, it will be determined from the URL.
                 
         Returns:
-            str: The local path where the image was saved if successful, None otherwise
+            str: The blob path of the image if successful, None otherwise
         """
+        full_url = self._full_url(url)
+        local_path, new_entry, cache_entry = self._download(full_url, save_path)
+        
+        if new_entry:
+            try:
+                with self.db_manager.transaction():
+                    self._record_download(new_entry, cache_entry)
+            except Exception as e:
+                logger.log_warning(f"Could not update HTTP cache entry for {full_url}: {str(e)}")
+        
+        return local_path
+    
+    def _download(self, full_url, save_path=None):
+        """Fetch an image into the store; returns (blob path, new manifest entry, old manifest entry)"""
         try:
-            # Validate URL
-            logger.log_debug(f"Attempting to download image from: {url}")
+            cache_entry = self.db_manager.http_cache.get(full_url)
+        except Exception as e:
+            logger.log_warning(f"Could not read HTTP cache entry for {full_url}: {str(e)}")
+            cache_entry = None
+        
+        local_path, new_entry = self._fetch_logged(full_url, save_path, cache_entry)
+        return local_path, new_entry, cache_entry
+    
+    def _record_download(self, new_entry, cache_entry):
+        """
+        Index a fetched blob and store its manifest entry if it changed
+        
+        Callers that reference the blob do so in the same transaction, so
+        garbage_collect() never sees it registered but unreferenced.
+        """
+        self.image_store.register([self._blob_for(new_entry)])
+        if new_entry != cache_entry:
+            self.db_manager.http_cache.upsert_many([new_entry])
+    
+    def _blob_for(self, cache_entry):
+        """(hash, path, size) of the stored blob a manifest entry describes"""
+        return cache_entry['content_hash'], cache_entry['local_path'], cache_entry['size']
+    
+    def _full_url(self, url):
+        """Prefix relative image URLs with the API base URL"""
+        return f"{API_BASE_URL}/{url}" if not url.startswith(('http://', 'https://')) else url
+    
+    def _save_path_for(self, full_url):
+        """Local path mirroring the URL's path under the base directory"""
+        return os.path.join(self.base_path, urlparse(full_url).path.lstrip('/'))
+    
+    def _read_part_validator(self, part_path):
+        """Read the validator saved for a partial download, if any"""
+        try:
+            with open(part_path + ".json", "r") as meta_file:
+                return json.load(meta_file).get("validator")
+        except (OSError, ValueError):
+            return None
+    
+    def _write_part_validator(self, part_path, validator):
+        """Remember the response validator so an interrupted download can resume"""
+        if validator:
+            with open(part_path + ".json", "w") as meta_file:
+                json.dump({"validator": validator}, meta_file)
+        elif os.path.exists(part_path + ".json"):
+            os.remove(part_path + ".json")
+    
+    def _discard_part(self, part_path):
+        """Remove a partial download and its validator"""
+        for path in (part_path, part_path + ".json"):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _fetch(self, full_url, save_path=None, cache_entry=None):
+        """
+        Fetch a URL to disk, conditionally and resumably
+        
+        Bodies are streamed into "<save_path>.part" and renamed into place
+        only once complete. If a .part file from an interrupted download
+        exists, the transfer resumes with a Range request guarded by
+        If-Range, so a changed file is fetched from scratch instead; a
+        range the server refuses drops the .part file for the next try.
+        The complete file is then moved into the image store, or dropped
+        if the store already holds the same content.
+        
+        Args:
+            full_url (str): Absolute URL to download
+            save_path (str, optional): Staging path, derived from the URL if None
+            cache_entry (dict, optional): Manifest entry from the http_cache table
             
+        Returns:
+            tuple: (blob path or None, manifest entry dict or None)
+        """
+        try:
             # If no save_path is provided, create one from the URL
             if not save_path:
-                # Extract the path from the URL
-                parsed_url = urlparse(url)
-                path = parsed_url.path
-                
-                # Create the full save path preserving the URL structure
-                save_path = os.path.join(self.base_path, path.lstrip('/'))
+                save_path = self._save_path_for(full_url)
             
             # Create directory structure for the image if it doesn't exist
-            save_dir = os.path.dirname(save_path)
-            if not os.path.exists(save_dir):
-                os.makedirs(save_dir)
-                logger.log_debug(f"Created directory structure for image: {save_dir}")
-            
-            # Download the image with timeout and headers
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            # Try with stream first
-            logger.log_debug(f"Starting download with stream=True")
-
-            full_url = f"{API_BASE_URL}/{url}" if not url.startswith(('http://', 'https://')) else url
-            response = requests.get(full_url, stream=True, headers=headers, timeout=30)
-            
-            if response.status_code != 200:
-                # Try with API_BASE_URL prefix as fallback
-                logger.log_debug(f"First attempt failed, trying with API_BASE_URL: {full_url}")
-                response = requests.get(full_url, stream=True, headers=headers, timeout=30)
-                
-                if response.status_code != 200:
-                    logger.log_error(f"Failed to download image, status code: {response.status_code}")
-                    return None
+            # (exist_ok: concurrent workers may create the same directory)
+            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+            part_path = save_path + ".part"
             
-            # Save the image to disk using stream
-            with open(save_path, 'wb') as out_file:
-                shutil.copyfileobj(response.raw, out_file)
-            
-            # Verify the file was created and has content
-            if os.path.exists(save_path) and os.path.getsize(save_path) > 0:
-                logger.log_debug(f"Image successfully downloaded to {save_path}")
-                return save_path
-            else:
-                logger.log_error(f"File created but has no content: {save_path}")
-                return None
+            # One fetch at a time per staging file: two fetches of the same
+            # URL would otherwise interleave their bytes in one .part
+            with self._staging_lock(part_path):
+                return self._fetch_staged(full_url, save_path, part_path, cache_entry)
                 
         except requests.exceptions.Timeout:
-            logger.log_error(f"Timeout downloading image from {url}")
-            return None
+            logger.log_error(f"Timeout downloading image from {full_url}")
+            return None, None
         except requests.exceptions.ConnectionError:
-            logger.log_error(f"Connection error downloading image from {url}")
-            return None
+            logger.log_error(f"Connection error downloading image from {full_url}")
+            return None, None
         except requests.exceptions.RequestException as e:
-            logger.log_error(f"Request exception downloading image from {url}: {str(e)}")
-            return None
+            logger.log_error(f"Request exception downloading image from {full_url}: {str(e)}")
+            return None, None
         except Exception as e:
-            logger.log_error(f"Unexpected error downloading image from {url}: {str(e)}")
-            return None
+            logger.log_error(f"Unexpected error downloading image from {full_url}: {str(e)}")
+            return None, None
+
+    def _fetch_staged(self, full_url, save_path, part_path, cache_entry):
+        """The body of _fetch(), run holding the staging file's lock"""
+        # Download the image with timeout and headers
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        
+        # Only ask "has it changed?" when our copy is the one the manifest describes
+        cached_path = cache_entry.get('local_path') if cache_entry else None
+        have_copy = bool(
+            cached_path
+            and os.path.exists(cached_path)
+            and os.path.getsize(cached_path) == cache_entry.get('size')
+        )
+        if have_copy:
+            if cache_entry.get('etag'):
+                headers['If-None-Match'] = cache_entry['etag']
+            if cache_entry.get('last_modified'):
+                headers['If-Modified-Since'] = cache_entry['last_modified']
+        
+        # Resume an interrupted download
+        resume_from = 0
+        part_validator = self._read_part_validator(part_path)
+        if part_validator and os.path.exists(part_path):
+            resume_from = os.path.getsize(part_path)
+            if resume_from:
+                headers['Range'] = f"bytes={resume_from}-"
+                headers['If-Range'] = part_validator
+        
+        with self._host_slot(full_url):
+            response = self.api_client.get(full_url, stream=True, headers=headers, timeout=IMAGE_DOWNLOAD_TIMEOUT)
+            
+            with response:
+                if response.status_code == 304 and have_copy:
+                    return self._store_unchanged(cache_entry)
+                
+                if response.status_code == 206 and resume_from:
+                    content_range = response.headers.get('Content-Range', '')
+                    if not content_range.startswith(f"bytes {resume_from}-"):
+                        logger.log_warning(f"Unexpected Content-Range '{content_range}' for {full_url}, restarting")
+                        self._discard_part(part_path)
+                        return None, None
+                    mode = 'ab'
+                elif response.status_code == 200:
+                    mode = 'wb'
+                    resume_from = 0
+                else:
+                    logger.log_error(f"Failed to download image, status code: {response.status_code}")
+                    # A refused range (416, or another client error) would be
+                    # refused again next time; only keep the .part through
+                    # errors worth retrying the same request for
+                    if resume_from and response.status_code < 500 and response.status_code != 429:
+                        self._discard_part(part_path)
+                    return None, None
+                
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if mode == 'wb':
+                    self._write_part_validator(part_path, etag or last_modified)
+                
+                # Hash what is already on disk, then the rest as it streams in
+                digest = hashlib.sha256()
+                if resume_from:
+                    with open(part_path, 'rb') as part_file:
+                        for chunk in iter(lambda: part_file.read(self.CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                
+                with open(part_path, mode) as out_file:
+                    for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                        out_file.write(chunk)
+                        digest.update(chunk)
+                
+                content_length = response.headers.get('Content-Length')
+                encoded = 'Content-Encoding' in response.headers
+        
+        size = os.path.getsize(part_path)
+        
+        # A short body means the connection dropped; keep the .part to resume
+        if content_length and not encoded and size != resume_from + int(content_length):
+            logger.log_error(f"Incomplete download of {full_url}: {size} of {resume_from + int(content_length)} bytes")
+            return None, None
+        
+        if size == 0:
+            logger.log_error(f"File created but has no content: {save_path}")
+            self._discard_part(part_path)
+            return None, None
+        
+        os.replace(part_path, save_path)
+        self._write_part_validator(part_path, None)
+        
+        content_hash, blob_path, size, existed = self.image_store.store_file(
+            save_path, digest.hexdigest(), move=True
+        )
+        if existed:
+            logger.log_debug("%s duplicates stored blob %s", full_url, content_hash)
+        
+        return blob_path, {
+            'url': full_url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'size': size,
+            'content_hash': content_hash,
+            'local_path': blob_path
+        }
+
+    def _fetch_logged(self, full_url, save_path=None, cache_entry=None):
+        """_fetch() recorded as a "download" log operation"""
+        with logger.operation("download", url=full_url) as op, tracing.span("download"):
+            local_path, new_entry = self._fetch(full_url, save_path, cache_entry)
+            if not local_path:
+                op['status'] = 'failed'
+            return local_path, new_entry
+    
+    def _store_unchanged(self, cache_entry):
+        """
+        Resolve a 304 to the stored blob
+        
+        Copies downloaded before the image store existed still live at their
+        URL path; they are moved into the store the first time they are confirmed.
+        """
+        local_path = cache_entry['local_path']
+        if self.image_store.hash_from_path(local_path):
+            return local_path, cache_entry
+        
+        content_hash, blob_path, size, _ = self.image_store.store_file(
+            local_path, cache_entry.get('content_hash'), move=True
+        )
+        return blob_path, dict(cache_entry, content_hash=content_hash, size=size, local_path=blob_path)
 
     def download_author_image(self, author_id, image_url):
         """
@@ -107,25 +375,27 @@ class ImageDownloader:
         full_url = f"{API_BASE_URL}/{image_url}"
         if not image_url:
             
-            logger.log_debug(f"No image URL provided for author {author_id}")
+            logger.log_debug("No image URL provided for author %s", author_id)
             return None
         
         # Log the author and image URL
-        logger.log_debug(f"Downloading author image for author_id={author_id}, URL={full_url}")
+        logger.log_debug("Downloading author image for author_id=%s, URL=%s", author_id, full_url)
         
         # Download the image preserving URL structure
-        local_path = self.download_image(full_url)
+        local_path, new_entry, cache_entry = self._download(full_url)
         
         if local_path:
-            # Update the author record with the local file path
+            # Index the blob, point the author at it and reference it in one
+            # transaction, so the store's GC never sees it unreferenced
             try:
-                author = self.db_manager.authors.get_all(author_id)
-                if author:
-                    update_data = {
-                        'local_image_path': local_path
-                    }
-                    logger.log_debug(f"Updating author with local_image_path: {local_path}")
-                    self.db_manager.authors.update(author_id, update_data)
+                author = self.db_manager.authors.get(author_id)
+                with self.db_manager.transaction():
+                    if new_entry:
+                        self._record_download(new_entry, cache_entry)
+                    if author:
+                        logger.log_debug("Updating author with local_image_path: %s", local_path)
+                        self.db_manager.authors.update(author_id, {'local_image_path': local_path})
+                        self.image_store.set_refs('author', {author_id: local_path})
                 return local_path
             except Exception as e:
                 logger.log_error(f"Error updating author with local image path: {str(e)}")
@@ -146,30 +416,256 @@ class ImageDownloader:
         """
         full_url = f"{API_BASE_URL}/{image_url}"
         if not image_url:
-            logger.log_debug(f"No image URL provided for book {book_id}")
+            logger.log_debug("No image URL provided for book %s", book_id)
             return None
         
         # Log the book and image URL
-        logger.log_debug(f"Downloading book image for book_id={book_id}, image_id={image_id}, URL={full_url}")
+        logger.log_debug("Downloading book image for book_id=%s, image_id=%s, URL=%s", book_id, image_id, full_url)
         
         # Download the image preserving URL structure
-        local_path = self.download_image(full_url)
+        local_path, new_entry, cache_entry = self._download(full_url)
         
         if local_path:
-            # Update the image record with the local file path if image_id is provided
+            # Have the preview thumbnail ready before the book is first viewed
+            self.thumbnails.ensure(local_path)
+            
+            # Index the blob and, if image_id is provided, point the image
+            # record at it in one transaction, so the store's GC never sees
+            # it unreferenced
             try:
-                if image_id:
-                    update_data = {
-                        'local_file_path': local_path
-                    }
-                    logger.log_debug(f"Updating image record with local_file_path: {local_path}")
-                    self.db_manager.images.update(image_id, update_data)
+                with self.db_manager.transaction():
+                    if new_entry:
+                        self._record_download(new_entry, cache_entry)
+                    if image_id:
+                        logger.log_debug("Updating image record with local_file_path: %s", local_path)
+                        self.db_manager.images.update(image_id, {'local_file_path': local_path})
+                        self.image_store.set_refs('image', {image_id: local_path})
                 return local_path
             except Exception as e:
                 logger.log_error(f"Error updating image record with local file path: {str(e)}")
                 return local_path  # Still return the path even if DB update fails
         return None
 
+    def _run_batch(self, kind, jobs, download_job, record_results):
+        """
+        Download a batch of jobs on the worker pool
+        
+        Workers only fetch files; results are collected on the calling
+        thread and handed to record_results() every db_batch_size images,
+        so the database sees one write per chunk instead of one per image.
+        
+        Args:
+            kind (str): Label used in progress reports ('author' or 'book')
+            jobs (list): Job dicts passed to download_job
+            download_job (callable): job -> result dict or None, run on a worker
+            record_results (callable): list of (job, result) -> None, run here
+            
+        Yields:
+            tuple: (job, result, error) for each job as it completes
+        """
+        total = len(jobs)
+        completed = 0
+        pending = []
+        self._report_progress(kind, completed, total)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    thread_name_prefix=f"{kind}-image") as executor:
+                futures = {
+                    executor.submit(contextvars.copy_context().run, download_job, job): job for job in jobs
+                }
+                
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        result = future.result()
+                        error = None if result else "Download failed"
+                    except Exception as e:
+                        result, error = None, str(e)
+                    
+                    if result:
+                        pending.append((job, result))
+                        if len(pending) >= self.db_batch_size:
+                            record_results(pending)
+                            pending = []
+                    
+                    completed += 1
+                    self._report_progress(kind, completed, total)
+                    yield job, result, error
+        finally:
+            if pending:
+                record_results(pending)
+    
+    def attach_cache_entries(self, jobs):
+        """Resolve each job's absolute URL and load its manifest entry in one query"""
+        for job in jobs:
+            job['full_url'] = f"{API_BASE_URL}/{job['url']}"
+        
+        entries = self.db_manager.http_cache.get_many([job['full_url'] for job in jobs])
+        for job in jobs:
+            job['cache_entry'] = entries.get(job['full_url'])
+    
+    def _record_cache_entries(self, batch):
+        """Index the stored blobs and store the changed manifest entries of a result batch"""
+        self.image_store.register(
+            self._blob_for(result['cache_entry']) for job, result in batch
+            if result.get('cache_entry')
+        )
+        self.db_manager.http_cache.upsert_many(
+            result['cache_entry'] for job, result in batch
+            if result.get('cache_entry') and result['cache_entry'] != job['cache_entry']
+        )
+    
+    def _download_author_job(self, job):
+        """Fetch one author image job (runs on a worker)"""
+        local_path, cache_entry = self._fetch_logged(job['full_url'], cache_entry=job['cache_entry'])
+        return {'local_path': local_path, 'cache_entry': cache_entry} if local_path else None
+    
+    def _download_book_job(self, job):
+        """Fetch one book image job, shared by every image row in job['images'] (runs on a worker)"""
+        local_path, cache_entry = self._fetch_logged(job['full_url'], cache_entry=job['cache_entry'])
+        if not local_path:
+            return None
+        
+        result = {'local_path': local_path, 'cache_entry': cache_entry}
+        # Build the preview thumbnail and read dimensions on the worker,
+        # so neither the DB write nor the UI has to decode the original
+        dimensions = self.thumbnails.ensure(local_path)
+        if dimensions:
+            result['width'], result['height'] = dimensions
+            result['sizeKb'] = os.path.getsize(local_path) // 1024  # Size in KB
+        else:
+            logger.log_error(f"Error analyzing image dimensions: {local_path}")
+        return result
+    
+    @tracing.span("record_author_images")
+    def record_author_results(self, batch):
+        """Write a batch of (author job, result) pairs in one transaction"""
+        paths = {job['id']: result['local_path'] for job, result in batch}
+        with self.db_manager.transaction():
+            self.db_manager.authors.update_local_image_paths(paths)
+            self._record_cache_entries(batch)
+            self.image_store.set_refs('author', paths)
+    
+    @tracing.span("record_book_images")
+    def record_book_results(self, batch):
+        """Write a batch of (book image job, result) pairs in one transaction"""
+        with self.db_manager.transaction():
+            self.db_manager.images.update_file_info_many([
+                {
+                    'id': image['image_id'],
+                    'local_file_path': result['local_path'],
+                    'width': result.get('width'),
+                    'height': result.get('height'),
+                    'sizeKb': result.get('sizeKb')
+                }
+                for job, result in batch
+                for image in job['images']
+            ])
+            self._record_cache_entries(batch)
+            self.image_store.set_refs('image', {
+                image['image_id']: result['local_path']
+                for job, result in batch
+                for image in job['images']
+            })
+    
+    @tracing.span("image_stream")
+    def download_stream(self, jobs, on_results):
+        """
+        Download jobs as they arrive, e.g. from a sync pipeline queue
+        
+        Unlike the batch methods this never writes to the database: every
+        db_batch_size results are handed to on_results(kind, batch) so a
+        single writer can record them with record_author_results() or
+        record_book_results(). At most two jobs per worker are in flight,
+        so a slow network pushes back on the producer.
+        
+        Each URL is fetched once per stream: a job for a URL that is still
+        being fetched waits for that fetch, and one for a URL already
+        fetched reuses its result.
+        
+        Producers should load the jobs' manifest entries in batches with
+        attach_cache_entries() as they queue them; a job without one is
+        looked up on its own.
+        
+        Args:
+            jobs (iterable): Job dicts with a 'kind' of 'author' or 'book',
+                             shaped like the batch methods' jobs
+            on_results (callable): (kind, list of (job, result)) -> None
+            
+        Returns:
+            dict: Success and failure counts
+        """
+        counts = {'success': 0, 'failed': 0}
+        pending = {'author': [], 'book': []}
+        download = {'author': self._download_author_job, 'book': self._download_book_job}
+        in_flight = {}  # future -> job
+        waiting = {}  # URL being fetched -> other jobs for it
+        fetched = {}  # URL -> result of its successful fetch
+        submitted = 0
+        
+        def finish(job, result):
+            # A job that reused another's fetch has nothing newer to record in the manifest
+            job.setdefault('cache_entry', result.get('cache_entry') if result else None)
+            if result:
+                counts['success'] += 1
+                pending[job['kind']].append((job, result))
+                if len(pending[job['kind']]) >= self.db_batch_size:
+                    on_results(job['kind'], pending[job['kind']])
+                    pending[job['kind']] = []
+            else:
+                counts['failed'] += 1
+                logger.log_error(f"Failed to download image {job['full_url']}")
+        
+        def collect(done):
+            for future in done:
+                job = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.log_error(f"Error downloading {job['full_url']}: {str(e)}")
+                    result = None
+                
+                if result:
+                    fetched[job['full_url']] = result
+                for same_url_job in [job] + waiting.pop(job['full_url']):
+                    finish(same_url_job, result)
+            
+            self._report_progress('catalogue', counts['success'] + counts['failed'], submitted)
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="stream-image") as executor:
+            for job in jobs:
+                job['full_url'] = f"{API_BASE_URL}/{job['url']}"
+                submitted += 1
+                if job['full_url'] in fetched:
+                    finish(job, fetched[job['full_url']])
+                    continue
+                if job['full_url'] in waiting:
+                    waiting[job['full_url']].append(job)
+                    continue
+                
+                if 'cache_entry' not in job:
+                    job['cache_entry'] = self.db_manager.http_cache.get(job['full_url'])
+                waiting[job['full_url']] = []
+                in_flight[executor.submit(contextvars.copy_context().run, download[job['kind']], job)] = job
+                
+                if len(in_flight) >= 2 * self.max_workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        
+        for kind, batch in pending.items():
+            if batch:
+                on_results(kind, batch)
+        
+        return counts
+    
+    @logger.operation("image_batch", kind="author")
+    @tracing.span("author_image_batch")
     def batch_download_author_images(self):
         """
         Download images for all authors in the database
@@ -195,52 +691,38 @@ class ImageDownloader:
                 """
             )
             
-            if not authors:
+            jobs = [
+                {'id': author[0], 'name': author[1], 'url': author[2]}
+                for author in authors if author[2]
+            ]
+            
+            if not jobs:
                 logger.log_debug("No author images need downloading")
                 return results
                 
-            logger.log_debug(f"Found {len(authors)} authors with images to download")
+            logger.log_debug(f"Found {len(jobs)} authors with images to download")
             
-            # Download each author's image
-            for author in authors:
-                author_id = author[0]
-                author_name = author[1]
-                image_url = author[2]
-                
-                if not image_url:
-                    continue
-                    
-                try:
-                    logger.log_debug(f"Downloading image for author {author_name} (ID: {author_id})")
-                    local_path = self.download_author_image(author_id, image_url)
-                    
-                    if local_path:
-                        results['success'] += 1
-                        results['successful_authors'].append({
-                            'id': author_id,
-                            'name': author_name,
-                            'url': image_url,
-                            'local_path': local_path
-                        })
-                        logger.log_debug(f"Successfully downloaded image for author {author_name}")
-                    else:
-                        results['failed'] += 1
-                        results['failed_authors'].append({
-                            'id': author_id,
-                            'name': author_name,
-                            'url': image_url,
-                            'error': "Download failed"
-                        })
-                        logger.log_error(f"Failed to download image for author {author_name}")
-                except Exception as e:
+            self.attach_cache_entries(jobs)
+            
+            for job, result, error in self._run_batch('author', jobs, self._download_author_job,
+                                                      self.record_author_results):
+                if result:
+                    results['success'] += 1
+                    results['successful_authors'].append({
+                        'id': job['id'],
+                        'name': job['name'],
+                        'url': job['url'],
+                        'local_path': result['local_path']
+                    })
+                else:
                     results['failed'] += 1
                     results['failed_authors'].append({
-                        'id': author_id,
-                        'name': author_name,
-                        'url': image_url,
-                        'error': str(e)
+                        'id': job['id'],
+                        'name': job['name'],
+                        'url': job['url'],
+                        'error': error
                     })
-                    logger.log_error(f"Error downloading image for author {author_name}: {str(e)}")
+                    logger.log_error(f"Failed to download image for author {job['name']}: {error}")
                     
             logger.log_debug(f"Author image download complete: {results['success']} successful, {results['failed']} failed")
             return results
@@ -250,6 +732,8 @@ class ImageDownloader:
             results['error'] = str(e)
             return results
 
+    @logger.operation("image_batch", kind="book")
+    @tracing.span("book_image_batch")
     def batch_download_book_images(self):
         """
         Download images for all books in the database
@@ -276,72 +760,45 @@ class ImageDownloader:
                 """
             )
             
-            if not images:
+            # Group by URL so an image shared by several books is fetched once
+            jobs_by_url = {}
+            for image_id, book_id, title, image_url in images:
+                if not image_url:
+                    continue
+                job = jobs_by_url.setdefault(image_url, {'url': image_url, 'images': []})
+                job['images'].append({'image_id': image_id, 'book_id': book_id, 'title': title})
+            jobs = list(jobs_by_url.values())
+            
+            if not jobs:
                 logger.log_debug("No book images need downloading")
                 return results
                 
-            logger.log_debug(f"Found {len(images)} book images to download")
+            logger.log_debug(f"Found {len(images)} book images ({len(jobs)} unique URLs) to download")
             
-            # Download each book image
-            for image in images:
-                image_id = image[0]
-                book_id = image[1]
-                book_title = image[2]
-                image_url = image[3]
-                
-                if not image_url:
-                    continue
-                    
-                try:
-                    logger.log_debug(f"Downloading image {image_id} for book '{book_title}' (ID: {book_id})")
-                    local_path = self.download_book_image(book_id, image_url, image_id)
-                    
-                    if local_path:
-                        # Update image with dimensions
-                        try:
-                            with Image.open(local_path) as img:
-                                width, height = img.size
-                                file_size = os.path.getsize(local_path) // 1024  # Size in KB
-                                
-                                # Update image record with dimensions
-                                self.db_manager.images.update(image_id, {
-                                    'width': width,
-                                    'height': height,
-                                    'sizeKb': file_size,
-                                    'local_file_path': local_path
-                                })
-                        except Exception as e:
-                            logger.log_error(f"Error analyzing image dimensions: {str(e)}")
-                        
+            self.attach_cache_entries(jobs)
+            
+            for job, result, error in self._run_batch('book', jobs, self._download_book_job,
+                                                      self.record_book_results):
+                for image in job['images']:
+                    if result:
                         results['success'] += 1
                         results['successful_books'].append({
-                            'image_id': image_id,
-                            'book_id': book_id,
-                            'title': book_title,
-                            'url': image_url,
-                            'local_path': local_path
+                            'image_id': image['image_id'],
+                            'book_id': image['book_id'],
+                            'title': image['title'],
+                            'url': job['url'],
+                            'local_path': result['local_path']
                         })
-                        logger.log_debug(f"Successfully downloaded image for book '{book_title}'")
                     else:
                         results['failed'] += 1
                         results['failed_books'].append({
-                            'image_id': image_id,
-                            'book_id': book_id,
-                            'title': book_title,
-                            'url': image_url,
-                            'error': "Download failed"
+                            'image_id': image['image_id'],
+                            'book_id': image['book_id'],
+                            'title': image['title'],
+                            'url': job['url'],
+                            'error': error
                         })
-                        logger.log_error(f"Failed to download image for book '{book_title}'")
-                except Exception as e:
-                    results['failed'] += 1
-                    results['failed_books'].append({
-                        'image_id': image_id,
-                        'book_id': book_id,
-                        'title': book_title,
-                        'url': image_url,
-                        'error': str(e)
-                    })
-                    logger.log_error(f"Error downloading image for book '{book_title}': {str(e)}")
+                        logger.log_error(f"Failed to download image for book '{image['title']}': {error}")
                     
             logger.log_debug(f"Book image download complete: {results['success']} successful, {results['failed']} failed")
             return results
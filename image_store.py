@@ -0,0 +1,176 @@
+import os
+import shutil
+import hashlib
+import app_logger as logger
+from config import IMAGE_STORE_PATH, IMAGE_STORE_GC_GRACE_MINUTES
+from exceptions import ImageStoreError
+
+class ImageStore:
+    """
+    Content-addressed storage for image files
+    
+    Every distinct file is stored once under its SHA-256, sharded into two
+    directory levels (ab/cd/abcd...) so no directory grows too large. The
+    file name is the hash alone, so the same bytes saved as .jpg and
+    .jpeg share one blob. Owners (image rows and authors) reference blobs
+    through the image_blob_refs table; blobs nobody references are
+    removed by garbage_collect().
+    """
+    # Bytes read per chunk when hashing
+    CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, db_manager, root=IMAGE_STORE_PATH):
+        self.db_manager = db_manager
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+    
+    def blob_path(self, content_hash):
+        """Path of the blob for a content hash"""
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], content_hash)
+    
+    def _blob_files(self, content_hash):
+        """
+        Every file stored for a content hash
+        
+        Blobs used to keep the extension of the file they were stored
+        from, so a hash can also have files such as abcd....jpg.
+        """
+        directory = os.path.dirname(self.blob_path(content_hash))
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return [
+            os.path.join(directory, name) for name in sorted(names)
+            if os.path.splitext(name)[0] == content_hash
+        ]
+    
+    @staticmethod
+    def hash_from_path(path):
+        """Content hash encoded in a blob path, or None for paths outside the store"""
+        if not path:
+            return None
+        name = os.path.splitext(os.path.basename(path))[0]
+        return name if len(name) == 64 else None
+    
+    def hash_file(self, path):
+        """SHA-256 of a file's contents"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def store_file(self, path, content_hash=None, move=False):
+        """
+        Put a file into the store
+        
+        Safe to call from worker threads: it only touches the filesystem, and
+        concurrent stores of the same content land on the same blob path.
+        The file is hashed again before it is stored, so it is filed under
+        the hash of the bytes actually on disk.
+        
+        Args:
+            path (str): File to store
+            content_hash (str, optional): SHA-256 the caller expects the file to have
+            move (bool): Move the file instead of copying it
+            
+        Returns:
+            tuple: (content hash, blob path, size, whether the blob already existed)
+        """
+        try:
+            actual_hash = self.hash_file(path)
+            if content_hash and content_hash != actual_hash:
+                logger.log_warning(f"{path} does not hash to {content_hash} as expected; storing it as {actual_hash}")
+            content_hash = actual_hash
+            target = self.blob_path(content_hash)
+            size = os.path.getsize(path)
+            
+            # Reuse the blob already stored for this content, whatever its name
+            existing = self._blob_files(content_hash)
+            if existing:
+                if move:
+                    os.remove(path)
+                return content_hash, target if target in existing else existing[0], size, True
+            
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if move:
+                os.replace(path, target)
+            else:
+                # Copy next to the target first so a reader never sees half a blob
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, target)
+            
+            return content_hash, target, size, False
+        except OSError as e:
+            raise ImageStoreError(f"Could not store {path} in the image store: {e}")
+    
+    def register(self, blobs):
+        """
+        Index stored blobs
+        
+        Args:
+            blobs (iterable): (content hash, blob path, size) tuples
+        """
+        return self.db_manager.image_blobs.register_many(blobs)
+    
+    def set_refs(self, owner_type, refs, role=''):
+        """
+        Point owners at blobs by path
+        
+        Args:
+            owner_type (str): 'image' or 'author'
+            refs (dict): owner ID -> blob path; paths outside the store are ignored
+            role (str): Distinguishes several images of one owner (e.g. 'Hero')
+        """
+        return self.db_manager.image_blobs.set_refs(
+            owner_type,
+            {owner_id: self.hash_from_path(path) for owner_id, path in refs.items()},
+            role
+        )
+    
+    def garbage_collect(self, grace_minutes=IMAGE_STORE_GC_GRACE_MINUTES):
+        """
+        Delete blobs that no owner references
+        
+        Blobs registered in the last grace_minutes are kept, so one that a
+        download has just stored but not yet referenced survives a GC that
+        runs in between.
+        
+        Returns:
+            dict: Number of blobs removed and bytes freed
+        """
+        removed = []
+        freed = 0
+        for content_hash, path, size in self.db_manager.image_blobs.get_unreferenced(grace_minutes):
+            try:
+                # Along with any copy stored under another extension
+                for blob_file in {path, *self._blob_files(content_hash)}:
+                    if os.path.exists(blob_file):
+                        os.remove(blob_file)
+                removed.append(content_hash)
+                freed += size or 0
+            except OSError as e:
+                logger.log_warning(f"Could not remove unreferenced blob {path}: {str(e)}")
+        
+        self.db_manager.image_blobs.delete_many(removed, grace_minutes)
+        
+        if removed:
+            logger.log_debug(f"Image store GC removed {len(removed)} blobs, freed {freed} bytes")
+        return {'removed': len(removed), 'bytes_freed': freed}
+    
+    def report(self):
+        """
+        Summarize the store, including disk space saved by deduplication
+        
+        Returns:
+            dict: Blob and reference counts with stored, referenced and saved bytes
+        """
+        stats = self.db_manager.image_blobs.get_stats()
+        logger.log_debug(
+            f"Image store: {stats['blobs']} blobs ({stats['stored_bytes']} bytes) for "
+            f"{stats['references']} references ({stats['referenced_bytes']} bytes), "
+            f"{stats['saved_bytes']} bytes saved by deduplication"
+        )
+        return stats
@@ -1,7 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-from PIL import Image, ImageTk
+from PIL import Image
+from thumbnail_cache import ThumbnailCache
 
 class ImagesTab:
     def __init__(self, parent):
@@ -11,6 +12,9 @@ class ImagesTab:
         self.frame = ttk.Frame(parent.notebook)
         parent.notebook.add(self.frame, text="Images")
         
+        # Previews are served from the shared thumbnail cache
+        self.thumbnails = ThumbnailCache()
+        
         self.setup_tab()
     
     def setup_tab(self):
@@ -322,22 +326,8 @@ class ImagesTab:
             return
         
         try:
-            image = Image.open(file_path)
-            
-            # Resize for preview (maintaining aspect ratio)
-            width, height = image.size
-            max_size = 200
-            
-            if width > height:
-                new_width = max_size
-                new_height = int(height * (max_size / width))
-            else:
-                new_height = max_size
-                new_width = int(width * (max_size / height))
-            
-            image = image.resize((new_width, new_height), Image.LANCZOS)
-            
-            photo = ImageTk.PhotoImage(image)
+            # Fit within 200x200 (maintaining aspect ratio)
+            photo, (width, height) = self.thumbnails.get_photo(file_path, (200, 200))
             self.image_preview.configure(image=photo)
             self.image_preview.image = photo  # Keep a reference
             
@@ -2,6 +2,7 @@ import tkinter as tk
 import os
 from book_catalog_formatter import BookCatalogFormatter
 from db_manager import DatabaseManager  # Updated import
+from api_client import close_api_client
 
 def ensure_directory_structure():
     """Ensure all required directories exist"""
@@ -25,4 +26,9 @@ if __name__ == "__main__":
     app = BookCatalogFormatter(root, db_manager)
     
     # Start the main event loop
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        # Release pooled database and HTTP connections on exit
+        db_manager.close()
+        close_api_client()
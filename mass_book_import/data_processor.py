@@ -4,6 +4,7 @@ import re
 import json
 from datetime import datetime
 import app_logger as logger
+import tracing
 from exceptions import DatabaseError
 
 class DataProcessor:
@@ -133,6 +134,7 @@ class DataProcessor:
             
         return value
     
+    @tracing.span("validate")
     def validate_import_data(self, data, update_existing=True):
         """Validate the data to be imported"""
         validation_issues = []
@@ -174,6 +176,8 @@ class DataProcessor:
         
         return validation_issues
     
+    @logger.operation("import")
+    @tracing.trace("import")
     def import_books(self, data, update_existing=True, progress_callback=None):
         """Process the actual import of books"""
         try:
@@ -216,7 +220,7 @@ class DataProcessor:
                             }
                             
                             author_id = self.db_manager.authors.add(author_data)
-                            logger.log_debug(f"Created new author: {author} with ID {author_id}")
+                            logger.log_debug("Created new author: %s with ID %s", author, author_id)
                     except Exception as e:
                         logger.log_error(f"Error checking author: {str(e)}")
                 
@@ -268,7 +272,7 @@ class DataProcessor:
                                 # Update existing book in database
                                 self.db_manager.books.update(book_id, book_data)
                                 books_updated += 1
-                                logger.log_debug(f"Updated book: {title} with ID {book_id}")
+                                logger.log_debug("Updated book: %s with ID %s", title, book_id)
                             else:
                                 # Skip this book
                                 books_skipped += 1
@@ -277,7 +281,7 @@ class DataProcessor:
                             # Add new book to database
                             book_id = self.db_manager.books.add(book_data)
                             books_added += 1
-                            logger.log_debug(f"Added book: {title} with ID {book_id}")
+                            logger.log_debug("Added book: %s with ID %s", title, book_id)
                     except Exception as e:
                         logger.log_error(f"Error adding/updating book in database: {str(e)}")
                         books_skipped += 1
@@ -477,7 +477,7 @@ class BooksMassImport:
             messagebox.showinfo("Import Complete", summary)
             
             # Log import stats
-            logger.log_debug(f"Mass import completed: {summary}")
+            logger.log_debug("Mass import completed: %s", summary)
             
         except Exception as e:
             logger.log_error(f"Error importing books: {str(e)}")
@@ -0,0 +1,147 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageTk, PngImagePlugin
+import app_logger as logger
+from image_store import ImageStore
+from config import THUMBNAIL_CACHE_PATH, THUMBNAIL_PREVIEW_SIZE, THUMBNAIL_MEMORY_ITEMS
+
+class ThumbnailCache:
+    """
+    On-disk thumbnail cache with an in-memory LRU of Tk images
+    
+    Thumbnails are PNG files keyed by the source's content hash and the
+    target box, so a source is decoded and resized at most once per size.
+    The source dimensions are kept in the PNG metadata, which lets callers
+    classify an image without opening the original.
+    
+    ensure() is safe to call from worker threads; get_photo() creates Tk
+    objects and must run on the Tk main thread.
+    """
+    def __init__(self, root=THUMBNAIL_CACHE_PATH, memory_items=THUMBNAIL_MEMORY_ITEMS):
+        self.root = os.path.abspath(root)
+        self.memory_items = memory_items
+        os.makedirs(self.root, exist_ok=True)
+        
+        # (source key, box) -> (PhotoImage, source size), most recently used last
+        self._photos = OrderedDict()
+        self._photos_lock = threading.Lock()
+    
+    def _source_key(self, source_path):
+        """
+        Cache key for a source image
+        
+        Blobs in the image store carry their content hash in the file name;
+        other files are keyed by path, size and modification time so the
+        original never has to be read to find its thumbnail.
+        """
+        content_hash = ImageStore.hash_from_path(source_path)
+        if content_hash:
+            return content_hash
+        
+        stat = os.stat(source_path)
+        identity = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+    
+    def thumbnail_path(self, source_key, box):
+        """Path of the thumbnail for a source key and (max width, max height) box"""
+        return os.path.join(self.root, source_key[:2], f"{source_key}_{box[0]}x{box[1]}.png")
+    
+    def _generate(self, source_path, thumb_path, box):
+        """Resize a source image into the cache and return (thumbnail, source size)"""
+        with Image.open(source_path) as img:
+            source_size = img.size
+            width, height = source_size
+            
+            # Scale to fit the box, keeping the aspect ratio
+            scale = min(box[0] / width, box[1] / height)
+            new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            
+            if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+                img = img.convert("RGBA")
+            thumbnail = img.resize(new_size, Image.Resampling.LANCZOS)
+        
+        metadata = PngImagePlugin.PngInfo()
+        metadata.add_text("source_size", f"{source_size[0]}x{source_size[1]}")
+        
+        # Write under a temporary name so concurrent readers never see a partial file
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+        tmp_path = f"{thumb_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        thumbnail.save(tmp_path, format="PNG", pnginfo=metadata)
+        os.replace(tmp_path, thumb_path)
+        
+        return thumbnail, source_size
+    
+    def _load(self, thumb_path):
+        """Read a cached thumbnail and the source size recorded with it"""
+        with Image.open(thumb_path) as img:
+            img.load()
+            width, height = img.text.get("source_size", "0x0").split("x")
+            return img.copy(), (int(width), int(height))
+    
+    def get(self, source_path, box=THUMBNAIL_PREVIEW_SIZE):
+        """
+        Get a thumbnail, generating it on a cache miss
+        
+        Args:
+            source_path (str): The full-size image
+            box (tuple): (max width, max height) of the thumbnail
+            
+        Returns:
+            tuple: (PIL thumbnail, (source width, source height))
+        """
+        source_key = self._source_key(source_path)
+        thumb_path = self.thumbnail_path(source_key, box)
+        
+        if os.path.exists(thumb_path):
+            try:
+                return self._load(thumb_path)
+            except Exception as e:
+                logger.log_warning(f"Discarding unreadable thumbnail {thumb_path}: {str(e)}")
+        
+        return self._generate(source_path, thumb_path, box)
+    
+    def ensure(self, source_path, box=THUMBNAIL_PREVIEW_SIZE):
+        """
+        Make sure a thumbnail exists on disk, e.g. right after a download
+        
+        Returns:
+            tuple: (source width, source height), or None if the image cannot be read
+        """
+        try:
+            source_key = self._source_key(source_path)
+            thumb_path = self.thumbnail_path(source_key, box)
+            if os.path.exists(thumb_path):
+                return self._load(thumb_path)[1]
+            return self._generate(source_path, thumb_path, box)[1]
+        except Exception as e:
+            logger.log_warning(f"Could not create thumbnail for {source_path}: {str(e)}")
+            return None
+    
+    def get_photo(self, source_path, box=THUMBNAIL_PREVIEW_SIZE):
+        """
+        Get a Tk-ready thumbnail, served from memory when recently used
+        
+        Must be called on the Tk main thread.
+        
+        Returns:
+            tuple: (ImageTk.PhotoImage, (source width, source height))
+        """
+        cache_key = (self._source_key(source_path), tuple(box))
+        
+        with self._photos_lock:
+            cached = self._photos.get(cache_key)
+            if cached is not None:
+                self._photos.move_to_end(cache_key)
+                return cached
+        
+        thumbnail, source_size = self.get(source_path, box)
+        entry = (ImageTk.PhotoImage(thumbnail), source_size)
+        
+        with self._photos_lock:
+            self._photos[cache_key] = entry
+            while len(self._photos) > self.memory_items:
+                self._photos.popitem(last=False)
+        
+        return entry
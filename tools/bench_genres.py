@@ -0,0 +1,86 @@
+"""
+Benchmark of GenreModel bulk writes at 50k genres.
+
+Compares writing a taxonomy list one genre at a time with add() (one
+INSERT and one commit each, as the genre import used to), with one
+upsert_many() call, and with upsert_changed() for a list where nothing
+changed and for one where a tenth of the genres changed.
+
+Run from the project root:
+    python -m tools.bench_genres
+"""
+
+import os
+import tempfile
+import time
+import app_logger as logger
+from db_manager.connection import DatabaseConnectionManager
+from db_manager.schema import initialize_tables
+from db_manager.migrations import apply_migrations
+from db_manager.models.genre import GenreModel
+
+GENRES = 50_000
+
+
+def make_genres(count, suffix=""):
+    """A taxonomy list of count genres, each parented by one of the first 100"""
+    return [
+        {
+            'id': i,
+            'name': f"Genre {i}{suffix}",
+            'description': f"Description of genre {i}",
+            'type': ("genre", "subgenre", "mood", "theme")[i % 4],
+            'parentId': i % 100 + 1 if i > 100 else None,
+            'createdAt': "2024-01-01T00:00:00Z",
+            'updatedAt': "2024-01-01T00:00:00Z",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def open_database(directory, name):
+    """A connection manager on a new database with the schema applied"""
+    manager = DatabaseConnectionManager(os.path.join(directory, name))
+    with manager.connection() as conn:
+        cursor = conn.cursor()
+        initialize_tables(cursor)
+        conn.commit()
+        apply_migrations(cursor)
+    return manager
+
+
+def timed(call):
+    """Seconds taken by call()"""
+    started = time.perf_counter()
+    call()
+    return time.perf_counter() - started
+
+
+def run(count=GENRES):
+    """Time each way of writing count genres; returns {case: seconds}"""
+    genres = make_genres(count)
+    changed = [dict(genre, name=f"{genre['name']} (renamed)") if genre['id'] % 10 == 0 else genre
+               for genre in genres]
+    results = {}
+    logger.set_debug_enabled(False)
+    logger.set_file_logging(False)
+    with tempfile.TemporaryDirectory() as directory:
+        manager = open_database(directory, "per_row.db")
+        model = GenreModel(manager)
+        results["add() per genre"] = timed(lambda: [model.add(genre) for genre in genres])
+        manager.close_all()
+
+        manager = open_database(directory, "bulk.db")
+        model = GenreModel(manager)
+        results["upsert_many()"] = timed(lambda: model.upsert_many(genres))
+        results["upsert_changed(), none changed"] = timed(lambda: model.upsert_changed(genres))
+        results["upsert_changed(), 10% changed"] = timed(lambda: model.upsert_changed(changed))
+        manager.close_all()
+    logger.set_debug_enabled(True)
+    logger.set_file_logging(True)
+    return results
+
+
+if __name__ == "__main__":
+    for case, seconds in run().items():
+        print(f"{case:<32} {seconds:8.2f} s  ({seconds / GENRES * 1e6:7.1f} us/genre)")
@@ -0,0 +1,49 @@
+"""
+Microbenchmark of app_logger message formatting.
+
+Compares eager f-string messages with lazy %-style arguments for a large
+payload, with debug logging disabled and enabled.
+
+Run from the project root:
+    python -m tools.bench_logging
+"""
+
+import contextlib
+import io
+import timeit
+import app_logger as logger
+
+# Roughly the size of a publisher catalogue author entry
+PAYLOAD = {
+    "author": {"id": 1, "author_name": "Example Author", "bio": "x" * 2000},
+    "books": [{"id": i, "title": f"Book {i}", "genreTaxonomies": [{"taxonomyId": j} for j in range(20)]}
+              for i in range(50)],
+}
+
+CASES = {
+    "f-string": lambda: logger.log_debug(f"adding author {PAYLOAD}"),
+    "lazy": lambda: logger.log_debug("adding author %s", PAYLOAD),
+}
+
+
+def run(number=2000):
+    """Time each case with debug logging off and on; returns {(enabled, case): seconds per call}"""
+    results = {}
+    sink = io.StringIO()
+    logger.set_file_logging(False)
+    with contextlib.redirect_stdout(sink):
+        for enabled in (False, True):
+            logger.set_debug_enabled(enabled)
+            for name, case in CASES.items():
+                results[(enabled, name)] = timeit.timeit(case, number=number) / number
+                logger.flush()
+                for pending in logger._ui_pending.values():
+                    pending.clear()
+    logger.set_debug_enabled(True)
+    logger.set_file_logging(True)
+    return results
+
+
+if __name__ == "__main__":
+    for (enabled, name), seconds in run().items():
+        print(f"debug {'on ' if enabled else 'off'}  {name:<9} {seconds * 1e6:9.2f} us/call")
@@ -0,0 +1,93 @@
+"""
+Microbenchmark of DatabaseConnectionManager connection handling.
+
+Compares per-query latency of BookModel lookups on a 10k-row catalogue
+with a fresh connection opened and closed around every query (the
+behaviour before connection pooling) and with the pooled per-thread
+connection.
+
+Run from the project root:
+    python -m tools.bench_pool
+"""
+
+import contextlib
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import app_logger as logger
+from db_manager.connection import DatabaseConnectionManager
+from db_manager.schema import initialize_tables
+from db_manager.migrations import apply_migrations
+from db_manager.models.book import BookModel
+
+BOOKS = 10_000
+AUTHORS = 500
+
+
+class PerQueryConnectionManager(DatabaseConnectionManager):
+    """Opens and closes a connection around every query, as before pooling"""
+    @contextlib.contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def build_catalogue(db_path):
+    """Create the schema and fill it with AUTHORS authors and BOOKS books"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    initialize_tables(cursor)
+    apply_migrations(cursor)
+    # Fixture rows are not local changes to push
+    cursor.execute("UPDATE change_tracking SET paused = 1")
+    cursor.executemany(
+        "INSERT INTO authors (id, author_name) VALUES (?, ?)",
+        [(i, f"Author {i}") for i in range(1, AUTHORS + 1)]
+    )
+    cursor.executemany(
+        "INSERT INTO books (id, title, author, authorId, description) VALUES (?, ?, ?, ?, ?)",
+        [(i, f"Book {i}", f"Author {i % AUTHORS + 1}", i % AUTHORS + 1, "x" * 500)
+         for i in range(1, BOOKS + 1)]
+    )
+    cursor.execute("UPDATE change_tracking SET paused = 0")
+    conn.commit()
+    conn.close()
+
+
+def run(queries=5000, seed=1):
+    """Time book lookups with each manager; returns {(manager, lookup): seconds per query}"""
+    results = {}
+    logger.set_debug_enabled(False)
+    logger.set_file_logging(False)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        build_catalogue(db_path)
+
+        lookups = {
+            "get": lambda books, rng: books.get(rng.randint(1, BOOKS)),
+            "get_by_author": lambda books, rng: books.get_by_author(rng.randint(1, AUTHORS)),
+        }
+        for name, manager_class in (("per-query", PerQueryConnectionManager),
+                                    ("pooled", DatabaseConnectionManager)):
+            manager = manager_class(db_path)
+            books = BookModel(manager)
+            for lookup, call in lookups.items():
+                rng = random.Random(seed)
+                started = time.perf_counter()
+                for _ in range(queries):
+                    call(books, rng)
+                results[(name, lookup)] = (time.perf_counter() - started) / queries
+            manager.close_all()
+    logger.set_debug_enabled(True)
+    logger.set_file_logging(True)
+    return results
+
+
+if __name__ == "__main__":
+    for (name, lookup), seconds in run().items():
+        print(f"{name:<10} {lookup:<14} {seconds * 1e6:9.2f} us/query")
@@ -0,0 +1,251 @@
+"""
+EXPLAIN QUERY PLAN check of the model and lookup queries.
+
+Runs the model methods against a small temporary database, recording
+every statement they send through DatabaseConnectionManager, adds the
+raw lookups the processors and tabs run through execute_query, and
+explains each one. A statement that filters rows (has a WHERE clause)
+must not SCAN a table of the catalogue; statements without one read the
+whole table by design, and the TEMP staging tables are read whole by
+CatalogueStagingModel.merge(). The hot lookups must also use the index
+they were given, including book_genres(book_id), which is served by the
+UNIQUE(book_id, genre_id) autoindex rather than an index of its own.
+
+Run from the project root (exits with status 1 on a failure):
+    python -m tools.check_query_plans
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import app_logger as logger
+from db_manager.connection import DatabaseConnectionManager
+from db_manager.schema import initialize_tables
+from db_manager.migrations import apply_migrations
+from db_manager.profiler import EXPLAINABLE
+from db_manager.models.author import AuthorModel
+from db_manager.models.book import BookModel
+from db_manager.models.genre import GenreModel
+from db_manager.models.image import ImageModel
+from db_manager.models.id_map import IdMapModel
+from db_manager.models.http_cache import HttpCacheModel
+from db_manager.models.image_blob import ImageBlobModel
+from db_manager.models.pending_push import PendingPushModel
+from db_manager.models.sync_state import SyncStateModel
+from db_manager.models.content_hash import ContentHashModel
+from db_manager.models.catalogue_staging import CatalogueStagingModel
+
+# Lookups run outside the models (processors, mass import and tabs)
+APP_QUERIES = [
+    ("SELECT id FROM books WHERE id = ? OR (title = ? AND authorId = ?)", (1, "Book 1", 1)),
+    ("SELECT id FROM books WHERE title = ? AND author = ?", ("Book 1", "Author 1")),
+    ("SELECT id FROM books WHERE title = ? AND (author = ? OR authorId = ?)", ("Book 1", "Author 1", 1)),
+    ("SELECT id FROM authors WHERE author_name = ?", ("Author 1",)),
+    ("SELECT local_image_path FROM authors WHERE id = ?", (1,)),
+    ("SELECT id, name, description, type, parentId FROM genres "
+     "WHERE type IN (?, '') OR type IS NULL ORDER BY name", ("genre",)),
+    ("SELECT id, name, description, type, parentId FROM genres WHERE type = ? ORDER BY name", ("mood",)),
+    ("SELECT g.id, g.name, g.description, g.type, bg.rank, bg.importance FROM genres g "
+     "JOIN book_genres bg ON g.id = bg.genre_id WHERE bg.book_id = ? ORDER BY bg.rank", (1,)),
+]
+
+# Hot lookups and the index each must use
+INDEX_EXPECTATIONS = [
+    ("SELECT * FROM books WHERE authorId = ?", (1,), "idx_books_author_id"),
+    ("SELECT id FROM books WHERE title = ? AND authorId = ?", ("Book 1", 1), "idx_books_title_author_id"),
+    ("SELECT id FROM books WHERE title = ? AND author = ?", ("Book 1", "Author 1"), "idx_books_title_author"),
+    ("SELECT id FROM images WHERE bookId = ? AND imageUrl = ?", (1, "https://example.com/1.jpg"),
+     "idx_images_book_id_url"),
+    ("SELECT id FROM genres WHERE type = ?", ("genre",), "idx_genres_type"),
+    ("SELECT id FROM genres WHERE parentId = ?", (1,), "idx_genres_parent_id"),
+    ("SELECT id FROM authors WHERE author_name = ?", ("Author 1",), "idx_authors_author_name"),
+    ("SELECT genre_id FROM book_genres WHERE book_id = ?", (1,), "sqlite_autoindex_book_genres_1"),
+]
+
+_SCAN = re.compile(r"^SCAN (\w+)")
+_TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(?:temp\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+
+class RecordingConnectionManager(DatabaseConnectionManager):
+    """Explains every distinct statement on its connection just before it runs"""
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.plans = {}  # query -> plan lines, or the error explaining it raised
+
+    def _record(self, query, params):
+        if query in self.plans or query.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+            return
+        with self.connection() as conn:
+            try:
+                self.plans[query] = explain(conn, query, params)
+            except sqlite3.Error as e:
+                self.plans[query] = e
+
+    def execute(self, query, params=None, commit=True):
+        self._record(query, params)
+        return super().execute(query, params, commit)
+
+    def executemany(self, query, param_rows, commit=True):
+        param_rows = list(param_rows)
+        if param_rows:
+            self._record(query, param_rows[0])
+        return super().executemany(query, param_rows, commit)
+
+
+def exercise_models(manager):
+    """Call the model methods that read or write existing rows"""
+    authors = AuthorModel(manager)
+    books = BookModel(manager)
+    genres = GenreModel(manager)
+    images = ImageModel(manager)
+    id_map = IdMapModel(manager)
+    http_cache = HttpCacheModel(manager)
+    image_blobs = ImageBlobModel(manager)
+    pending_push = PendingPushModel(manager)
+    sync_state = SyncStateModel(manager)
+    content_hashes = ContentHashModel(manager)
+    staging = CatalogueStagingModel(manager, books)
+
+    manager.execute("INSERT INTO users (id, username) VALUES (1, 'user')")
+    author_ids = authors.upsert_many([
+        {'id': i, 'userId': 1, 'author_name': f"Author {i}"} for i in (1, 2)
+    ])
+    book_ids = books.upsert_many([
+        {'id': i, 'title': f"Book {i}", 'author': "Author 1", 'authorId': 1} for i in (1, 2)
+    ])
+    genre_ids = genres.upsert_many([{'id': i, 'name': f"Genre {i}", 'type': "genre"} for i in (1, 2)])
+    genres.upsert_changed([{'id': 1, 'name': "Genre 1 renamed", 'type': "genre"}])
+    image_ids = images.upsert_many([
+        {'bookId': book_id, 'imageUrl': f"https://example.com/{book_id}.jpg"} for book_id in book_ids
+    ])
+
+    authors.get(author_ids[0])
+    authors.get_with_user(author_ids[0])
+    authors.get_books(author_ids[0])
+    authors.update(author_ids[0], {'bio': "Bio"})
+    authors.update_local_image_paths({author_ids[0]: "images/author.jpg"})
+    books.get(book_ids[0])
+    books.get_by_author(author_ids[0])
+    books.update(book_ids[0], {'description': "Description"})
+    genres.add_book_genre(book_ids[0], genre_ids[0])
+    genres.reconcile_book_genres(book_ids[0], [(genre_ids[1], 1, 0.5)])
+    genres.get(genre_ids[0])
+    genres.get_by_book(book_ids[0])
+    genres.get_subgenres(genre_ids[0])
+    images.get_by_book(book_ids[0])
+    images.update(image_ids[0], {'width': 100})
+    images.update_file_info_many([{'id': image_ids[0], 'local_file_path': "images/1.jpg"}])
+    images.delete(image_ids[1])
+
+    id_map.set('author', 101, author_ids[0])
+    id_map.set_many('book', {201: book_ids[0]})
+    id_map.resolve_many('author', [101, 102])
+    id_map.clear_cache()
+    id_map.get('book', 201)
+    http_cache.upsert_many([{'url': "https://example.com/1.jpg", 'etag': '"1"'}])
+    http_cache.get_many(["https://example.com/1.jpg"])
+    image_blobs.register_many([("abc", "store/ab/abc.jpg", 10)])
+    image_blobs.set_refs('image', {image_ids[0]: "abc"})
+    image_blobs.delete_many(["abc"])
+    pending_push.count('author')
+    pending_push.get_authors()
+    pending_push.get_books()
+    pending_push.get_book_taxonomies()
+    pending_push.mark_pushed('author', {author_ids[0]: 1})
+    sync_state.begin("/api/test")
+    sync_state.set_run_started("/api/test", "2024-01-01T00:00:00Z")
+    sync_state.set_checkpoint("/api/test", 1)
+    sync_state.restart("/api/test")
+    sync_state.complete("/api/test")
+    sync_state.reset("/api/test")
+    content_hashes.set('author', author_ids[0], "hash")
+    content_hashes.clear_cache()
+    content_hashes.get('author', author_ids[0])
+
+    # As in sync, server data is merged with change tracking paused
+    with manager.change_tracking_paused(), manager.transaction():
+        staging.begin()
+        staging.add_author({'id': 101, 'author_name': "Author 1"}, "hash")
+        staging.add_book(
+            {'id': 201, 'title': "Book 1", 'author': "Author 1", 'authorId': 1}, "hash",
+            images=[{'imageUrl': "https://example.com/1.jpg"}],
+            genres=[{'genre_id': genre_ids[0], 'rank': 0, 'importance': 1.0}]
+        )
+        staging.merge()
+
+
+def table_aliases(query):
+    """Map every table name and alias in a query to its table"""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(query):
+        aliases[table] = table
+        if alias and alias.upper() not in ("ON", "WHERE", "SET", "VALUES", "USING", "JOIN", "LEFT", "INNER"):
+            aliases[alias] = table
+    return aliases
+
+
+def explain(conn, query, params):
+    """EXPLAIN QUERY PLAN detail lines of a statement"""
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ())]
+
+
+def full_scans(query, plan):
+    """Catalogue tables a filtering statement scans in full"""
+    if not _WHERE.search(query):
+        return []
+    aliases = table_aliases(query)
+    scans = []
+    for line in plan:
+        match = _SCAN.match(line)
+        if match:
+            table = aliases.get(match.group(1), match.group(1))
+            if not table.startswith("stage_"):
+                scans.append(line)
+    return scans
+
+
+def check():
+    """Run the models and explain their statements; returns (statements checked, list of failure messages)"""
+    failures = []
+    logger.set_debug_enabled(False)
+    logger.set_file_logging(False)
+    with tempfile.TemporaryDirectory() as directory:
+        manager = RecordingConnectionManager(os.path.join(directory, "plans.db"))
+        with manager.connection() as conn:
+            cursor = conn.cursor()
+            initialize_tables(cursor)
+            conn.commit()
+            apply_migrations(cursor)
+
+        exercise_models(manager)
+        with manager.connection() as conn:
+            for query, params in APP_QUERIES:
+                manager.plans[query] = explain(conn, query, params)
+
+            for query, plan in manager.plans.items():
+                if isinstance(plan, sqlite3.Error):
+                    failures.append(f"Could not explain {' '.join(query.split())}: {plan}")
+                    continue
+                for line in full_scans(query, plan):
+                    failures.append(f"{line} in: {' '.join(query.split())}")
+
+            for query, params, index in INDEX_EXPECTATIONS:
+                plan = explain(conn, query, params)
+                if not any(index in line for line in plan):
+                    failures.append(f"{query} does not use {index}: {plan}")
+        checked = len(manager.plans) + len(INDEX_EXPECTATIONS)
+        manager.close_all()
+    logger.set_debug_enabled(True)
+    logger.set_file_logging(True)
+    return checked, failures
+
+
+if __name__ == "__main__":
+    checked, failures = check()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{checked} statements checked, {len(failures)} failures")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,110 @@
+"""
+Offline report over the structured log files written by app_logger.
+
+Reads LOG_FILE_PATH and its rotated copies and prints:
+- the slowest operations (syncs, pushes, imports, downloads...)
+- duration totals per kind of operation
+- error and warning hot spots, grouped by operation and message shape
+
+Run from the project root:
+    python -m tools.log_report [--top N] [--op NAME] [LOG_FILE]
+"""
+
+import argparse
+import glob
+import json
+import re
+import statistics
+from collections import Counter, defaultdict
+from config import LOG_FILE_PATH
+
+# Numbers, hex IDs and quoted values vary between otherwise identical messages
+_VARIABLE_PARTS = re.compile(r"'[^']*'|\"[^\"]*\"|https?://\S+|\b[0-9a-f]{12,}\b|\d+(\.\d+)?")
+
+
+def log_files(path):
+    """The log file and its rotated copies, oldest first"""
+    rotated = []
+    for name in glob.glob(f"{glob.escape(path)}.*"):
+        suffix = name[len(path) + 1:]
+        if suffix.isdigit():
+            rotated.append((int(suffix), name))
+    return [name for _, name in sorted(rotated, reverse=True)] + [path]
+
+
+def read_records(paths):
+    """Yield the records of the given files, skipping lines that are not JSON"""
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as log_file:
+                for line in log_file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def message_shape(message):
+    """A message with its variable parts replaced, for grouping"""
+    return _VARIABLE_PARTS.sub("#", message or "")[:160]
+
+
+def summarize(records, op_filter=None):
+    """Collect operation timings and problem counts from records"""
+    operations = []
+    problems = Counter()
+    for record in records:
+        if op_filter and record.get("op_name") != op_filter:
+            continue
+        if record.get("level") == "op":
+            operations.append(record)
+        elif record.get("level") in ("error", "warning"):
+            problems[(record["level"], record.get("op_name") or "-", message_shape(record.get("msg")))] += 1
+    return operations, problems
+
+
+def print_report(operations, problems, top):
+    """Print the slowest operations, per-kind totals and problem hot spots"""
+    print(f"Slowest {top} operations")
+    for op in sorted(operations, key=lambda op: op.get("duration_ms", 0), reverse=True)[:top]:
+        detail = op.get("url") or op.get("kind") or op.get("error") or ""
+        print(f"  {op.get('duration_ms', 0) / 1000:9.2f}s  {op.get('op_name', '?'):<13} {op.get('status', ''):<7} "
+              f"{op.get('ts', '')}  {op.get('op', '')}  {detail}")
+
+    by_kind = defaultdict(list)
+    failures = Counter()
+    for op in operations:
+        by_kind[op.get("op_name", "?")].append(op.get("duration_ms", 0))
+        if op.get("status") != "ok":
+            failures[op.get("op_name", "?")] += 1
+
+    print("\nOperations by kind")
+    print(f"  {'name':<13} {'count':>7} {'failed':>7} {'total s':>10} {'mean ms':>10} {'max ms':>10}")
+    for name, durations in sorted(by_kind.items(), key=lambda item: sum(item[1]), reverse=True):
+        print(f"  {name:<13} {len(durations):>7} {failures[name]:>7} {sum(durations) / 1000:>10.1f} "
+              f"{statistics.mean(durations):>10.1f} {max(durations):>10.1f}")
+
+    print(f"\nTop {top} error and warning hot spots")
+    for (level, op_name, shape), count in problems.most_common(top):
+        print(f"  {count:>6}  {level:<7} {op_name:<13} {shape}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report slow operations and error hot spots from the structured log")
+    parser.add_argument("log_file", nargs="?", default=LOG_FILE_PATH, help="log file (rotated copies are read too)")
+    parser.add_argument("--top", type=int, default=20, help="rows per section")
+    parser.add_argument("--op", help="only this kind of operation, e.g. sync or download")
+    args = parser.parse_args(argv)
+
+    paths = log_files(args.log_file)
+    operations, problems = summarize(read_records(paths), args.op)
+    if not operations and not problems:
+        print(f"No operations or problems found in {args.log_file}")
+        return
+    print_report(operations, problems, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Stand-in catalogue server and a check of incremental sync against it.
+
+StandInServer serves the author catalogue and genre list over
+http.server on localhost, from an in-memory catalogue whose authors carry
+server-side update times. It answers the way the real API is expected to:
+authors in ascending ID order, updatedSince filtering that list and after
+skipping the authors up to a checkpoint, with the server time each
+response is current to in SYNC_WATERMARK_HEADER. It can also be told to
+reject updatedSince (as a server without the history for a watermark
+would) or to cut the catalogue off part way through.
+
+check() runs a real DataSynchronizer, through the streaming pipeline, in
+a temporary directory against the server:
+- incremental: a second sync asks only for the authors updated since
+  the first and writes just those
+- fallback: a rejected updatedSince is retried as a full sync
+- resume: a sync cut off part way resumes after the last author it
+  committed, and its watermark is the server time it started at, so
+  edits made while it was stopped are fetched next time
+
+The cut-off sync logs the error it runs into.
+
+Run from the project root (exits with status 1 on a failure):
+    python -m tools.sync_stand_in
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qsl, urlsplit
+import app_logger as logger
+import data_sync.synchronizer as synchronizer_module
+from api_client import ApiClient
+from config import AUTHORS_ENDPOINT, GENRE_ENDPOINT, SYNC_WATERMARK_HEADER
+from data_sync.synchronizer import DataSynchronizer
+from db_manager import DatabaseManager
+
+AUTHORS = 5
+COOKIES = {'session': "stand-in"}
+GENRES = [{'id': 1, 'name': "Fiction", 'type': "genre"}]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Hands each GET to the StandInServer it belongs to"""
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.server.stand_in.respond(self, url.path, dict(parse_qsl(url.query)))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """
+    In-memory catalogue served over HTTP on localhost
+
+    The server clock is a counter of seconds from EPOCH that ticks on
+    every edit and every response, so each response's watermark is later
+    than the edits it includes and earlier than any made after it.
+    """
+    EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def __init__(self, authors=AUTHORS):
+        self.clock = 0
+        self.authors = {}  # remote ID -> (catalogue entry, update time)
+        self.requests = []  # (path, params, watermark) of every request, in order
+        self.reject_updated_since = False
+        self.cut_after = None  # authors sent before a catalogue response breaks off
+        self._lock = threading.Lock()
+        for author_id in range(1, authors + 1):
+            self.update(author_id, f"Biography {author_id}")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.stand_in = self
+        self._thread = None
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _tick(self):
+        """Advance the clock and return the new server time"""
+        self.clock += 1
+        return (self.EPOCH + timedelta(seconds=self.clock)).isoformat(timespec="seconds")
+
+    def update(self, author_id, bio):
+        """Create an author or change their bio, as an edit on the server would"""
+        with self._lock:
+            entry = {
+                'author': {'id': author_id, 'author_name': f"Author {author_id}", 'bio': bio},
+                'books': [{'id': 1000 + author_id, 'title': f"Book {author_id}"}],
+            }
+            self.authors[author_id] = (entry, self._tick())
+
+    def catalogue(self, params):
+        """Authors in ascending ID order, filtered by updatedSince and after"""
+        since = params.get('updatedSince')
+        after = int(params.get('after', 0))
+        return [
+            entry for author_id, (entry, updated) in sorted(self.authors.items())
+            if author_id > after and (since is None or updated >= since)
+        ]
+
+    def catalogue_requests(self, start=0):
+        """Params of the catalogue requests made since request number start"""
+        return [params for path, params, _ in self.requests[start:] if path == AUTHORS_ENDPOINT]
+
+    def respond(self, handler, path, params):
+        """Answer one request"""
+        with self._lock:
+            watermark = self._tick()
+            self.requests.append((path, params, watermark))
+            cut = False
+            if path == GENRE_ENDPOINT:
+                status, body = 200, json.dumps(GENRES).encode()
+            elif path != AUTHORS_ENDPOINT:
+                status, body = 404, b'{"error": "not found"}'
+            elif 'updatedSince' in params and self.reject_updated_since:
+                status, body = 410, b'{"error": "updatedSince is too old"}'
+            elif self.cut_after is not None:
+                # The list breaks off after cut_after whole authors
+                status, cut = 200, True
+                body = json.dumps(self.catalogue(params)[:self.cut_after]).encode()[:-1] + b","
+            else:
+                status, body = 200, json.dumps(self.catalogue(params)).encode()
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header(SYNC_WATERMARK_HEADER, watermark)
+        if cut:
+            handler.send_header("Connection", "close")
+        else:
+            handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def author_bio(db_manager, remote_id):
+    """Local bio of a synced author, or None"""
+    local_id = db_manager.id_map.get('author', remote_id)
+    rows = db_manager.execute_query("SELECT bio FROM authors WHERE id = ?", (local_id,))
+    return rows[0][0] if rows else None
+
+
+def check_incremental(server, synchronizer, db_manager, expect):
+    """A second sync asks only for the authors updated since the first"""
+    start = len(server.requests)
+    synchronizer.synchronize_data(cookies=COOKIES)
+    expect(server.catalogue_requests(start) == [{}], "first sync was not a full one")
+    watermark = db_manager.sync_state.get(AUTHORS_ENDPOINT)['watermark']
+    first_response = [w for path, _, w in server.requests[start:] if path == AUTHORS_ENDPOINT][0]
+    expect(watermark == first_response, f"watermark {watermark} is not the server time of the catalogue response")
+    expect(author_bio(db_manager, AUTHORS) == f"Biography {AUTHORS}", "first sync did not write every author")
+
+    server.update(3, "Biography 3 (edited)")
+    start = len(server.requests)
+    synchronizer.synchronize_data(cookies=COOKIES)
+    expect(server.catalogue_requests(start) == [{'updatedSince': watermark}],
+           f"second sync requested {server.catalogue_requests(start)}, not updatedSince={watermark}")
+    expect(synchronizer.sync_stats['author'] == {'written': 1, 'skipped': 0},
+           f"second sync wrote {synchronizer.sync_stats['author']} authors, not just the edited one")
+    expect(author_bio(db_manager, 3) == "Biography 3 (edited)", "the edited author was not written")
+
+
+def check_fallback(server, synchronizer, db_manager, expect):
+    """A rejected updatedSince is retried as a full sync"""
+    watermark = db_manager.sync_state.get(AUTHORS_ENDPOINT)['watermark']
+    server.update(4, "Biography 4 (edited)")
+    server.reject_updated_since = True
+    start = len(server.requests)
+    try:
+        synchronizer.synchronize_data(cookies=COOKIES)
+    finally:
+        server.reject_updated_since = False
+
+    expect(server.catalogue_requests(start) == [{'updatedSince': watermark}, {}],
+           f"fallback sync requested {server.catalogue_requests(start)}")
+    expect(author_bio(db_manager, 4) == "Biography 4 (edited)", "the full sync did not write the edited author")
+    full_response = [w for path, params, w in server.requests[start:] if path == AUTHORS_ENDPOINT and not params]
+    state = db_manager.sync_state.get(AUTHORS_ENDPOINT)
+    expect(state['watermark'] == full_response[0] if full_response else False,
+           f"watermark {state['watermark']} is not the server time of the full response")
+
+
+def check_resume(server, synchronizer, db_manager, expect):
+    """A sync cut off part way resumes after the last author it committed"""
+    watermark = db_manager.sync_state.get(AUTHORS_ENDPOINT)['watermark']
+    for author_id in (2, 3, 4):
+        server.update(author_id, f"Biography {author_id} (resumed)")
+    server.cut_after = 1
+    start = len(server.requests)
+    try:
+        synchronizer.synchronize_data(cookies=COOKIES)
+    finally:
+        server.cut_after = None
+
+    cut_started = [w for path, _, w in server.requests[start:] if path == AUTHORS_ENDPOINT][0]
+    state = db_manager.sync_state.get(AUTHORS_ENDPOINT)
+    expect(state['checkpoint'] == 2, f"cut-off sync left checkpoint {state['checkpoint']}, not 2")
+    expect(state['watermark'] == watermark, "cut-off sync moved the watermark")
+    expect(state['run_started'] == cut_started, f"cut-off sync started at {state['run_started']}, not {cut_started}")
+    expect(author_bio(db_manager, 2) == "Biography 2 (resumed)", "cut-off sync did not commit the author it received")
+
+    # Edited while the sync was stopped, below its checkpoint
+    server.update(1, "Biography 1 (edited while stopped)")
+    start = len(server.requests)
+    synchronizer.synchronize_data(cookies=COOKIES)
+    expect(server.catalogue_requests(start) == [{'updatedSince': watermark, 'after': '2'}],
+           f"resumed sync requested {server.catalogue_requests(start)}")
+    expect(all(author_bio(db_manager, author_id) == f"Biography {author_id} (resumed)" for author_id in (3, 4)),
+           "resumed sync did not write the authors after its checkpoint")
+    state = db_manager.sync_state.get(AUTHORS_ENDPOINT)
+    expect(state['watermark'] == cut_started and state['checkpoint'] is None,
+           f"resumed sync finished with {state}, not watermark {cut_started}")
+
+    start = len(server.requests)
+    synchronizer.synchronize_data(cookies=COOKIES)
+    expect(server.catalogue_requests(start) == [{'updatedSince': cut_started}],
+           f"sync after the resume requested {server.catalogue_requests(start)}")
+    expect(author_bio(db_manager, 1) == "Biography 1 (edited while stopped)",
+           "the author edited while the sync was stopped was never fetched")
+
+
+CASES = [
+    ("incremental", check_incremental),
+    ("fallback", check_fallback),
+    ("resume", check_resume),
+]
+
+
+def check():
+    """Run the cases in order against one server and database; returns (cases run, list of failure messages)"""
+    failures = []
+    previous_directory = os.getcwd()
+    logger.set_debug_enabled(False)
+    logger.set_file_logging(False)
+    with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.multiple(synchronizer_module, SYNC_INCREMENTAL=True, SYNC_PIPELINE=True,
+                                SYNC_STAGED_MERGE=False):
+        # The database, image store and traces use paths relative to the working directory
+        os.chdir(directory)
+        try:
+            db_manager = DatabaseManager()
+            synchronizer = DataSynchronizer(db_manager)
+            with StandInServer() as server:
+                synchronizer.api_client = ApiClient(base_url=server.url, max_retries=0)
+                for name, case in CASES:
+                    def expect(condition, message, name=name):
+                        if not condition:
+                            failures.append(f"{name}: {message}")
+                    case(server, synchronizer, db_manager, expect)
+            db_manager.close()
+        finally:
+            os.chdir(previous_directory)
+    logger.set_debug_enabled(True)
+    logger.set_file_logging(True)
+    return len(CASES), failures
+
+
+if __name__ == "__main__":
+    cases, failures = check()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{cases} cases checked, {len(failures)} failures")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,214 @@
+"""
+Lightweight timing of sync, push and import stages.
+
+A trace is opened around one top-level run and every span opened inside
+it, on any thread that runs in a copy of the caller's context
+(contextvars.copy_context()), is timed with the monotonic clock:
+
+    @tracing.trace("sync")
+    def synchronize_data(self, ...):
+        ...
+
+    @tracing.span("process_book")
+    def process_book(self, book, author_id):
+        ...
+
+    with tracing.span("json_decode"):
+        data = response.json()
+
+Spans opened outside a trace cost a context lookup and are not recorded.
+Each finished trace keeps per-stage totals (keyed by the path of span
+names from the root), is listed by latest()/finished() for the Timings
+debug tab, and is exported as Chrome trace-event JSON (open it in
+chrome://tracing or https://ui.perfetto.dev) to TRACE_EXPORT_PATH.
+"""
+
+import collections
+import contextlib
+import contextvars
+import datetime
+import json
+import os
+import threading
+import time
+import app_logger as logger
+from config import TRACE_ENABLED, TRACE_EXPORT_PATH, TRACE_MAX_SPANS, TRACE_HISTORY
+
+# (trace, path of span names) the current code runs in
+_current = contextvars.ContextVar("trace_span", default=None)
+
+# Most recently finished traces, newest last
+_finished = collections.deque(maxlen=TRACE_HISTORY)
+
+class Trace:
+    """Timings collected during one traced run"""
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.datetime.now()
+        self.origin = time.perf_counter()
+        self.duration = None
+        self.export_path = None
+        self.stages = {}  # path -> [count, total seconds, first start offset]
+        self.spans = []  # (path, thread name, start offset, seconds), up to TRACE_MAX_SPANS
+        self.dropped_spans = 0
+        self._lock = threading.Lock()
+
+    def record(self, path, started, seconds):
+        """Add one finished span"""
+        offset = started - self.origin
+        with self._lock:
+            stage = self.stages.get(path)
+            if stage is None:
+                stage = self.stages[path] = [0, 0.0, offset]
+            stage[0] += 1
+            stage[1] += seconds
+
+            if len(self.spans) < TRACE_MAX_SPANS:
+                self.spans.append((path, threading.current_thread().name, offset, seconds))
+            else:
+                self.dropped_spans += 1
+
+    def breakdown(self):
+        """
+        Per-stage totals, parents before their children in start order
+
+        Stages on different threads overlap, so children of a stage can add
+        up to more than it.
+
+        Returns:
+            list: dicts with path, name, depth, count, total_ms and share
+                  (fraction of the whole trace)
+        """
+        with self._lock:
+            stages = dict(self.stages)
+
+        def start_order(path):
+            return tuple(stages[path[:depth]][2] if path[:depth] in stages else 0.0
+                         for depth in range(1, len(path) + 1))
+
+        total = self.duration or 0.0
+        return [
+            {
+                'path': path,
+                'name': path[-1],
+                'depth': len(path) - 1,
+                'count': stages[path][0],
+                'total_ms': stages[path][1] * 1000,
+                'share': stages[path][1] / total if total else 0.0,
+            }
+            for path in sorted(stages, key=start_order)
+        ]
+
+    def to_trace_events(self):
+        """The spans in Chrome trace-event format"""
+        with self._lock:
+            spans = list(self.spans)
+
+        thread_ids = {}
+        events = []
+        for path, thread_name, offset, seconds in spans:
+            tid = thread_ids.setdefault(thread_name, len(thread_ids) + 1)
+            events.append({
+                'name': path[-1],
+                'cat': self.name,
+                'ph': 'X',
+                'ts': round(offset * 1e6, 1),
+                'dur': round(seconds * 1e6, 1),
+                'pid': 1,
+                'tid': tid,
+                'args': {'path': " > ".join(path)},
+            })
+        events.extend(
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': thread_name}}
+            for thread_name, tid in thread_ids.items()
+        )
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'trace': self.name,
+                'started_at': self.started_at.isoformat(timespec="seconds"),
+                'dropped_spans': self.dropped_spans,
+            },
+        }
+
+    def export(self, directory=TRACE_EXPORT_PATH):
+        """
+        Write the trace to directory as <name>-<start time>.json, keeping
+        only the newest TRACE_HISTORY files of this name
+
+        Returns:
+            str: The file written
+        """
+        os.makedirs(directory, exist_ok=True)
+        prefix = f"{self.name}-"
+        path = os.path.join(directory, f"{prefix}{self.started_at.strftime('%Y%m%d-%H%M%S-%f')[:-3]}.json")
+        with open(path, 'w', encoding='utf-8') as trace_file:
+            json.dump(self.to_trace_events(), trace_file)
+        self.export_path = path
+
+        exported = sorted(name for name in os.listdir(directory)
+                          if name.startswith(prefix) and name.endswith(".json"))
+        for name in exported[:-TRACE_HISTORY]:
+            os.remove(os.path.join(directory, name))
+        return path
+
+@contextlib.contextmanager
+def span(name):
+    """Time a block (or, as a decorator, a function) as a stage of the current trace"""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+
+    active_trace, parent_path = current
+    path = parent_path + (name,)
+    token = _current.set((active_trace, path))
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        active_trace.record(path, started, time.perf_counter() - started)
+        _current.reset(token)
+
+@contextlib.contextmanager
+def trace(name):
+    """
+    Trace a block (or, as a decorator, a function) as one top-level run
+
+    Inside another trace this is just a span of it. When the run ends,
+    the trace joins finished() and is exported if TRACE_EXPORT_PATH is set.
+    """
+    if not TRACE_ENABLED or _current.get() is not None:
+        with span(name):
+            yield
+        return
+
+    active_trace = Trace(name)
+    token = _current.set((active_trace, (name,)))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        active_trace.duration = time.perf_counter() - active_trace.origin
+        active_trace.record((name,), active_trace.origin, active_trace.duration)
+        _finished.append(active_trace)
+
+        if TRACE_EXPORT_PATH:
+            try:
+                active_trace.export()
+            except OSError as e:
+                logger.log_warning(f"Could not export {name} trace: {str(e)}")
+        logger.log_debug(
+            "%s trace finished in %.1fs (%s stages)%s", name, active_trace.duration,
+            len(active_trace.stages),
+            f", written to {active_trace.export_path}" if active_trace.export_path else ""
+        )
+
+def latest():
+    """The most recently finished trace, or None"""
+    return _finished[-1] if _finished else None
+
+def finished():
+    """Recently finished traces, oldest first"""
+    return list(_finished)